@@ -19,7 +19,7 @@ import {
 import CloudDownloadIcon from '@mui/icons-material/CloudDownload';
 import RefreshIcon from '@mui/icons-material/Refresh';
 import Layout from '../components/Layout';
-import { getNewsletterSubscribers } from '../services/api';
+import { downloadExport, getNewsletterSubscribers } from '../services/api';
 import { useSnackbar } from 'notistack';
 
 // Define newsletter subscriber interface
@@ -70,32 +70,10 @@ const NewsletterSubscribersManagement: React.FC = () => {
     page * rowsPerPage
   );
 
-  // Export to CSV functionality
-  const exportToCSV = () => {
+  // Xuất CSV từ server (đủ tất cả người đăng ký, không chỉ dữ liệu đã tải)
+  const exportToCSV = async () => {
     try {
-      // Create CSV content
-      const csvContent = [
-        // Header row
-        ["ID", "Email", "Ngày đăng ký"].join(","),
-        // Data rows
-        ...subscribers.map(sub => [
-          sub.id,
-          sub.email,
-          new Date(sub.created_at).toLocaleString('vi-VN')
-        ].join(","))
-      ].join("\n");
-
-      // Create blob and download link
-      const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-      const url = URL.createObjectURL(blob);
-      const link = document.createElement('a');
-      link.setAttribute('href', url);
-      link.setAttribute('download', `newsletter_subscribers_${new Date().toISOString().split('T')[0]}.csv`);
-      link.style.visibility = 'hidden';
-      document.body.appendChild(link);
-      link.click();
-      document.body.removeChild(link);
-      
+      await downloadExport('newsletter-subscribers', { export_format: 'csv' });
       enqueueSnackbar('Xuất file CSV thành công!', { variant: 'success' });
     } catch (error) {
       console.error('Lỗi khi xuất file CSV:', error);
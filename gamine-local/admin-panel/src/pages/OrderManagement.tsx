@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
     Box, Typography, Paper, Table, TableBody, TableCell, TableContainer, TableHead, 
     TableRow, Button, IconButton, Dialog, DialogActions, DialogContent, DialogTitle, 
@@ -12,7 +12,7 @@ import AddIcon from '@mui/icons-material/Add';
 import ShoppingCartIcon from '@mui/icons-material/ShoppingCart';
 import SearchIcon from '@mui/icons-material/Search';
 import Layout from '../components/Layout';
-import { getOrders, getOrder, createOrder, updateOrder, deleteOrder, getProducts, getUsers, getUser } from '../services/api';
+import { getOrders, getOrder, createOrder, updateOrder, deleteOrder, getProducts, getUsers, getUser, newIdempotencyKey } from '../services/api';
 import { Order, Product, User, OrderDetail, Payment } from '../types';
 import { useSnackbar } from 'notistack';
 
@@ -108,6 +108,9 @@ const OrderManagement: React.FC = () => {
         price: 0
     });
     
+    // Idempotency-Key của đơn hàng đang tạo, giữ nguyên khi lưu lại trong cùng một lần mở dialog
+    const createOrderKeyRef = useRef<string>(newIdempotencyKey());
+    
     const { enqueueSnackbar } = useSnackbar();
 
     useEffect(() => {
@@ -197,6 +200,7 @@ const OrderManagement: React.FC = () => {
                 payment_status: 'Pending'
             });
             setOrderDetails([]);
+            createOrderKeyRef.current = newIdempotencyKey();
         }
         setOpenDialog(true);
         setTabValue(0);
@@ -436,7 +440,7 @@ const OrderManagement: React.FC = () => {
             } else {
                 // Tạo đơn hàng mới với thông tin thanh toán
                 orderData.payment = paymentData;
-                const response = await createOrder(orderData);
+                const response = await createOrder(orderData, createOrderKeyRef.current);
                 enqueueSnackbar('Tạo đơn hàng mới thành công!', { variant: 'success' });
                 
                 // Thông báo nếu đơn hàng mới có trạng thái Completed
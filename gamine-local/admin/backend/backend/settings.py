@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Các ứng dụng bên thứ ba
     'rest_framework',
@@ -51,14 +52,14 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
+    'core.heartbeat.SessionHeartbeatMiddleware',  # Trả lời heartbeat phiên ngay, không qua các middleware sau
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',  # Tạm thời vô hiệu hóa trong quá trình phát triển
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'core.middleware.JWTAuthMiddleware',  # JWT middleware - bỏ qua vì đã dùng DRF authentication
-    'core.middleware.SessionTimeoutMiddleware',  # Add session timeout middleware
-    'core.user_middleware.UserSessionTimeoutMiddleware',  # Add user session timeout middleware
+    'core.middleware.SessionTimeoutMiddleware',  # Session timeout của admin và khách hàng
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -87,12 +88,20 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # PostgreSQL kèm số liệu kết nối của từng worker (core.db_backend, xem /api/database/connections/)
+        'ENGINE': 'core.db_backend',
         'NAME': 'gamine_admin',
         'USER': 'postgres',
         'PASSWORD': '1412',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Giữ kết nối giữa các request (giây) và kiểm tra kết nối trước khi dùng lại.
+        # Với ASGI (ASYNC_VIEWS) mỗi request chạy ORM trong thread riêng nên đặt 0 và dùng pool bên dưới
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        # Pool của psycopg 3 trong mỗi worker (cần Django >= 5.1 và `pip install "psycopg[binary,pool]"`,
+        # đặt CONN_MAX_AGE = 0 khi dùng):
+        # 'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}},
     }
 }
 
@@ -159,7 +168,10 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
+# Cho phép admin panel đọc tên file của API xuất dữ liệu
+CORS_EXPOSE_HEADERS = ['content-disposition']
 
 # CSRF configuration - vô hiệu hóa cho môi trường phát triển
 CSRF_TRUSTED_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
@@ -184,8 +196,49 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Phân trang keyset, chỉ bật khi request có tham số cursor/page_size/count
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
 }
 
+# Số dòng mặc định và tối đa mỗi trang của các API danh sách
+PAGINATION_PAGE_SIZE = 50
+PAGINATION_MAX_PAGE_SIZE = 200
+
+# Thời gian cache (giây) của các API public như khuyến mãi, blog, FAQ
+RESPONSE_CACHE_TTL = 300
+
+# Ghi nhật ký hoạt động người dùng theo lô bằng luồng nền (core.activity)
+ACTIVITY_QUEUE_SIZE = 10000
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_FLUSH_INTERVAL = 1.0
+ACTIVITY_MAX_BATCH_EVENTS = 100
+
+# Số ngày giữ lại các bảng nhật ký trong database, dòng cũ hơn được lưu ra file
+# bằng lệnh `manage.py archive_logs` (core.retention)
+LOG_RETENTION_DAYS = {
+    'audit_log': 365,
+    'user_activity_log': 180,
+    'activity_event': 400,
+}
+LOG_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Thời gian (giây) giữ response của header Idempotency-Key cho checkout/tạo đơn hàng/cập nhật kho
+# (core.idempotency), key hết hạn được xóa bằng lệnh `manage.py purge_idempotency_keys`
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Thời gian (giây) giữ hàng cho sản phẩm trong giỏ (core.reservations), hàng giữ quá hạn
+# được trả lại bằng lệnh `manage.py release_expired_reservations`
+STOCK_RESERVATION_TTL = 15 * 60
+
+# Redis cho phiên đăng nhập và cache (core.redis_pool, mỗi worker một connection pool).
+# Khi Redis không khả dụng, phiên được lưu trong file SQLite dùng chung giữa các worker (core.session_store)
+REDIS_URL = 'redis://localhost:6379/0'
+REDIS_MAX_CONNECTIONS = 50
+
+# Đặt True khi chạy bằng ASGI (`uvicorn backend.asgi:application`): các API đọc public
+# của cửa hàng dùng view async trong core.async_views
+ASYNC_VIEWS = False
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
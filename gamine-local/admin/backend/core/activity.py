@@ -0,0 +1,258 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+
+from .models import ActivityEvent, Products, Users
+
+# Số sự kiện tối đa chờ ghi trong bộ nhớ, vượt quá thì bỏ sự kiện mới (backpressure)
+ACTIVITY_QUEUE_SIZE = getattr(settings, 'ACTIVITY_QUEUE_SIZE', 10000)
+# Số dòng mỗi lần bulk_create
+ACTIVITY_BATCH_SIZE = getattr(settings, 'ACTIVITY_BATCH_SIZE', 500)
+# Thời gian tối đa (giây) một sự kiện nằm trong hàng đợi trước khi được ghi
+ACTIVITY_FLUSH_INTERVAL = getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 1.0)
+# Số sự kiện tối đa trong một request /user-activity/track/batch/
+ACTIVITY_MAX_BATCH_EVENTS = getattr(settings, 'ACTIVITY_MAX_BATCH_EVENTS', 100)
+# False: ghi trực tiếp trong request (dùng khi chạy lệnh quản trị, debug)
+ACTIVITY_ASYNC = getattr(settings, 'ACTIVITY_ASYNC', True)
+
+
+class TextJSONParser(JSONParser):
+    """JSON gửi bằng navigator.sendBeacon (Content-Type text/plain để tránh preflight CORS)"""
+    media_type = 'text/plain'
+
+
+EVENT_TYPES = {event_type for event_type, _ in ActivityEvent.EVENT_TYPE_CHOICES}
+
+
+def _optional_id(data, name):
+    value = data.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def build_activity(data, ip_address='', user_agent=''):
+    """
+    Kiểm tra và chuyển dữ liệu tracking từ client thành các trường của ActivityEvent.
+    Raise ValueError nếu thiếu user_id/action_type hoặc dữ liệu không hợp lệ.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Event must be an object')
+
+    user_id = data.get('user_id')
+    action_type = data.get('action_type')
+    if not user_id or not action_type:
+        raise ValueError('Missing required fields: user_id and action_type are required')
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise ValueError('user_id must be an integer')
+    if action_type not in EVENT_TYPES:
+        raise ValueError(f'Unsupported action_type: {action_type}')
+
+    return {
+        'user_id': user_id,
+        'event_type': action_type,
+        'product_id': _optional_id(data, 'product_id'),
+        'category_id': _optional_id(data, 'category_id'),
+        'promotion_id': _optional_id(data, 'promotion_id'),
+        'search_query': str(data.get('search_query') or '')[:255],
+        'page_path': str(data.get('page_path') or '')[:500],
+        'device': user_agent[:255],
+        'ip_address': ip_address or None,
+        'created_at': timezone.now(),
+    }
+
+
+class ActivityWriter:
+    """
+    Hàng đợi có giới hạn trong tiến trình + luồng nền ghi ActivityEvent theo lô.
+
+    Request chỉ kiểm tra dữ liệu và đưa vào hàng đợi; luồng nền gom tối đa
+    ACTIVITY_BATCH_SIZE sự kiện (hoặc chờ tối đa ACTIVITY_FLUSH_INTERVAL giây)
+    rồi ghi bằng một bulk_create. Khi hàng đợi đầy, sự kiện mới bị bỏ và được đếm.
+    """
+
+    def __init__(self, max_size=ACTIVITY_QUEUE_SIZE, batch_size=ACTIVITY_BATCH_SIZE,
+                 flush_interval=ACTIVITY_FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._stopping = None
+        self._pid = None
+        self.counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'invalid_user': 0, 'failed': 0}
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def _ensure_started(self):
+        # Khởi động luồng nền trong từng worker (sau khi gunicorn fork)
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_size)
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def enqueue(self, events):
+        """Đưa các sự kiện vào hàng đợi. Trả về (số sự kiện nhận, số sự kiện bị bỏ do đầy)"""
+        if not ACTIVITY_ASYNC:
+            self.write(events)
+            return len(events), 0
+
+        self._ensure_started()
+        accepted = 0
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+                accepted += 1
+            except queue.Full:
+                break
+        dropped = len(events) - accepted
+        self._count('enqueued', accepted)
+        if dropped:
+            self._count('dropped', dropped)
+        return accepted, dropped
+
+    def _next_batch(self, timeout):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch(timeout=self.flush_interval)
+            if batch:
+                # Luồng nền giữ kết nối database riêng, đóng kết nối quá hạn/hỏng trước khi ghi
+                close_old_connections()
+                if self.write(batch) is None:
+                    # Kết nối có thể đã hỏng, mở kết nối mới ở lần ghi sau
+                    connection.close()
+
+    def write(self, events):
+        """
+        Ghi các sự kiện bằng bulk_create, bỏ các sự kiện của user không tồn tại.
+        Trả về số dòng đã ghi, None nếu ghi lỗi.
+        """
+        if not events:
+            return 0
+        try:
+            user_ids = {event['user_id'] for event in events}
+            existing = set(Users.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            rows = [ActivityEvent(**event) for event in events if event['user_id'] in existing]
+            if len(rows) < len(events):
+                self._count('invalid_user', len(events) - len(rows))
+            ActivityEvent.objects.bulk_create(rows, batch_size=self.batch_size)
+            self._count('written', len(rows))
+            return len(rows)
+        except Exception as e:
+            print(f"Error writing user activity batch: {str(e)}")
+            self._count('failed', len(events))
+            return None
+
+    def drain(self, timeout=5.0):
+        """Dừng luồng nền và ghi nốt các sự kiện còn trong hàng đợi (khi worker tắt)"""
+        if self._pid != os.getpid() or self._queue is None:
+            return 0
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=min(timeout, self.flush_interval * 2))
+
+        written = 0
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                break
+            written += self.write(batch) or 0
+        return written
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['queued'] = self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+        stats['capacity'] = self.max_size
+        return stats
+
+
+activity_writer = ActivityWriter()
+
+
+def drain_activity(timeout=5.0):
+    written = activity_writer.drain(timeout=timeout)
+    if written:
+        print(f"Activity writer drained {written} events")
+    return written
+
+
+atexit.register(drain_activity)
+
+
+def top_viewed_products(since, until=None, limit=10):
+    """
+    Các sản phẩm được xem nhiều nhất từ `since` (đến `until`), quét theo chỉ mục
+    (event_type, created_at) và chỉ các partition trong khoảng thời gian.
+    """
+    events = ActivityEvent.objects.filter(
+        event_type='product_view', created_at__gte=since, product_id__isnull=False
+    )
+    if until:
+        events = events.filter(created_at__lt=until)
+    rows = list(events.values('product_id').annotate(views=Count('event_id')).order_by('-views', 'product_id')[:limit])
+
+    names = dict(Products.objects.filter(product_id__in=[row['product_id'] for row in rows]).values_list('product_id', 'name'))
+    return [
+        {'product_id': row['product_id'], 'name': names.get(row['product_id']), 'views': row['views']}
+        for row in rows
+    ]
+
+
+def top_search_terms(since, until=None, limit=10):
+    """Các từ khóa được tìm nhiều nhất từ `since` (đến `until`), không phân biệt hoa thường"""
+    events = ActivityEvent.objects.filter(event_type='search', created_at__gte=since).exclude(search_query='')
+    if until:
+        events = events.filter(created_at__lt=until)
+    return list(
+        events.annotate(term=Lower(Trim('search_query'))).values('term').annotate(
+            searches=Count('event_id'), users=Count('user_id', distinct=True)
+        ).order_by('-searches', 'term')[:limit]
+    )
@@ -0,0 +1,253 @@
+"""
+View async cho các API đọc public của cửa hàng, dùng khi chạy bằng ASGI (uvicorn worker,
+settings.ASYNC_VIEWS). Kết quả giống các view sync cùng tên trong core.views và dùng chung
+cache response/ETag với chúng.
+
+Redis (cache response, dấu phiên bản ETag) được gọi bằng client async. Truy vấn database dùng ORM async
+và chạy lần lượt: ORM async chạy trong thread (thread_sensitive) dùng kết nối của request nên các truy vấn
+của một request không chạy song song được. Phần còn lại dùng code sync có sẵn (bảng giá khuyến mãi,
+phân trang keyset, serializer cần truy vấn) qua sync_to_async.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import views
+from .cache import acache_response, promotion_boundary_ttl
+from .conditional import aconditional_response, aconditional_view
+from .models import Faq, ProductPromotions, Products, Promotions, Reviews
+from .pagination import KeysetPagination, paginate_list
+from .pricing import PriceBook
+from .serializers import FaqSerializer, ProductsSerializer, ReviewsSerializer
+
+PRODUCT_COLLECTIONS = views.ProductsViewSet.conditional_collections
+# Tham số bật phân trang keyset (core.pagination)
+PAGINATION_PARAMS = (
+    KeysetPagination.cursor_query_param,
+    KeysetPagination.page_size_query_param,
+    KeysetPagination.count_query_param,
+)
+# Các tham số cần đến phần xử lý của ProductsViewSet (tìm kiếm, phân trang)
+PRODUCT_SYNC_PARAMS = ('search',) + PAGINATION_PARAMS
+
+_renderer = JSONRenderer()
+# ProductsViewSet cho các request mà view async không tự xử lý (ghi dữ liệu, tìm kiếm, phân trang)
+_sync_product_list = views.ProductsViewSet.as_view({'get': 'list', 'post': 'create'})
+_sync_product_detail = views.ProductsViewSet.as_view({
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy',
+})
+
+
+def _render(response):
+    """Response của DRF -> HttpResponse JSON (cùng nội dung với JSONRenderer của view sync)"""
+    if not isinstance(response, Response):
+        return response
+    rendered = HttpResponse(
+        _renderer.render(response.data), content_type='application/json', status=response.status_code
+    )
+    for header, value in response.items():
+        if header.lower() != 'content-type':
+            rendered[header] = value
+    return rendered
+
+
+def async_api_view(view):
+    """Thay @api_view(['GET']) + @permission_classes([AllowAny]) cho view async"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return _render(Response(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED, headers={'Allow': 'GET, HEAD'}
+            ))
+        return _render(await view(request, *args, **kwargs))
+    return wrapper
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _promotions_by_period(now, expired_limit):
+    """Khuyến mãi hiện tại, sắp tới và đã hết hạn"""
+    current = await _alist(Promotions.objects.filter(start_date__lte=now, end_date__gte=now).order_by('end_date'))
+    upcoming = await _alist(Promotions.objects.filter(start_date__gt=now).order_by('start_date'))
+    expired = await _alist(Promotions.objects.filter(end_date__lt=now).order_by('-end_date')[:expired_limit])
+    return current, upcoming, expired
+
+
+def _group_by_promotion(links):
+    grouped = {}
+    for link in links:
+        grouped.setdefault(link.promotion_id, []).append(link)
+    return grouped
+
+
+@async_api_view
+@aconditional_view('promotions', 'products', 'categories')
+@acache_response('promotions_frontend', tags=['promotions', 'products', 'categories'], ttl_func=promotion_boundary_ttl)
+async def promotions_frontend(request):
+    """Như views.promotions_frontend, sản phẩm/danh mục của mọi khuyến mãi được đọc bằng 2 truy vấn"""
+    try:
+        now = timezone.now()
+        periods = await _promotions_by_period(now, 10)
+        promotion_ids = [promo.promotion_id for promotions in periods for promo in promotions]
+
+        product_links = await _alist(ProductPromotions.objects.filter(
+            promotion_id__in=promotion_ids, product__isnull=False
+        ).select_related('product', 'product__effective_price').order_by('pk'))
+        category_links = await _alist(ProductPromotions.objects.filter(
+            promotion_id__in=promotion_ids, category__isnull=False
+        ).select_related('category').order_by('pk'))
+        price_book = PriceBook(now=now)
+        await sync_to_async(price_book.ensure)([link.product for link in product_links])
+
+        products_by_promotion = _group_by_promotion(product_links)
+        categories_by_promotion = _group_by_promotion(category_links)
+        current, upcoming, expired = [
+            [
+                views.promotion_frontend_item(
+                    promo,
+                    products_by_promotion.get(promo.promotion_id, []),
+                    categories_by_promotion.get(promo.promotion_id, []),
+                    price_book,
+                )
+                for promo in promotions
+            ]
+            for promotions in periods
+        ]
+        return Response(views.promotions_frontend_data(current, upcoming, expired))
+
+    except Exception as e:
+        print(f"Error in promotions_frontend: {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@aconditional_view('promotions', 'products')
+@acache_response('promotions_client', tags=['promotions', 'products'], ttl_func=promotion_boundary_ttl)
+async def promotions_client(request):
+    """Như views.promotions_client, sản phẩm đầu tiên của mọi khuyến mãi được đọc bằng 1 truy vấn"""
+    try:
+        now = timezone.now()
+        periods = await _promotions_by_period(now, 5)
+        promotion_ids = [promo.promotion_id for promotions in periods for promo in promotions]
+
+        first_links = {}
+        async for link in ProductPromotions.objects.filter(
+            promotion_id__in=promotion_ids, product__isnull=False
+        ).select_related('product').order_by('pk'):
+            first_links.setdefault(link.promotion_id, link)
+
+        current, upcoming, expired = [
+            [views.promotion_client_item(promo, first_links.get(promo.promotion_id), now) for promo in promotions]
+            for promotions in periods
+        ]
+        return Response(views.promotions_client_data(current, upcoming, expired))
+
+    except Exception as e:
+        print(f"Error in promotions_client: {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@aconditional_view('blogs')
+@acache_response('blogs_frontend', tags=['blogs'])
+async def blogs_frontend(request):
+    """Như views.blogs_frontend (phân trang keyset chạy qua sync_to_async)"""
+    return await sync_to_async(views.blogs_frontend_response)(Request(request))
+
+
+@async_api_view
+@acache_response('faqs_frontend', tags=['faqs'])
+async def faqs_frontend(request):
+    """Như views.faqs_frontend"""
+    try:
+        faqs = await _alist(Faq.objects.all().order_by('faq_id'))
+        return Response(FaqSerializer(faqs, many=True).data, status=status.HTTP_200_OK)
+    except Exception as e:
+        print(f"Error in faqs_frontend: {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@async_api_view
+@aconditional_view('reviews')
+async def get_product_reviews(request, product_id):
+    """Như views.get_product_reviews"""
+    try:
+        reviews = Reviews.objects.filter(product_id=product_id).select_related('user').order_by('-created_at', '-review_id')
+
+        if not await Products.objects.filter(product_id=product_id).aexists():
+            return Response({'error': 'Sản phẩm không tồn tại'}, status=status.HTTP_404_NOT_FOUND)
+
+        if any(param in request.GET for param in PAGINATION_PARAMS):
+            # Phân trang khi client gửi cursor/page_size
+            return await sync_to_async(paginate_list)(
+                Request(request), reviews, lambda page: ReviewsSerializer(page, many=True).data
+            )
+
+        rows = await _alist(reviews)
+        return Response(ReviewsSerializer(rows, many=True).data, status=status.HTTP_200_OK)
+
+    except NotFound as e:
+        return Response({'error': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        print(f"Lỗi khi lấy đánh giá sản phẩm: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _serialize_products(products, many):
+    # Bảng giá khuyến mãi có thể cần truy vấn nên chạy trong sync_to_async
+    return ProductsSerializer(products, many=many).data
+
+
+async def product_list(request):
+    """
+    Danh sách sản phẩm (GET /api/products/, lọc theo category/category_id).
+    Tìm kiếm, phân trang và tạo sản phẩm do ProductsViewSet xử lý.
+    """
+    if request.method not in ('GET', 'HEAD') or any(param in request.GET for param in PRODUCT_SYNC_PARAMS):
+        return await sync_to_async(_sync_product_list)(request)
+
+    async def build():
+        queryset = views.product_list_queryset()
+        category_id = request.GET.get('category') or request.GET.get('category_id')
+        if category_id:
+            try:
+                queryset = queryset.filter(category_id=int(category_id))
+            except (ValueError, TypeError):
+                print(f"[product_list] category_id không hợp lệ: {category_id}")
+        products = await _alist(queryset)
+        return Response(await sync_to_async(_serialize_products)(products, True))
+
+    try:
+        return _render(await aconditional_response(request, PRODUCT_COLLECTIONS, build))
+    except Exception as e:
+        print(f"Error in product_list: {str(e)}")
+        return _render(Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR))
+
+
+async def product_detail(request, pk):
+    """Chi tiết sản phẩm (GET /api/products/<pk>/), sửa/xóa do ProductsViewSet xử lý"""
+    if request.method not in ('GET', 'HEAD'):
+        return await sync_to_async(_sync_product_detail)(request, pk=pk)
+
+    async def build():
+        product = await views.product_list_queryset().filter(pk=pk).afirst()
+        if product is None:
+            # Nội dung 404 giống ProductsViewSet
+            return await sync_to_async(_sync_product_detail)(request, pk=pk)
+        return Response(await sync_to_async(_serialize_products)(product, False))
+
+    try:
+        return _render(await aconditional_response(request, PRODUCT_COLLECTIONS, build))
+    except Exception as e:
+        print(f"Error in product_detail: {str(e)}")
+        return _render(Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR))
@@ -1,15 +1,15 @@
+import logging
+
 from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.hashers import check_password
-from django.db.models import Q
-from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import authentication
 from rest_framework.exceptions import AuthenticationFailed
 
-import jwt as pyjwt
+from .auth_context import get_auth_context, get_principal
+from .models import Admin
 
-from .models import Admin, Users
+logger = logging.getLogger(__name__)
 
 class AdminAuthBackend(BaseBackend):
     """
@@ -37,56 +37,25 @@ class AdminAuthBackend(BaseBackend):
 class JWTAuthentication(authentication.BaseAuthentication):
     """
     Custom JWT Authentication for Admin and Users
+
+    Token được đọc một lần cho mỗi request (core.auth_context, dùng chung với các middleware phiên),
+    Admin/Users được lấy từ cache nên request đã xác thực thường không tốn truy vấn database.
     """
     def authenticate(self, request):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
+        context = get_auth_context(request)
+        if context.token is None:
             return None
         
-        if not auth_header.startswith('Bearer '):
+        if context.error:
+            logger.debug("Lỗi xác thực token: %s", context.error)
             return None
         
-        token = auth_header.split(' ')[1]
-        print(f"Đang xử lý token: {token}")
-        
-        # Xử lý token tùy chỉnh định dạng "user_id_hash"
-        if token.startswith('user_'):
-            try:
-                # Extract user_id từ token format: user_id_hash
-                parts = token.split('_')
-                print(f"Phân tích token user: {parts}")
-                if len(parts) >= 2:
-                    user_id = int(parts[1])
-                    print(f"Tìm user_id={user_id}")
-                    user = Users.objects.get(user_id=user_id)
-                    print(f"Đã tìm thấy user: {user.username}")
-                    return (user, token)
-                return None
-            except (ValueError, Users.DoesNotExist) as e:
-                print(f"Lỗi xác thực user token: {str(e)}")
-                return None
-        
-        # Xử lý JWT token tiêu chuẩn (cho admin)
-        try:
-            payload = pyjwt.decode(
-                token, 
-                settings.SECRET_KEY, 
-                algorithms=['HS256'],
-                options={"verify_exp": False}  # Bỏ qua kiểm tra hết hạn
-            )
-            admin_id = payload.get('admin_id')
-            
-            if admin_id is None:
-                print("Token không có admin_id")
-                return None
-            
-            admin = Admin.objects.get(admin_id=admin_id)
-            return (admin, token)
-        except pyjwt.exceptions.PyJWTError as e:
-            print(f"Lỗi JWT: {str(e)}")
-            pass  # Nếu không phải là JWT hợp lệ, thử các phương thức khác
-        except Admin.DoesNotExist:
-            print("Admin không tồn tại")
+        principal = get_principal(context.kind, context.principal_id)
+        if principal is None:
+            logger.debug("Tài khoản %s id=%s không tồn tại", context.kind, context.principal_id)
             return None
         
-        return None
\ No newline at end of file
+        if context.kind == 'admin' and not principal.is_active:
+            raise AuthenticationFailed(_('Tài khoản đã bị vô hiệu hóa'))
+        
+        return (principal, context.token)
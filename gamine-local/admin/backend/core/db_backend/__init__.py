@@ -0,0 +1,4 @@
+"""
+Backend PostgreSQL của project (settings.DATABASES ENGINE 'core.db_backend'): giống
+django.db.backends.postgresql, thêm số liệu lấy/trả kết nối của từng worker (xem base.connection_stats).
+"""
@@ -0,0 +1,214 @@
+import csv
+import datetime
+import json
+from decimal import Decimal
+
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from .models import AuditLog, NewsletterSubscribers, OrderDetails, Orders, Users
+
+# Số dòng mỗi lần đọc từ server-side cursor (và mỗi lần nạp chi tiết đơn hàng)
+EXPORT_CHUNK_SIZE = 2000
+# Gom các dòng đã ghi thành từng khối khoảng 64 KB trước khi gửi cho client
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+ORDER_COLUMNS = [
+    'order_id', 'created_at', 'order_status', 'user_id', 'customer_name', 'customer_email',
+    'customer_phone', 'shipping_address', 'total_amount', 'payment_method', 'payment_status',
+    'transaction_id',
+]
+ORDER_LINE_COLUMNS = ['order_detail_id', 'product_id', 'product_name', 'quantity', 'price']
+USER_COLUMNS = ['user_id', 'username', 'email', 'phone', 'address', 'created_at']
+AUDIT_LOG_COLUMNS = ['log_id', 'created_at', 'admin_id', 'admin_username', 'action', 'table_name', 'record_id']
+SUBSCRIBER_COLUMNS = ['id', 'email', 'status', 'created_at']
+
+
+def parse_date_range(start, end):
+    """
+    Đọc khoảng ngày YYYY-MM-DD (cả hai đầu đều tính, có thể bỏ trống) thành
+    (thời điểm bắt đầu, thời điểm kết thúc không tính) theo múi giờ hiện tại.
+    Raise ValueError nếu ngày không hợp lệ.
+    """
+    try:
+        start = datetime.date.fromisoformat(start) if start else None
+        end = datetime.date.fromisoformat(end) if end else None
+    except ValueError:
+        raise ValueError('start/end phải có dạng YYYY-MM-DD')
+    if start and end and start > end:
+        raise ValueError('start phải trước hoặc bằng end')
+
+    def at_midnight(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+    return (
+        at_midnight(start) if start else None,
+        at_midnight(end + datetime.timedelta(days=1)) if end else None,
+    )
+
+
+def _filter_created(queryset, start, end):
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end)
+    return queryset
+
+
+def export_orders(start=None, end=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Đơn hàng kèm thanh toán và các dòng chi tiết (key 'details'). Đơn hàng được đọc theo
+    từng đợt `chunk_size` bằng server-side cursor, chi tiết của mỗi đợt được nạp bằng một truy vấn.
+    """
+    orders = _filter_created(Orders.objects.all(), start, end)
+    if status:
+        orders = orders.filter(order_status=status)
+    details = OrderDetails.objects.select_related('product').only(
+        'order_detail_id', 'order', 'quantity', 'price', 'product__product_id', 'product__name'
+    ).order_by('order_detail_id')
+    orders = orders.select_related('payments').prefetch_related(
+        Prefetch('details', queryset=details)
+    ).order_by('order_id')
+
+    for order in orders.iterator(chunk_size=chunk_size):
+        payment = getattr(order, 'payments', None)
+        yield {
+            'order_id': order.order_id,
+            'created_at': order.created_at,
+            'order_status': order.order_status,
+            'user_id': order.user_id,
+            'customer_name': order.customer_name,
+            'customer_email': order.customer_email,
+            'customer_phone': order.customer_phone,
+            'shipping_address': order.shipping_address,
+            'total_amount': order.total_amount,
+            'payment_method': payment.payment_method if payment else None,
+            'payment_status': payment.payment_status if payment else None,
+            'transaction_id': payment.transaction_id if payment else None,
+            'details': [
+                {
+                    'order_detail_id': detail.order_detail_id,
+                    'product_id': detail.product_id,
+                    'product_name': detail.product.name,
+                    'quantity': detail.quantity,
+                    'price': detail.price,
+                }
+                for detail in order.details.all()
+            ],
+        }
+
+
+def _export_values(queryset, columns, chunk_size):
+    for row in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield dict(zip(columns, row))
+
+
+def export_users(start=None, end=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Người dùng (không có mật khẩu)"""
+    users = _filter_created(Users.objects.all(), start, end).order_by('user_id')
+    return _export_values(users, USER_COLUMNS, chunk_size)
+
+
+def export_audit_logs(start=None, end=None, status=None, chunk_size=EXPORT_CHUNK_SIZE, table_name=None):
+    """Nhật ký thao tác của admin, lọc thêm theo table_name"""
+    logs = _filter_created(AuditLog.objects.annotate(admin_username=F('admin__username')), start, end)
+    if table_name:
+        logs = logs.filter(table_name=table_name)
+    return _export_values(logs.order_by('log_id'), AUDIT_LOG_COLUMNS, chunk_size)
+
+
+def export_newsletter_subscribers(start=None, end=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Người đăng ký nhận bản tin, lọc theo status (active...)"""
+    subscribers = _filter_created(NewsletterSubscribers.objects.all(), start, end)
+    if status:
+        subscribers = subscribers.filter(status=status)
+    return _export_values(subscribers.order_by('id'), SUBSCRIBER_COLUMNS, chunk_size)
+
+
+# Tên dữ liệu xuất -> (hàm đọc bản ghi, các cột, dòng con được trải phẳng trong CSV)
+EXPORTS = {
+    'orders': (export_orders, ORDER_COLUMNS, ('details', ORDER_LINE_COLUMNS)),
+    'users': (export_users, USER_COLUMNS, None),
+    'audit-logs': (export_audit_logs, AUDIT_LOG_COLUMNS, None),
+    'newsletter-subscribers': (export_newsletter_subscribers, SUBSCRIBER_COLUMNS, None),
+}
+
+
+def _plain(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """File giả cho csv.writer: writerow trả về chính dòng đã định dạng"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(records, columns, lines=None):
+    """
+    Các dòng CSV (có dòng tiêu đề, BOM để Excel đọc đúng tiếng Việt). Dòng con `lines`
+    (key, các cột) được trải phẳng: mỗi dòng con một dòng CSV, lặp lại các cột của bản ghi cha.
+    """
+    writer = csv.writer(_Echo())
+    header = list(columns)
+    if lines:
+        key, line_columns = lines
+        header += [f'{key}_{column}' for column in line_columns]
+    yield '\ufeff' + writer.writerow(header)
+
+    for record in records:
+        row = [_plain(record[column]) for column in columns]
+        if not lines:
+            yield writer.writerow(row)
+            continue
+        children = record[key] or [{}]
+        for child in children:
+            yield writer.writerow(row + [_plain(child.get(column)) for column in line_columns])
+
+
+def json_lines(records, columns, lines=None):
+    """Mỗi bản ghi một dòng JSON, dòng con giữ dạng danh sách lồng nhau"""
+    for record in records:
+        yield json.dumps(record, default=_plain, ensure_ascii=False) + '\n'
+
+
+def buffered(chunks, size=EXPORT_BUFFER_SIZE):
+    """Gom các chuỗi nhỏ thành khối khoảng `size` byte để giảm số lần ghi ra socket"""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def export_stream(name, export_format='csv', start=None, end=None, status=None, **filters):
+    """
+    Nội dung file xuất của `name` (khóa trong EXPORTS) dạng CSV hoặc JSON Lines,
+    sinh dần từng khối byte nên bộ nhớ không phụ thuộc số dòng.
+    Raise ValueError nếu tên hoặc định dạng không hợp lệ.
+    """
+    if name not in EXPORTS:
+        raise ValueError(f'Dữ liệu xuất phải là một trong: {", ".join(EXPORTS)}')
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Định dạng phải là một trong: {", ".join(EXPORT_FORMATS)}')
+    reader, columns, lines = EXPORTS[name]
+    records = reader(start=start, end=end, status=status, **filters)
+    writer = csv_lines if export_format == 'csv' else json_lines
+    return buffered(writer(records, columns, lines))
@@ -0,0 +1,159 @@
+import json
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .auth_context import get_auth_context, get_principal, parse_token
+from .session_store import SESSION_KEY_FORMATS, SESSION_TIMEOUT, delete_session, touch_session, touch_sessions
+
+# Đường dẫn heartbeat -> (method, loại tài khoản, thao tác)
+HEARTBEAT_PATHS = {
+    '/api/admin-session/update/': ('POST', 'admin', 'update'),
+    '/api/admin-session/check/': ('GET', 'admin', 'check'),
+    '/api/user-session/update/': ('POST', 'user', 'update'),
+    '/api/user-session/check/': ('GET', 'user', 'check'),
+}
+HEARTBEAT_BATCH_PATH = '/api/session-heartbeat/'
+# Số token tối đa trong một request heartbeat gộp
+HEARTBEAT_BATCH_MAX = 20
+
+# Nội dung response giống các view update_admin_activity, check_session_status,
+# update_user_activity và check_user_session, mã hóa sẵn để không phải render
+UPDATE_OK = {
+    'admin': b'{"status": "ok", "last_active": %d}',
+    'user': b'{"status": "success", "timestamp": %d}',
+}
+UPDATE_TIMEOUT = b'{"status": "timeout", "message": "Session has timed out"}'
+CHECK_FIRST = b'{"status": "active", "last_active": %d}'
+CHECK_ACTIVE = (
+    b'{"status": "active", "last_active": %d, "time_elapsed": %d, "session_timeout": %d, "time_remaining": %d}'
+)
+CHECK_TIMEOUT = (
+    b'{"status": "timeout", "message": "Session has timed out", "time_since_activity": %d, "timeout_limit": %d}'
+)
+
+
+def _json_response(body, status=200):
+    return HttpResponse(body, content_type='application/json', status=status)
+
+
+def _is_allowed(context, kind):
+    """Token hợp lệ, đúng loại tài khoản và tài khoản còn tồn tại (admin phải đang hoạt động)"""
+    if context.error or context.kind != kind:
+        return False
+    principal = get_principal(kind, context.principal_id)
+    return principal is not None and (kind != 'admin' or principal.is_active)
+
+
+def heartbeat(context, kind, action):
+    """
+    Cập nhật phiên của một tài khoản đã xác thực bằng một thao tác với session store.
+    Trả về None nếu token không dùng được cho đường dẫn này (để view DRF trả lỗi như cũ).
+    """
+    if not _is_allowed(context, kind):
+        return None
+
+    current_time = int(time.time())
+    session_key = SESSION_KEY_FORMATS[kind].format(context.principal_id)
+    last_active = touch_session(session_key, current_time)
+
+    if last_active is None:
+        if action == 'update':
+            return _json_response(UPDATE_OK[kind] % current_time)
+        return _json_response(CHECK_FIRST % current_time)
+
+    elapsed = current_time - last_active
+    if elapsed > SESSION_TIMEOUT:
+        delete_session(session_key)
+        if action == 'update':
+            return _json_response(UPDATE_TIMEOUT, status=401)
+        return _json_response(CHECK_TIMEOUT % (elapsed, SESSION_TIMEOUT), status=401)
+
+    if action == 'update':
+        return _json_response(UPDATE_OK[kind] % current_time)
+    return _json_response(CHECK_ACTIVE % (current_time, elapsed, SESSION_TIMEOUT, SESSION_TIMEOUT - elapsed))
+
+
+@csrf_exempt
+def session_heartbeat(request):
+    """
+    Heartbeat gộp cho nhiều tab: POST {"tokens": ["<token>", ...]} cập nhật phiên của từng token
+    trong một lần gửi nhận với session store. Kết quả theo đúng thứ tự token:
+    {"status": "ok", "last_active": ...}, {"status": "timeout"} hoặc {"status": "invalid"}.
+    """
+    if request.method != 'POST':
+        return _json_response(json.dumps({'error': 'Method not allowed'}), status=405)
+    try:
+        tokens = json.loads(request.body or b'{}').get('tokens')
+    except (ValueError, AttributeError):
+        tokens = None
+    if not isinstance(tokens, list) or not tokens or not all(isinstance(token, str) for token in tokens):
+        return _json_response(json.dumps({'error': 'tokens phải là danh sách token'}, ensure_ascii=False), status=400)
+    if len(tokens) > HEARTBEAT_BATCH_MAX:
+        return _json_response(
+            json.dumps({'error': f'Tối đa {HEARTBEAT_BATCH_MAX} token mỗi request'}, ensure_ascii=False), status=400
+        )
+
+    session_keys = []
+    for token in tokens:
+        context = parse_token(token)
+        if context.kind and _is_allowed(context, context.kind):
+            session_keys.append(SESSION_KEY_FORMATS[context.kind].format(context.principal_id))
+        else:
+            session_keys.append(None)
+
+    # Nhiều tab của cùng một tài khoản dùng chung một phiên, mỗi phiên chỉ cập nhật một lần
+    current_time = int(time.time())
+    unique_keys = list(dict.fromkeys(key for key in session_keys if key is not None))
+    results = {None: {'status': 'invalid'}}
+    for key, last_active in zip(unique_keys, touch_sessions(unique_keys, current_time)):
+        if last_active is not None and current_time - last_active > SESSION_TIMEOUT:
+            delete_session(key)
+            results[key] = {'status': 'timeout'}
+        else:
+            results[key] = {'status': 'ok', 'last_active': current_time}
+    return _json_response(json.dumps({'results': [results[key] for key in session_keys]}))
+
+
+class SessionHeartbeatMiddleware:
+    """
+    Trả lời các request heartbeat (admin-session/user-session update/check và heartbeat gộp)
+    ngay trong middleware, không qua các middleware phía sau, DRF authentication và render response.
+    Đặt sau CorsMiddleware để response vẫn có header CORS.
+    """
+    # Chạy được cả WSGI và ASGI; với ASGI chỉ request heartbeat mới chuyển sang thread (session store sync)
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = None
+        if self._is_heartbeat(request):
+            response = self._respond(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = None
+        if self._is_heartbeat(request):
+            response = await sync_to_async(self._respond)(request)
+        return response if response is not None else await self.get_response(request)
+
+    def _is_heartbeat(self, request):
+        return request.path in HEARTBEAT_PATHS or request.path == HEARTBEAT_BATCH_PATH
+
+    def _respond(self, request):
+        """Response của heartbeat, None để request đi tiếp tới view DRF"""
+        if request.path == HEARTBEAT_BATCH_PATH:
+            return session_heartbeat(request)
+        method, kind, action = HEARTBEAT_PATHS[request.path]
+        if request.method != method:
+            return None
+        return heartbeat(get_auth_context(request), kind, action)
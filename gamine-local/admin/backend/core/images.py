@@ -0,0 +1,63 @@
+from .models import Blog, BlogImages, Categories, CategoryImages, ProductImages, Products
+
+# Model -> (bảng hình ảnh, tên khóa ngoại trỏ về model)
+IMAGE_SOURCES = {
+    Products: (ProductImages, 'product'),
+    Categories: (CategoryImages, 'category'),
+    Blog: (BlogImages, 'blog'),
+}
+
+
+def primary_image_url(obj):
+    """
+    Hình ảnh đại diện của sản phẩm/danh mục/bài viết.
+    Đọc từ cột primary_image_url đã tính sẵn, không truy vấn bảng hình ảnh.
+    """
+    if obj is None:
+        return None
+    return obj.primary_image_url
+
+
+def _pick_primary_urls(model, ids):
+    """Hình ảnh chính (hoặc hình ảnh đầu tiên nếu không có) của các đối tượng, một truy vấn"""
+    image_model, owner_field = IMAGE_SOURCES[model]
+    owner_column = f'{owner_field}_id'
+    urls = {}
+    images = image_model.objects.filter(**{f'{owner_column}__in': ids}).order_by(
+        owner_column, '-is_primary', 'image_id'
+    ).values_list(owner_column, 'image_url')
+    for owner_id, image_url in images:
+        urls.setdefault(owner_id, image_url)
+    return urls
+
+
+def refresh_primary_image(obj):
+    """Tính lại hình ảnh đại diện sau khi thêm/thay hình ảnh của một đối tượng"""
+    model = type(obj)
+    image_url = _pick_primary_urls(model, [obj.pk]).get(obj.pk)
+    model.objects.filter(pk=obj.pk).update(primary_image_url=image_url)
+    obj.primary_image_url = image_url
+    return image_url
+
+
+def backfill_primary_images(model, only_missing=True, batch_size=1000):
+    """
+    Tính hình ảnh đại diện cho các dòng của `model` theo từng lô.
+    Trả về số dòng đã cập nhật.
+    """
+    queryset = model.objects.all()
+    if only_missing:
+        queryset = queryset.filter(primary_image_url__isnull=True)
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+    updated = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        urls = _pick_primary_urls(model, batch_ids)
+        rows = [model(pk=pk, primary_image_url=urls.get(pk)) for pk in batch_ids]
+        if only_missing:
+            # Dòng chưa có hình ảnh vẫn giữ NULL, không cần ghi lại
+            rows = [row for row in rows if row.primary_image_url]
+        model.objects.bulk_update(rows, ['primary_image_url'], batch_size=batch_size)
+        updated += len(rows)
+    return updated
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.retention import ARCHIVE_FORMATS, LOG_ARCHIVE_DIR, RETAINED_LOGS, archive_logs
+
+class Command(BaseCommand):
+    help = 'Lưu trữ các dòng nhật ký cũ ra file (JSON Lines nén hoặc Parquet) và xóa khỏi database'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=list(RETAINED_LOGS), action='append',
+                            help='Bảng nhật ký cần xử lý (mặc định: tất cả)')
+        parser.add_argument('--days', type=int,
+                            help='Số ngày giữ lại (mặc định: settings.LOG_RETENTION_DAYS)')
+        parser.add_argument('--format', choices=ARCHIVE_FORMATS, default='jsonl',
+                            help='Định dạng file lưu trữ')
+        parser.add_argument('--output-dir', default=LOG_ARCHIVE_DIR,
+                            help='Thư mục chứa file lưu trữ')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Chỉ liệt kê các tháng sẽ được lưu trữ, không ghi/xóa')
+    
+    def handle(self, *args, **options):
+        for name in options['table'] or RETAINED_LOGS:
+            try:
+                results = archive_logs(
+                    name,
+                    days=options['days'],
+                    directory=options['output_dir'],
+                    archive_format=options['format'],
+                    dry_run=options['dry_run'],
+                )
+            except (ValueError, ImportError) as e:
+                raise CommandError(str(e))
+            
+            for result in results:
+                target = result['path'] or ('(dry run)' if options['dry_run'] else '(trống)')
+                self.stdout.write(f"{name} {result['month']:%Y-%m}: {result['rows']} dòng -> {target}")
+            total = sum(result['rows'] for result in results)
+            verb = 'Sẽ lưu trữ' if options['dry_run'] else 'Đã lưu trữ và xóa'
+            self.stdout.write(self.style.SUCCESS(f'{name}: {verb} {total} dòng'))
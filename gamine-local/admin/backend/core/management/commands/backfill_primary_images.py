@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.images import IMAGE_SOURCES, backfill_primary_images
+
+class Command(BaseCommand):
+    help = 'Tính hình ảnh đại diện cho sản phẩm, danh mục và bài viết đã có'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Tính lại cho toàn bộ, kể cả các dòng đã có hình ảnh đại diện')
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        for model in IMAGE_SOURCES:
+            count = backfill_primary_images(
+                model,
+                only_missing=not options['all'],
+                batch_size=options['batch_size']
+            )
+            self.stdout.write(self.style.SUCCESS(f'{model.__name__}: đã cập nhật hình ảnh đại diện cho {count} dòng'))
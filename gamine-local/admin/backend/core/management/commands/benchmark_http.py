@@ -0,0 +1,123 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Các API đọc public của cửa hàng (có bản async trong core.async_views). Danh sách sản phẩm đầy đủ
+# chủ yếu tốn CPU để serialize nên không có trong mặc định, thêm bằng --path /api/products/ nếu cần
+DEFAULT_PATHS = [
+    '/api/frontend/promotions/',
+    '/api/client/promotions/',
+    '/api/frontend/blogs/',
+    '/api/frontend/faqs/',
+    '/api/products/1/',
+    '/api/reviews/product/1/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Đo thông lượng HTTP của server đang chạy với nhiều kết nối đồng thời (keep-alive), '
+        'dùng để so sánh chế độ WSGI và ASGI (SERVER_MODE)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Địa chỉ server')
+        parser.add_argument('--concurrency', type=int, default=500, help='Số kết nối đồng thời')
+        parser.add_argument('--duration', type=float, default=30, help='Thời gian đo (giây)')
+        parser.add_argument('--timeout', type=float, default=30, help='Thời gian chờ tối đa mỗi request (giây)')
+        parser.add_argument('--path', action='append', dest='paths', help='Đường dẫn cần gọi (lặp lại để thêm nhiều)')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--url phải có dạng http://host:port')
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency và --duration phải lớn hơn 0')
+        paths = options['paths'] or DEFAULT_PATHS
+
+        statuses, latencies, errors, elapsed = asyncio.run(self._run(
+            url.hostname, url.port or 80, paths,
+            options['concurrency'], options['duration'], options['timeout'],
+        ))
+        latencies.sort()
+        self.stdout.write(
+            f'{options["concurrency"]} kết nối, {elapsed:.1f} giây: {len(latencies)} request, '
+            f'{len(latencies) / elapsed:,.0f} request/giây, '
+            f'p50 {self._percentile(latencies, 50):.1f} ms, p99 {self._percentile(latencies, 99):.1f} ms'
+        )
+        self.stdout.write('Mã trạng thái: ' + ', '.join(f'{code}: {count}' for code, count in sorted(statuses.items())))
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                f'Lỗi kết nối/timeout: {sum(errors.values())} ('
+                + ', '.join(f'{name}: {count}' for name, count in errors.items()) + ')'
+            ))
+
+    async def _run(self, host, port, paths, concurrency, duration, timeout):
+        statuses = {}
+        latencies = []
+        errors = {}
+        requests = [
+            f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: application/json\r\n\r\n'.encode()
+            for path in paths
+        ]
+        deadline = time.perf_counter() + duration
+
+        async def client(index):
+            reader = writer = None
+            sent = index
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    started = time.perf_counter()
+                    writer.write(requests[sent % len(requests)])
+                    sent += 1
+                    code, keep_alive = await asyncio.wait_for(self._read_response(reader), timeout)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses[code] = statuses.get(code, 0) + 1
+                    if not keep_alive:
+                        writer.close()
+                        writer = None
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    await asyncio.sleep(0.1)
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(concurrency)))
+        return statuses, latencies, errors, time.perf_counter() - started
+
+    async def _read_response(self, reader):
+        """Đọc một response HTTP/1.1, trả về (mã trạng thái, còn giữ kết nối)"""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        code = int(lines[0].split(' ', 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            return code, False
+        return code, headers.get('connection') != 'close'
+
+    def _percentile(self, values, percent):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
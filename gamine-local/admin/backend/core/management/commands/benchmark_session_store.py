@@ -0,0 +1,96 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+from django.core.management.base import BaseCommand, CommandError
+from core.redis_pool import get_client
+from core.session_store import SESSION_TIMEOUT, RedisSessionStore, SQLiteSessionStore
+
+KEY_PREFIX = 'benchmark_session_'
+
+
+class Command(BaseCommand):
+    help = 'Đo tốc độ cập nhật phiên (heartbeat) với nhiều phiên đồng thời: cách cũ, Redis và file SQLite dự phòng'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=1000, help='Số phiên đồng thời')
+        parser.add_argument('--heartbeats', type=int, default=20000, help='Tổng số lần cập nhật phiên')
+        parser.add_argument('--threads', type=int, default=32, help='Số thread gửi song song')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['sessions'] < 1:
+            raise CommandError('--threads và --sessions phải lớn hơn 0')
+        sessions = [f'{KEY_PREFIX}{index}' for index in range(options['sessions'])]
+        client = get_client()
+        try:
+            client.ping()
+        except redis.RedisError as e:
+            client = None
+            self.stdout.write(self.style.WARNING(f'Không kết nối được Redis ({str(e)}), chỉ đo file SQLite'))
+
+        runs = []
+        if client is not None:
+            runs.append(('Cũ: GET JSON + SET + EXPIRE', lambda key, now: self._legacy_touch(client, key, now)))
+            store = RedisSessionStore(client)
+            runs.append(('Redis: SET ... EX ... GET', lambda key, now: store.touch(key, now, SESSION_TIMEOUT)))
+
+        directory = tempfile.mkdtemp()
+        fallback = SQLiteSessionStore(os.path.join(directory, 'sessions.sqlite3'))
+        runs.append(('SQLite dự phòng', lambda key, now: fallback.touch(key, now, SESSION_TIMEOUT)))
+
+        try:
+            for name, touch in runs:
+                latencies, elapsed = self._run(touch, sessions, options['heartbeats'], options['threads'])
+                latencies.sort()
+                self.stdout.write(
+                    f'{name}: {len(latencies) / elapsed:,.0f} lần/giây, '
+                    f'p50 {self._percentile(latencies, 50):.3f} ms, p99 {self._percentile(latencies, 99):.3f} ms'
+                )
+        finally:
+            if client is not None:
+                client.delete(*sessions)
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            os.rmdir(directory)
+
+        self.stdout.write(self.style.SUCCESS('Hoàn tất benchmark, dữ liệu giả lập đã được xóa'))
+
+    def _legacy_touch(self, client, key, now):
+        # Cách cũ trong views: đọc JSON, ghi JSON rồi đặt thời hạn (3 lần gửi nhận với Redis)
+        data = client.get(key)
+        previous = json.loads(data)['last_active'] if data else None
+        client.set(key, json.dumps({'last_active': now}))
+        client.expire(key, SESSION_TIMEOUT)
+        return previous
+
+    def _run(self, touch, sessions, heartbeats, threads):
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(count, seed):
+            rng = random.Random(seed)
+            local = []
+            for _ in range(count):
+                key = rng.choice(sessions)
+                started = time.perf_counter()
+                touch(key, int(time.time()))
+                local.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        per_thread = [heartbeats // threads + (1 if index < heartbeats % threads else 0) for index in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(worker, count, index) for index, count in enumerate(per_thread)]:
+                future.result()
+        return latencies, time.perf_counter() - started
+
+    def _percentile(self, values, percent):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
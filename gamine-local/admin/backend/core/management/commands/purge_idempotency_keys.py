@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from core.idempotency import purge_expired_keys
+
+class Command(BaseCommand):
+    help = 'Xóa các Idempotency-Key đã hết hạn'
+    
+    def handle(self, *args, **options):
+        count = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Đã xóa {count} Idempotency-Key hết hạn'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from core.cache import invalidate_cache_tags
+from core.reviews import rebuild_rating_summaries
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng tổng hợp đánh giá của sản phẩm từ bảng đánh giá'
+    
+    def handle(self, *args, **options):
+        count = rebuild_rating_summaries()
+        invalidate_cache_tags('reviews')
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại tổng hợp đánh giá cho {count} sản phẩm'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from core.stats import rebuild_sales_rollups
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng số liệu bán hàng theo ngày từ đơn hàng và người dùng'
+    
+    def handle(self, *args, **options):
+        days = rebuild_sales_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại số liệu bán hàng cho {days} ngày'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from core.reservations import RELEASE_BATCH_SIZE, reconcile_reserved_stock, release_expired_reservations
+
+class Command(BaseCommand):
+    help = 'Trả lại hàng đang giữ cho các giỏ hàng đã hết thời gian giữ'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RELEASE_BATCH_SIZE)
+        parser.add_argument('--reconcile', action='store_true',
+                            help='Tính lại số lượng đang giữ của từng sản phẩm từ các lượt giữ hàng')
+    
+    def handle(self, *args, **options):
+        count = release_expired_reservations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Đã trả lại {count} lượt giữ hàng hết hạn'))
+        if options['reconcile']:
+            fixed = reconcile_reserved_stock()
+            self.stdout.write(self.style.SUCCESS(f'Đã tính lại số lượng đang giữ cho {fixed} sản phẩm'))
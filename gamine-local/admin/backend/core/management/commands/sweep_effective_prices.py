@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.models import Products
+from core.pricing import refresh_effective_prices, sweep_effective_prices
+
+class Command(BaseCommand):
+    help = 'Tính lại giá hiệu lực của sản phẩm khi khuyến mãi bắt đầu hoặc kết thúc'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Tính lại giá cho toàn bộ sản phẩm')
+        parser.add_argument('--batch-size', type=int, default=500)
+    
+    def handle(self, *args, **options):
+        if options['all']:
+            product_ids = Products.objects.values_list('product_id', flat=True)
+            count = refresh_effective_prices(product_ids=product_ids, batch_size=options['batch_size'])
+        else:
+            count = sweep_effective_prices(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Đã cập nhật giá hiệu lực cho {count} sản phẩm'))
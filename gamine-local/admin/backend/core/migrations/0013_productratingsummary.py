@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def populate_rating_summaries(apps, schema_editor):
+    Reviews = apps.get_model('core', 'Reviews')
+    ProductRatingSummary = apps.get_model('core', 'ProductRatingSummary')
+    rows = Reviews.objects.values('product_id').annotate(
+        review_count=Count('review_id'),
+        rating_total=Sum('rating'),
+        **{f'rating_{n}': Count('review_id', filter=Q(rating=n)) for n in range(1, 6)}
+    ).order_by()
+    ProductRatingSummary.objects.bulk_create(
+        [ProductRatingSummary(**row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='core.products')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_total', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,159 @@
+import re
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models, transaction
+from django.db.models import Q
+
+from core.migration_operations import CreateModelPartitionedByMonth
+
+CHUNK_SIZE = 5000
+
+# Nội dung `action` do track_user_activity ghi trước đây -> (loại sự kiện, cột)
+LEGACY_ACTIONS = [
+    ('Viewed page: ', 'page_view', 'page_path'),
+    ('Searched for: ', 'search', 'search_query'),
+    ('Viewed product ID: ', 'product_view', 'product_id'),
+    ('Viewed category ID: ', 'category_view', 'category_id'),
+]
+ID_PATTERN = re.compile(r'^(\d+|None)$')
+
+
+def parse_action(action):
+    """Trả về (loại sự kiện, các cột) hoặc None nếu không phải sự kiện tracking"""
+    for prefix, event_type, column in LEGACY_ACTIONS:
+        if not action.startswith(prefix):
+            continue
+        value = action[len(prefix):]
+        if column.endswith('_id'):
+            if not ID_PATTERN.match(value):
+                return None
+            return event_type, {column: None if value == 'None' else int(value)}
+        max_length = 500 if column == 'page_path' else 255
+        return event_type, {column: value[:max_length]}
+    return None
+
+
+def format_action(event):
+    if event.event_type == 'page_view':
+        return f"Viewed page: {event.page_path}"
+    if event.event_type == 'search':
+        return f"Searched for: {event.search_query}"
+    if event.event_type == 'product_view':
+        return f"Viewed product ID: {event.product_id}"
+    if event.event_type == 'category_view':
+        return f"Viewed category ID: {event.category_id}"
+    return f"{event.event_type}: {event.page_path or event.search_query}"
+
+
+def move_legacy_activity(apps, schema_editor):
+    """Chuyển các dòng tracking cũ của UserActivityLog sang ActivityEvent theo từng đợt"""
+    UserActivityLog = apps.get_model('core', 'UserActivityLog')
+    ActivityEvent = apps.get_model('core', 'ActivityEvent')
+    db_alias = schema_editor.connection.alias
+
+    legacy = Q()
+    for prefix, _, _ in LEGACY_ACTIONS:
+        legacy |= Q(action__startswith=prefix)
+
+    last_id = 0
+    while True:
+        rows = list(
+            UserActivityLog.objects.using(db_alias).filter(legacy, log_id__gt=last_id).order_by('log_id')
+            .values('log_id', 'user_id', 'action', 'created_at', 'device', 'ip_address')[:CHUNK_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['log_id']
+
+        events = []
+        moved_ids = []
+        for row in rows:
+            parsed = parse_action(row['action'])
+            if parsed is None:
+                continue
+            event_type, columns = parsed
+            events.append(ActivityEvent(
+                user_id=row['user_id'],
+                event_type=event_type,
+                created_at=row['created_at'],
+                device=row['device'],
+                ip_address=row['ip_address'],
+                **columns
+            ))
+            moved_ids.append(row['log_id'])
+
+        with transaction.atomic(using=db_alias):
+            ActivityEvent.objects.using(db_alias).bulk_create(events)
+            UserActivityLog.objects.using(db_alias).filter(log_id__in=moved_ids).delete()
+
+
+def restore_legacy_activity(apps, schema_editor):
+    UserActivityLog = apps.get_model('core', 'UserActivityLog')
+    ActivityEvent = apps.get_model('core', 'ActivityEvent')
+    db_alias = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        events = list(
+            ActivityEvent.objects.using(db_alias).filter(event_id__gt=last_id).order_by('event_id')[:CHUNK_SIZE]
+        )
+        if not events:
+            break
+        last_id = events[-1].event_id
+
+        with transaction.atomic(using=db_alias):
+            UserActivityLog.objects.using(db_alias).bulk_create([
+                UserActivityLog(
+                    user_id=event.user_id,
+                    action=format_action(event),
+                    created_at=event.created_at,
+                    device=event.device,
+                    ip_address=event.ip_address,
+                )
+                for event in events
+            ])
+            ActivityEvent.objects.using(db_alias).filter(event_id__in=[event.event_id for event in events]).delete()
+
+
+class Migration(migrations.Migration):
+
+    # Chuyển dữ liệu theo từng đợt, mỗi đợt một transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0014_dailysalesrollup'),
+    ]
+
+    operations = [
+        CreateModelPartitionedByMonth(
+            name='ActivityEvent',
+            fields=[
+                ('event_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.users')),
+                ('event_type', models.CharField(choices=[('page_view', 'Page view'), ('search', 'Search'), ('product_view', 'Product view'), ('category_view', 'Category view'), ('promotion_view', 'Promotion view')], max_length=30)),
+                ('product_id', models.IntegerField(blank=True, null=True)),
+                ('category_id', models.IntegerField(blank=True, null=True)),
+                ('promotion_id', models.IntegerField(blank=True, null=True)),
+                ('search_query', models.CharField(blank=True, default='', max_length=255)),
+                ('page_path', models.CharField(blank=True, default='', max_length=500)),
+                ('device', models.CharField(blank=True, max_length=255, null=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            partition_field='created_at',
+        ),
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(fields=['event_type', 'created_at'], name='activity_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(fields=['product_id', 'created_at'], name='activity_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+        ),
+        migrations.RunPython(move_legacy_activity, restore_legacy_activity),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+from core.migration_operations import PartitionTableByMonth
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_activityevent'),
+    ]
+
+    operations = [
+        PartitionTableByMonth(model_name='auditlog', partition_field='created_at'),
+        PartitionTableByMonth(model_name='useractivitylog', partition_field='created_at'),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at'], name='auditlog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['table_name', 'record_id'], name='auditlog_table_record_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivitylog',
+            index=models.Index(fields=['created_at'], name='useractivitylog_created_idx'),
+        ),
+    ]
@@ -0,0 +1,252 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+
+
+def _encode_cursor(data):
+    raw = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (TypeError, ValueError, binascii.Error, UnicodeError):
+        raise NotFound('Cursor không hợp lệ')
+    if not isinstance(data, dict):
+        raise NotFound('Cursor không hợp lệ')
+    return data
+
+
+def estimate_count(queryset):
+    """
+    Ước lượng số dòng của queryset.
+    PostgreSQL: dùng số dòng dự kiến của planner (EXPLAIN) thay vì COUNT(*).
+    Các backend khác: đếm chính xác.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Phân trang theo khóa (keyset/cursor) cho các API danh sách.
+
+    Trang tiếp theo được lọc bằng giá trị khóa sắp xếp của dòng cuối trang trước
+    (WHERE (created_at, pk) < (...)) nên tốc độ không phụ thuộc độ sâu trang.
+    Cursor là chuỗi base64 không cần client hiểu nội dung.
+
+    Để không làm thay đổi định dạng response của các client hiện tại, phân trang
+    chỉ được bật khi request có một trong các tham số cursor, page_size hoặc count.
+
+    Tham số:
+        cursor     cursor trả về ở trường `next` của trang trước
+        page_size  số dòng mỗi trang (tối đa settings.PAGINATION_MAX_PAGE_SIZE)
+        count      `exact` (COUNT(*)) hoặc `estimate` (ước lượng từ planner)
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    # Thứ tự mặc định, dùng khi view/queryset không chỉ định thứ tự
+    ordering = ('-pk',)
+
+    def __init__(self, ordering=None, required=False):
+        self.explicit_ordering = tuple(ordering) if ordering else None
+        # required=True: luôn phân trang kể cả khi request không có tham số
+        self.required = required
+        self.page_size = getattr(settings, 'PAGINATION_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+        self.max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+
+    def is_requested(self, request):
+        if self.required:
+            return True
+        params = request.query_params
+        return any(
+            param in params
+            for param in (self.cursor_query_param, self.page_size_query_param, self.count_query_param)
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, queryset, view=None):
+        """
+        Lấy thứ tự sắp xếp: thứ tự truyền vào khi khởi tạo, `pagination_ordering`
+        của view, order_by của queryset, cuối cùng là thứ tự mặc định.
+        Luôn thêm khóa chính để thứ tự là duy nhất.
+        Trả về None nếu thứ tự chứa biểu thức (ví dụ xếp hạng tìm kiếm).
+        """
+        ordering = (
+            self.explicit_ordering
+            or getattr(view, 'pagination_ordering', None)
+            or queryset.query.order_by
+            or self.ordering
+        )
+        if any(not isinstance(field, str) for field in ordering):
+            return None
+
+        model = queryset.model
+        pk_name = model._meta.pk.name
+        fields = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = pk_name
+            try:
+                model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            fields.append(('-' if field.startswith('-') else '') + name)
+
+        if not any(field.lstrip('-') == pk_name for field in fields):
+            descending = fields[-1].startswith('-')
+            fields.append(('-' if descending else '') + pk_name)
+        return tuple(fields)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.count = self._count(queryset, request)
+        self.fields = self.get_ordering(queryset, view)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        position = _decode_cursor(cursor) if cursor else {}
+
+        if self.fields is None:
+            # Thứ tự theo biểu thức không lọc được bằng khóa, dùng vị trí (offset)
+            offset = position.get('o', 0)
+            if not isinstance(offset, int) or offset < 0:
+                raise NotFound('Cursor không hợp lệ')
+            rows = list(queryset[offset:offset + self.page_size_value + 1])
+            self.next_position = {'o': offset + self.page_size_value}
+        else:
+            queryset = queryset.order_by(*self.fields)
+            if 'k' in position:
+                queryset = queryset.filter(self._after(queryset.model, position['k']))
+            rows = list(queryset[:self.page_size_value + 1])
+            self.next_position = None
+            if len(rows) > self.page_size_value:
+                last = rows[self.page_size_value - 1]
+                self.next_position = {'k': [self._key_value(last, field) for field in self.fields]}
+
+        self.has_next = len(rows) > self.page_size_value
+        return rows[:self.page_size_value]
+
+    def _count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        if mode in ('exact', 'true', '1'):
+            return queryset.count()
+        return None
+
+    def _key_value(self, obj, field):
+        name = field.lstrip('-')
+        value = getattr(obj, obj._meta.get_field(name).attname)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value if isinstance(value, (int, float, str)) or value is None else str(value)
+
+    def _after(self, model, values):
+        """Điều kiện lấy các dòng đứng sau vị trí `values` theo thứ tự self.fields"""
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound('Cursor không hợp lệ')
+
+        parsed = []
+        for field, value in zip(self.fields, values):
+            name = field.lstrip('-')
+            try:
+                parsed.append(model._meta.get_field(name).to_python(value))
+            except ValidationError:
+                raise NotFound('Cursor không hợp lệ')
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {self.fields[i].lstrip('-'): parsed[i] for i in range(index)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': parsed[index]})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, _encode_cursor(self.next_position))
+
+    def get_next_cursor(self):
+        return _encode_cursor(self.next_position) if self.has_next else None
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['page_size'] = self.page_size_value
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+
+class RequiredKeysetPagination(KeysetPagination):
+    """KeysetPagination luôn bật, cho các bảng quá lớn để trả về toàn bộ (ví dụ nhật ký)"""
+
+    def __init__(self, ordering=None):
+        super().__init__(ordering=ordering, required=True)
+
+
+def paginate_list(request, queryset, serialize, ordering=None, view=None):
+    """
+    Phân trang cho các API viết dạng hàm (@api_view).
+    Trả về Response đã phân trang, hoặc None nếu request không yêu cầu phân trang.
+    """
+    paginator = KeysetPagination(ordering=ordering)
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    if page is None:
+        return None
+    return paginator.get_paginated_response(serialize(page))
@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from .redis_pool import CircuitBreaker, get_client
+
+# Session timeout in seconds (5 minutes)
+SESSION_TIMEOUT = getattr(settings, 'SESSION_TIMEOUT', 5 * 60)
+# File SQLite dùng chung giữa các worker khi Redis không khả dụng
+SESSION_FALLBACK_PATH = getattr(
+    settings, 'SESSION_FALLBACK_PATH', os.path.join(tempfile.gettempdir(), 'gamine_sessions.sqlite3')
+)
+# Key phiên theo loại tài khoản
+SESSION_KEY_FORMATS = {
+    'admin': 'admin_session_{}',
+    'user': 'user_session_{}',
+}
+# Số lần ghi giữa hai lần dọn các phiên hết hạn trong file dự phòng
+FALLBACK_PURGE_EVERY = 1000
+
+
+def _decode(raw):
+    """last_active lưu dạng số nguyên; vẫn đọc được giá trị JSON {'last_active': ...} cũ"""
+    if raw is None:
+        return None
+    if raw[:1] == b'{':
+        return json.loads(raw).get('last_active')
+    return int(raw)
+
+
+class RedisSessionStore:
+    """Mỗi thao tác là một lệnh Redis (SET ... EX ... GET cần Redis >= 6.2)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def touch(self, key, now, ttl):
+        return _decode(self.client.set(key, now, ex=ttl, get=True))
+
+    def touch_many(self, keys, now, ttl):
+        # Các lệnh SET được gửi chung một lần (pipeline, không cần transaction)
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(key, now, ex=ttl, get=True)
+        return [_decode(raw) for raw in pipeline.execute()]
+
+    def refresh(self, key, now, ttl):
+        # XX: chỉ ghi khi phiên đã tồn tại
+        return _decode(self.client.set(key, now, ex=ttl, xx=True, get=True))
+
+    def get(self, key):
+        return _decode(self.client.get(key))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class SQLiteSessionStore:
+    """
+    Lưu phiên trong một file SQLite (WAL) để các worker gunicorn trên cùng máy dùng chung
+    khi Redis không khả dụng. Mỗi thread một kết nối.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Không dùng lại kết nối mở trước khi fork worker
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sessions '
+                '(key TEXT PRIMARY KEY, last_active INTEGER NOT NULL, expires_at INTEGER NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def touch(self, key, now, ttl):
+        return self.touch_many([key], now, ttl)[0]
+
+    def touch_many(self, keys, now, ttl):
+        connection = self._connection()
+        previous = []
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key in keys:
+                row = connection.execute(
+                    'SELECT last_active FROM sessions WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                connection.execute(
+                    'INSERT OR REPLACE INTO sessions (key, last_active, expires_at) VALUES (?, ?, ?)',
+                    (key, now, now + ttl)
+                )
+                previous.append(row[0] if row else None)
+            self._writes += 1
+            if self._writes % FALLBACK_PURGE_EVERY == 0:
+                connection.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return previous
+
+    def refresh(self, key, now, ttl):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT last_active FROM sessions WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if row:
+                connection.execute(
+                    'UPDATE sessions SET last_active = ?, expires_at = ? WHERE key = ?', (now, now + ttl, key)
+                )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return row[0] if row else None
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT last_active FROM sessions WHERE key = ? AND expires_at > ?', (key, int(time.time()))
+        ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM sessions WHERE key = ?', (key,))
+
+
+_redis_store = RedisSessionStore(get_client())
+_fallback_store = SQLiteSessionStore(SESSION_FALLBACK_PATH)
+_breaker = CircuitBreaker('Session store')
+
+
+def _call(method, *args):
+    """Gọi Redis, chuyển sang file SQLite khi Redis lỗi hoặc mạch đang ngắt"""
+    if _breaker.allow():
+        try:
+            result = getattr(_redis_store, method)(*args)
+            _breaker.success()
+            return result
+        except redis.RedisError as e:
+            _breaker.failure(e)
+    return getattr(_fallback_store, method)(*args)
+
+
+def touch_session(key, now=None, ttl=SESSION_TIMEOUT):
+    """
+    Ghi thời điểm hoạt động `now` của phiên và gia hạn phiên thêm `ttl` giây trong một thao tác.
+    Trả về thời điểm hoạt động trước đó, None nếu phiên chưa có hoặc đã hết hạn.
+    """
+    return _call('touch', key, int(now if now is not None else time.time()), ttl)
+
+
+def touch_sessions(keys, now=None, ttl=SESSION_TIMEOUT):
+    """Như touch_session cho nhiều phiên, trong một lần gửi nhận với Redis. Trả về danh sách theo thứ tự keys"""
+    if not keys:
+        return []
+    return _call('touch_many', list(keys), int(now if now is not None else time.time()), ttl)
+
+
+def refresh_session(key, now=None, ttl=SESSION_TIMEOUT):
+    """
+    Như touch_session nhưng chỉ cập nhật phiên đang tồn tại, không tạo phiên mới.
+    Trả về thời điểm hoạt động trước đó, None nếu phiên chưa có hoặc đã hết hạn.
+    """
+    return _call('refresh', key, int(now if now is not None else time.time()), ttl)
+
+
+def get_last_active(key):
+    """Thời điểm hoạt động gần nhất của phiên, None nếu chưa có hoặc đã hết hạn"""
+    return _call('get', key)
+
+
+def delete_session(key):
+    _call('delete', key)
+
@@ -0,0 +1,240 @@
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailySalesRollup, OrderDetails, Orders, Users
+
+# Trạng thái đơn hàng -> cột đếm trong DailySalesRollup
+STATUS_FIELDS = {
+    'Pending': 'pending_orders',
+    'Processing': 'processing_orders',
+    'In transit': 'in_transit_orders',
+    'Completed': 'completed_orders',
+    'Cancelled': 'cancelled_orders',
+}
+# Chỉ đơn hàng hoàn thành được tính doanh thu và số sản phẩm đã bán
+REVENUE_STATUS = 'Completed'
+
+SUM_FIELDS = ('orders_count', *STATUS_FIELDS.values(), 'revenue', 'units_sold', 'new_users')
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+# Số điểm tối đa của một chuỗi số liệu (khoảng 10 năm theo ngày)
+MAX_SERIES_POINTS = 3700
+
+# Phần đóng góp của một đơn hàng vào số liệu theo ngày
+OrderSnapshot = namedtuple('OrderSnapshot', ['day', 'status', 'revenue', 'units'])
+
+
+def order_snapshot(order):
+    """
+    Phần đóng góp của đơn hàng vào số liệu bán hàng.
+    Lấy trước và sau khi thay đổi đơn hàng rồi truyền cho record_order_change.
+    """
+    revenue = Decimal('0')
+    units = 0
+    if order.order_status == REVENUE_STATUS:
+        revenue = Decimal(str(order.total_amount or 0))
+        units = OrderDetails.objects.filter(order_id=order.pk).aggregate(units=Sum('quantity'))['units'] or 0
+    return OrderSnapshot(timezone.localdate(order.created_at), order.order_status, revenue, units)
+
+
+def _apply(day, changes):
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+    DailySalesRollup.objects.get_or_create(day=day)
+    DailySalesRollup.objects.filter(day=day).update(
+        **{field: F(field) + delta for field, delta in changes.items()}
+    )
+
+
+def _contribution(snapshot, sign):
+    changes = {
+        'orders_count': sign,
+        'revenue': sign * snapshot.revenue,
+        'units_sold': sign * snapshot.units,
+    }
+    status_field = STATUS_FIELDS.get(snapshot.status)
+    if status_field:
+        changes[status_field] = sign
+    return changes
+
+
+def record_order_change(before, after):
+    """
+    Cập nhật số liệu theo ngày khi đơn hàng được tạo (before=None),
+    sửa/đổi trạng thái, hoặc xóa (after=None).
+    """
+    if before == after:
+        return
+
+    per_day = {}
+    for snapshot, sign in ((before, -1), (after, 1)):
+        if snapshot is None:
+            continue
+        changes = per_day.setdefault(snapshot.day, {})
+        for field, delta in _contribution(snapshot, sign).items():
+            changes[field] = changes.get(field, 0) + delta
+
+    with transaction.atomic():
+        for day, changes in per_day.items():
+            _apply(day, changes)
+
+
+def record_user_change(user, sign=1):
+    """Cập nhật số người dùng mới khi tạo (sign=1) hoặc xóa (sign=-1) người dùng"""
+    with transaction.atomic():
+        _apply(timezone.localdate(user.created_at), {'new_users': sign})
+
+
+def rebuild_sales_rollups():
+    """
+    Tính lại toàn bộ số liệu theo ngày từ bảng Orders/OrderDetails/Users.
+    Dùng khi khởi tạo hoặc khi số liệu bị lệch. Trả về số ngày có số liệu.
+    """
+    rows = {}
+
+    def row(day):
+        return rows.setdefault(day, {field: 0 for field in SUM_FIELDS})
+
+    orders = Orders.objects.annotate(day=TruncDate('created_at')).values('day', 'order_status').annotate(
+        count=Count('order_id'),
+        revenue=Sum('total_amount', filter=Q(order_status=REVENUE_STATUS)),
+    ).order_by()
+    for item in orders:
+        values = row(item['day'])
+        values['orders_count'] += item['count']
+        status_field = STATUS_FIELDS.get(item['order_status'])
+        if status_field:
+            values[status_field] += item['count']
+        values['revenue'] += item['revenue'] or 0
+
+    units = OrderDetails.objects.filter(order__order_status=REVENUE_STATUS).annotate(
+        day=TruncDate('order__created_at')
+    ).values('day').annotate(units=Sum('quantity')).order_by()
+    for item in units:
+        row(item['day'])['units_sold'] += item['units'] or 0
+
+    users = Users.objects.annotate(day=TruncDate('created_at')).values('day').annotate(
+        count=Count('user_id')
+    ).order_by()
+    for item in users:
+        row(item['day'])['new_users'] += item['count']
+
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(
+            [DailySalesRollup(day=day, **values) for day, values in rows.items()],
+            batch_size=1000
+        )
+    return len(rows)
+
+
+def _sums():
+    # Tên kết quả không được trùng tên cột của model
+    return {f'sum_{field}': Sum(field) for field in SUM_FIELDS}
+
+
+def _rollups(start=None, end=None):
+    queryset = DailySalesRollup.objects.all()
+    if start:
+        queryset = queryset.filter(day__gte=start)
+    if end:
+        queryset = queryset.filter(day__lte=end)
+    return queryset
+
+
+def sales_totals(start=None, end=None, recent_since=None):
+    """
+    Tổng số liệu trong khoảng ngày [start, end] (bỏ trống = không giới hạn), một truy vấn.
+    recent_since: thêm `recent_new_users` là số người dùng mới từ ngày này.
+    """
+    sums = _sums()
+    if recent_since:
+        sums['sum_recent_new_users'] = Sum('new_users', filter=Q(day__gte=recent_since))
+    totals = _rollups(start, end).aggregate(**sums)
+    return {alias[len('sum_'):]: value or 0 for alias, value in totals.items()}
+
+
+def order_status_counts(totals):
+    """Số đơn hàng theo trạng thái từ kết quả sales_totals (bỏ trạng thái không có đơn)"""
+    return [
+        {'order_status': order_status, 'count': totals[field]}
+        for order_status, field in STATUS_FIELDS.items()
+        if totals[field]
+    ]
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def sales_series(start, end, granularity='month'):
+    """
+    Số liệu theo ngày/tuần/tháng trong khoảng [start, end], một truy vấn GROUP BY
+    trên bảng số liệu theo ngày. Các kỳ không có số liệu được điền 0.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity phải là một trong: {", ".join(GRANULARITIES)}')
+    if start > end:
+        raise ValueError('start phải trước end')
+
+    periods = []
+    period = _period_start(start, granularity)
+    while period <= end:
+        periods.append(period)
+        if len(periods) > MAX_SERIES_POINTS:
+            raise ValueError(f'Khoảng thời gian quá dài (tối đa {MAX_SERIES_POINTS} kỳ)')
+        period = _next_period(period, granularity)
+
+    trunc = GRANULARITIES[granularity]
+    rows = _rollups(start, end).annotate(period=trunc('day')).values('period').annotate(
+        **_sums()
+    ).order_by('period')
+    by_period = {
+        row['period'].date() if hasattr(row['period'], 'date') else row['period']: row
+        for row in rows
+    }
+
+    series = []
+    for period in periods:
+        row = by_period.get(period, {})
+        series.append({
+            'period': period,
+            **{field: row.get(f'sum_{field}') or 0 for field in SUM_FIELDS},
+        })
+    return series
+
+
+def record_products_deleted(product_ids):
+    """
+    Trừ số sản phẩm đã bán của các sản phẩm sắp bị xóa (chi tiết đơn hàng bị xóa theo).
+    Gọi trước khi xóa sản phẩm/danh mục.
+    """
+    units = OrderDetails.objects.filter(
+        product_id__in=product_ids, order__order_status=REVENUE_STATUS
+    ).annotate(day=TruncDate('order__created_at')).values('day').annotate(units=Sum('quantity')).order_by()
+    with transaction.atomic():
+        for item in units:
+            _apply(item['day'], {'units_sold': -(item['units'] or 0)})
@@ -0,0 +1,42 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from core import cache
+from core.models import Blog
+
+
+class CollectionStampTests(TestCase):
+    """Dấu phiên bản (ETag) không được lưu khi Redis lỗi và mọi tag được làm mới khi Redis trở lại"""
+
+    def setUp(self):
+        Blog.objects.create(title='Bài viết 1', content='Nội dung')
+        self.addCleanup(self._close_breaker)
+
+    def _close_breaker(self):
+        cache._breaker._failures = 0
+        cache._breaker._opened_at = None
+        cache._breaker._trial = False
+
+    def _open_breaker(self, opened_at=None):
+        cache._breaker._failures = cache._breaker.failure_threshold
+        cache._breaker._opened_at = time.monotonic() if opened_at is None else opened_at
+
+    def test_stamp_is_recomputed_while_breaker_is_open(self):
+        self._open_breaker()
+        etag, _ = cache.collection_stamp('blogs')
+
+        self.assertIsNone(cache._local_backend.get(f'{cache.KEY_PREFIX}:stamp:blogs'))
+        # Dữ liệu đổi mà không có tag nào được tăng (ví dụ tag chỉ đổi ở worker khác)
+        Blog.objects.create(title='Bài viết 2', content='Nội dung')
+        self.assertNotEqual(cache.collection_stamp('blogs')[0], etag)
+
+    def test_all_tags_are_bumped_when_redis_recovers(self):
+        self._open_breaker(opened_at=time.monotonic() - cache._breaker.reset_timeout - 1)
+        with mock.patch.object(cache._redis_backend, 'versions', return_value=[0]), \
+                mock.patch.object(cache._redis_backend, 'bump') as bump:
+            cache._call('versions', ['blogs'])
+
+        self.assertFalse(cache._breaker.is_open)
+        bump.assert_called_once_with(cache.CACHE_TAGS)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Categories, IdempotencyKey, Products
+
+
+class IdempotencyKeyTests(TestCase):
+    """Header Idempotency-Key trên API cập nhật tồn kho (core.idempotency)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm test', price=Decimal('100000'), stock_quantity=10, category=category
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/products/{self.product.product_id}/update-inventory/'
+
+    def _post(self, quantity, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post(self.url, {'quantity': quantity}, format='json', headers=headers)
+
+    def _stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock_quantity
+
+    def test_retry_with_same_key_replays_response(self):
+        first = self._post(5, key='nhap-kho-1')
+        second = self._post(5, key='nhap-kho-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotency-Key-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotency-Key-Replayed'))
+        self.assertEqual(self._stock(), 15)
+
+    def test_same_key_with_different_body_is_rejected(self):
+        self._post(5, key='nhap-kho-1')
+        response = self._post(7, key='nhap-kho-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self._stock(), 15)
+
+    def test_failed_request_is_not_stored(self):
+        self.assertEqual(self._post(-50, key='xuat-kho-1').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.filter(key='xuat-kho-1').exists())
+
+        Products.objects.filter(pk=self.product.pk).update(stock_quantity=60)
+        self.assertEqual(self._post(-50, key='xuat-kho-1').status_code, 200)
+        self.assertEqual(self._stock(), 10)
+
+    def test_expired_key_can_be_reused(self):
+        self._post(5, key='nhap-kho-1')
+        IdempotencyKey.objects.filter(key='nhap-kho-1').update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self._post(7, key='nhap-kho-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._stock(), 22)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self._post(5)
+        self._post(5)
+
+        self.assertEqual(self._stock(), 20)
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Categories, Products, Reviews, Users
+
+REVIEW_COUNT = 7
+
+
+def _cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class KeysetPaginationTests(TestCase):
+    """Phân trang keyset (core.pagination) qua API đánh giá sản phẩm, thứ tự (-created_at, -review_id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm test', price=Decimal('100000'), stock_quantity=10, category=category
+        )
+        now = timezone.now()
+        for index in range(REVIEW_COUNT):
+            user = Users.objects.create(username=f'khach{index}', password='x', email=f'khach{index}@example.com')
+            # Nhiều đánh giá cùng created_at: thứ tự phụ thuộc khóa chính
+            Reviews.objects.create(
+                product=cls.product, user=user, rating=5, comment=f'Nhận xét {index}',
+                created_at=now - timedelta(minutes=index // 3),
+            )
+        cls.expected_ids = list(
+            Reviews.objects.order_by('-created_at', '-review_id').values_list('review_id', flat=True)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/reviews/product/{self.product.product_id}/'
+
+    def test_cursor_round_trip_visits_every_row_once(self):
+        ids = []
+        page_sizes = []
+        url = f'{self.url}?page_size=3&count=exact'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data['count'], REVIEW_COUNT)
+            page_sizes.append(len(data['results']))
+            ids += [review['review_id'] for review in data['results']]
+            url = data['next']
+
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(page_sizes, [3, 3, 1])
+
+    def test_without_parameters_returns_plain_list(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review['review_id'] for review in response.json()], self.expected_ids)
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in ('khong-phai-base64!', _cursor(['k']), _cursor({'k': [1]}), _cursor({'k': ['ngay', 1]})):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'error': 'Cursor không hợp lệ'})
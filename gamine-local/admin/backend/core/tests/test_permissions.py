@@ -0,0 +1,29 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Admin, Users
+
+DATABASE_STATS_URL = '/api/database/connections/'
+
+
+class AdminOnlyStatsTests(TestCase):
+    """API số liệu vận hành chỉ dành cho Admin, khách hàng đã đăng nhập nhận 403"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Admin.objects.create(username='quantri', password='x', email='quantri@example.com')
+        cls.user = Users.objects.create(username='khach', password='x', email='khach@example.com')
+
+    def _get(self, principal):
+        client = APIClient()
+        client.force_authenticate(user=principal)
+        return client.get(DATABASE_STATS_URL)
+
+    def test_admin_can_read_database_stats(self):
+        response = self._get(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('conn_max_age', response.json())
+
+    def test_customer_is_forbidden(self):
+        self.assertEqual(self._get(self.user).status_code, 403)
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import AuditLog
+from core.partitions import is_partitioned, list_partitions, months_in_default, uses_partitions
+from core.retention import archive_logs
+
+RETENTION_DAYS = 60
+
+
+class ArchiveLogsTests(TestCase):
+    """
+    archive_logs theo từng đợt như trên SQLite (trên PostgreSQL tắt partition để chạy cùng cách):
+    dòng cũ hơn mốc được ghi ra file theo tháng rồi xóa, dòng mới giữ nguyên.
+    """
+
+    def setUp(self):
+        now = timezone.now()
+        self.old_logs = [
+            AuditLog.objects.create(action=f'Cũ {days}', created_at=now - timedelta(days=days))
+            for days in (150, 100, 61)
+        ]
+        self.recent_log = AuditLog.objects.create(action='Mới', created_at=now - timedelta(days=5))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = mock.patch('core.retention.uses_partitions', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _archive(self, *args):
+        output = StringIO()
+        call_command(
+            'archive_logs', '--table', 'audit_log', '--days', str(RETENTION_DAYS),
+            '--output-dir', self.directory, *args, stdout=output
+        )
+        return output.getvalue()
+
+    def _archived_ids(self):
+        ids = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                self.assertTrue(name.endswith('.jsonl.gz'), name)
+                with gzip.open(os.path.join(root, name), 'rt', encoding='utf-8') as archive:
+                    ids += [json.loads(line)['log_id'] for line in archive]
+        return sorted(ids)
+
+    def test_old_rows_are_archived_and_deleted(self):
+        output = self._archive()
+
+        self.assertIn('audit_log: Đã lưu trữ và xóa 3 dòng', output)
+        self.assertEqual(self._archived_ids(), sorted(log.log_id for log in self.old_logs))
+        self.assertEqual(list(AuditLog.objects.values_list('log_id', flat=True)), [self.recent_log.log_id])
+
+    def test_dry_run_changes_nothing(self):
+        output = self._archive('--dry-run')
+
+        self.assertIn('audit_log: Sẽ lưu trữ 3 dòng', output)
+        self.assertEqual(self._archived_ids(), [])
+        self.assertEqual(AuditLog.objects.count(), 4)
+
+
+@skipUnless(uses_partitions(), 'Chỉ PostgreSQL chia partition')
+class ArchivePartitionsTests(TestCase):
+    """Dry run trên bảng chia partition chỉ đọc: không tạo partition, không chuyển dòng khỏi partition mặc định"""
+
+    def test_dry_run_does_not_create_partitions(self):
+        table = AuditLog._meta.db_table
+        self.assertTrue(is_partitioned(table))
+        old_log = AuditLog.objects.create(action='Cũ', created_at=timezone.now() - timedelta(days=3 * 365))
+        month = old_log.created_at.astimezone(dt_timezone.utc).date().replace(day=1)
+        partitions = list_partitions(table)
+        self.assertIn(month, months_in_default(table, 'created_at'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = archive_logs('audit_log', days=RETENTION_DAYS, directory=directory, dry_run=True)
+            self.assertEqual(os.listdir(directory), [])
+
+        self.assertIn({'month': month, 'rows': 1, 'path': None, 'partition': f'{table}_{month:%Y%m}'}, results)
+        self.assertEqual(list_partitions(table), partitions)
+        self.assertIn(month, months_in_default(table, 'created_at'))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {connection.ops.quote_name(table + "_default")}')
+            self.assertEqual(cursor.fetchone()[0], 1)
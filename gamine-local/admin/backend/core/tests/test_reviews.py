@@ -0,0 +1,80 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Admin, Categories, ProductRatingSummary, Products, Reviews, Users
+
+
+class RatingSummaryTests(TestCase):
+    """Bản tổng hợp đánh giá luôn khớp với bảng đánh giá"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm test', price=Decimal('100000'), stock_quantity=10, category=category
+        )
+        cls.other_product = Products.objects.create(
+            name='Sản phẩm khác', price=Decimal('100000'), stock_quantity=10, category=category
+        )
+        cls.users = [
+            Users.objects.create(username=f'khach{index}', password='x', email=f'khach{index}@example.com')
+            for index in range(3)
+        ]
+        cls.admin = Admin.objects.create(username='quantri', password='x', email='quantri@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _review(self, user, rating, product=None):
+        return self.client.post('/api/reviews/add/', {
+            'product_id': (product or self.product).product_id,
+            'user_id': user.user_id,
+            'rating': rating,
+            'comment': 'Nhận xét',
+        }, format='json')
+
+    def _summary(self, product=None):
+        summary = ProductRatingSummary.objects.get(product=product or self.product)
+        return summary.review_count, summary.rating_total, [getattr(summary, f'rating_{n}') for n in range(1, 6)]
+
+    def test_new_reviews_are_added(self):
+        self.assertEqual(self._review(self.users[0], 5).status_code, 201)
+        self.assertEqual(self._review(self.users[1], 3).status_code, 201)
+
+        self.assertEqual(self._summary(), (2, 8, [0, 0, 1, 0, 1]))
+
+    def test_updated_review_moves_between_ratings(self):
+        self._review(self.users[0], 5)
+        self._review(self.users[1], 3)
+        self.assertEqual(self._review(self.users[0], 2).status_code, 200)
+
+        self.assertEqual(self._summary(), (2, 5, [0, 1, 1, 0, 0]))
+        self.assertEqual(Reviews.objects.filter(product=self.product).count(), 2)
+
+    def test_deleting_user_removes_their_reviews_from_summary(self):
+        self._review(self.users[0], 5)
+        self._review(self.users[1], 3)
+        self._review(self.users[0], 4, product=self.other_product)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.delete(f'/api/users/{self.users[0].user_id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self._summary(), (1, 3, [0, 0, 1, 0, 0]))
+        self.assertEqual(self._summary(self.other_product), (0, 0, [0, 0, 0, 0, 0]))
+
+    def test_rebuild_command_matches_reviews(self):
+        self._review(self.users[0], 5)
+        self._review(self.users[1], 1)
+        # Sửa trực tiếp trong database, bản tổng hợp không được cập nhật
+        Reviews.objects.filter(user=self.users[1]).update(rating=4)
+        ProductRatingSummary.objects.create(product=self.other_product, review_count=7, rating_total=35)
+
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+
+        self.assertEqual(self._summary(), (2, 9, [0, 0, 0, 1, 1]))
+        self.assertFalse(ProductRatingSummary.objects.filter(product=self.other_product).exists())
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Categories, DailySalesRollup, OrderDetails, Orders, Products, Users
+from core.stats import order_snapshot, rebuild_sales_rollups, record_order_change, record_user_change
+
+
+def _rollup_rows():
+    return {
+        row.pop('day'): row
+        for row in DailySalesRollup.objects.order_by('day').values()
+        # Ngày không còn số liệu (sau khi trừ về 0) không có trong bảng tính lại
+        if any(value for field, value in row.items() if field != 'day')
+    }
+
+
+class SalesRollupTests(TestCase):
+    """Số liệu cập nhật tăng dần khớp với số liệu tính lại từ đầu bằng rebuild_sales_rollups"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm test', price=Decimal('100000'), stock_quantity=100, category=category
+        )
+
+    def _create_user(self, username, days_ago=0):
+        user = Users.objects.create(
+            username=username, password='x', email=f'{username}@example.com',
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+        record_user_change(user)
+        return user
+
+    def _create_order(self, user, quantity, days_ago=0):
+        order = Orders.objects.create(
+            user=user, customer_name=user.username, total_amount=Decimal('100000') * quantity,
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+        OrderDetails.objects.create(order=order, product=self.product, quantity=quantity, price=Decimal('100000'))
+        record_order_change(None, order_snapshot(order))
+        return order
+
+    def _set_status(self, order, order_status):
+        before = order_snapshot(order)
+        order.order_status = order_status
+        order.save()
+        record_order_change(before, order_snapshot(order))
+
+    def test_incremental_changes_match_rebuild(self):
+        first = self._create_user('khach1', days_ago=40)
+        second = self._create_user('khach2', days_ago=3)
+        completed = self._create_order(first, 2, days_ago=10)
+        cancelled = self._create_order(second, 1, days_ago=3)
+        self._create_order(second, 4)
+        self._set_status(completed, 'Processing')
+        self._set_status(completed, 'Completed')
+        self._set_status(cancelled, 'Cancelled')
+
+        # Xóa người dùng xóa theo đơn hàng của họ (như UsersViewSet.destroy)
+        removed = self._create_user('khach3', days_ago=3)
+        removed_order = self._create_order(removed, 3, days_ago=3)
+        self._set_status(removed_order, 'Completed')
+        snapshots = [order_snapshot(order) for order in Orders.objects.filter(user=removed)]
+        removed.delete()
+        for snapshot in snapshots:
+            record_order_change(snapshot, None)
+        record_user_change(removed, -1)
+
+        incremental = _rollup_rows()
+        rebuild_sales_rollups()
+        self.assertEqual(incremental, _rollup_rows())
+        self.assertEqual(sum(row['units_sold'] for row in incremental.values()), 2)
+        self.assertEqual(sum(row['revenue'] for row in incremental.values()), Decimal('200000'))
+
+    def test_dashboard_counts_users_missing_from_rollups(self):
+        self._create_user('khach1')
+        # Người dùng tạo trước khi có bảng số liệu (không qua record_user_change)
+        Users.objects.create(username='khachcu', password='x', email='khachcu@example.com')
+
+        response = APIClient().get('/api/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_users'], 2)
+        self.assertEqual(response.json()['new_users_count'], 1)
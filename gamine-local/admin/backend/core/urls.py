@@ -1,6 +1,7 @@
 from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from . import views
+from django.conf import settings
+from . import async_views, heartbeat, views
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.viewsets import ViewSetMixin
 from core.views import client_terms_conditions
@@ -25,9 +26,20 @@ router.register(r'privacy', views.PrivacyPolicyViewSet)
 router.register(r'social-media', views.SocialMediaUrlsViewSet)
 
 urlpatterns = [
+    # Đặt trước router để không bị route chi tiết products/<pk>/, orders/<pk>/... bắt mất
+    path('products/suggest/', csrf_exempt(views.product_suggestions), name='product_suggestions'),
+    path('products/availability/', csrf_exempt(views.product_availability), name='product_availability'),
+    path('products/inventory/bulk/', csrf_exempt(views.bulk_update_inventory), name='bulk_update_inventory'),
+    path('orders/export/', csrf_exempt(views.export_data), {'resource': 'orders'}, name='export_orders'),
+    path('users/export/', csrf_exempt(views.export_data), {'resource': 'users'}, name='export_users'),
+    path('audit-logs/export/', csrf_exempt(views.export_data), {'resource': 'audit-logs'}, name='export_audit_logs'),
+    path('newsletter-subscribers/export/', csrf_exempt(views.export_data), {'resource': 'newsletter-subscribers'},
+         name='export_newsletter_subscribers'),
     path('', include(router.urls)),
     path('login/', csrf_exempt(views.admin_login), name='admin_login'),
     path('dashboard/', csrf_exempt(views.dashboard_stats), name='dashboard_stats'),
+    path('dashboard/sales/', csrf_exempt(views.sales_stats), name='sales_stats'),
+    path('database/connections/', views.database_connection_stats, name='database_connection_stats'),
     path('admins/me/', csrf_exempt(views.current_admin), name='current_admin'),
     path('products/<int:product_id>/promotions/', csrf_exempt(views.product_promotions), name='product_promotions'),
     path('products/<int:product_id>/price/', csrf_exempt(views.product_price), name='product_price'),
@@ -81,6 +93,7 @@ urlpatterns = [
     # API endpoints cho đánh giá sản phẩm
     path('reviews/add/', csrf_exempt(views.add_review), name='add-review'),
     path('reviews/product/<int:product_id>/', csrf_exempt(views.get_product_reviews), name='get-product-reviews'),
+    path('reviews/summary/', csrf_exempt(views.review_summaries), name='review-summaries'),
     
     # Thêm URL path cho client APIs
     path('client/terms-conditions/', csrf_exempt(client_terms_conditions), name='client_terms_conditions'),
@@ -93,11 +106,30 @@ urlpatterns = [
     # User session management
     path('user-session/update/', views.update_user_activity, name='update_user_activity'),
     path('user-session/check/', views.check_user_session, name='check_user_session'),
+    # Heartbeat gộp nhiều phiên (thường được SessionHeartbeatMiddleware trả lời trước khi tới đây)
+    path('session-heartbeat/', heartbeat.session_heartbeat, name='session_heartbeat'),
     path('user-activity/track/', csrf_exempt(views.track_user_activity), name='track_user_activity'),
+    path('user-activity/track/batch/', csrf_exempt(views.track_user_activity_batch), name='track_user_activity_batch'),
+    path('user-activity/track/stats/', csrf_exempt(views.activity_tracking_stats), name='activity_tracking_stats'),
+    path('user-activity/top-products/', csrf_exempt(views.activity_top_products), name='activity_top_products'),
+    path('user-activity/top-searches/', csrf_exempt(views.activity_top_searches), name='activity_top_searches'),
     
     # API endpoint mới cho trang tuyển dụng của client
     path('client/careers/', csrf_exempt(views.careers_client), name='careers_client'),
     path('client/careers/apply/', csrf_exempt(views.career_apply), name='career_apply'),
     path('client/careers/<int:job_id>/applications/', csrf_exempt(views.get_career_applications), name='get_career_applications'),
     path('newsletter/subscribe/', views.subscribe_newsletter, name='subscribe_newsletter'),
-] 
\ No newline at end of file
+]
+
+# Chế độ ASGI (settings.ASYNC_VIEWS): các API đọc public của cửa hàng dùng view async,
+# đặt trước các route sync cùng đường dẫn
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('frontend/promotions/', async_views.promotions_frontend, name='promotions_frontend'),
+        path('client/promotions/', async_views.promotions_client, name='promotions_client'),
+        path('frontend/blogs/', async_views.blogs_frontend, name='blogs_frontend'),
+        path('frontend/faqs/', async_views.faqs_frontend, name='faqs_frontend'),
+        path('reviews/product/<int:product_id>/', async_views.get_product_reviews, name='get-product-reviews'),
+        path('products/', async_views.product_list, name='products-list'),
+        path('products/<int:pk>/', async_views.product_detail, name='products-detail'),
+    ] + urlpatterns
@@ -1,11 +1,14 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate, login
-from django.db.models import Sum, Count, F, Case, When
-from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models import Sum, Count, F
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 from .models import (
@@ -24,60 +27,48 @@ from .serializers import (
     FaqSerializer, TermsAndConditionsSerializer, PrivacyPolicySerializer, SocialMediaUrlsSerializer,
     CareerApplicationsSerializer, NewsletterSubscriberSerializer
 )
-from .permissions import IsAdminOrSelf
+from .permissions import IsAdminOrSelf, IsAdminUser
+from .cache import cache_response, cached_view_response, invalidate_cache_tags, promotion_boundary_ttl
+from .auth_context import invalidate_principal
+from .checkout import CheckoutError, checkout_cart, new_transaction_id
+from .conditional import ConditionalGetMixin, conditional_view
+from .exports import CONTENT_TYPES, EXPORT_FORMATS, export_stream, parse_date_range
+from .idempotency import idempotent
+from .inventory import INVENTORY_FORMATS, import_stock, read_rows
+from .images import primary_image_url, refresh_primary_image
+from .pagination import KeysetPagination, RequiredKeysetPagination, paginate_list
+from .pricing import PriceBook, promotion_targets, refresh_effective_prices
+from .reservations import (
+    AVAILABILITY_MAX_PRODUCTS, ReservationError, available_quantities, release_cart_items, reserve,
+)
+from .reviews import (
+    SUMMARY_MAX_PRODUCTS, SUMMARY_MAX_RECENT, rating_summaries, recent_reviews, record_review, refresh_rating_summaries,
+)
+from .stats import (
+    order_snapshot, order_status_counts, record_order_change, record_products_deleted,
+    record_user_change, sales_series, sales_totals
+)
+from .search import invalidate_suggestions, search_products, suggest, update_search_vectors
 import jwt as pyjwt
 import datetime
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.contrib.auth.hashers import make_password, check_password
 from decimal import Decimal
 import json
+import logging
 import time
-import redis
 
-# Define Redis connection for session storage
-# Will be initialized by getattr and fallback to None if Redis is not available
-redis_client = getattr(settings, 'REDIS_CLIENT', None)
-if not redis_client:
-    try:
-        redis_client = redis.Redis(host='localhost', port=6379, db=0)
-        # Test connection
-        redis_client.ping()
-    except:
-        # If Redis is not available, we'll use in-memory storage
-        redis_client = None
-        print("Warning: Redis not available, using in-memory session storage (not suitable for production)")
-
-# In-memory session storage as fallback
-session_store = {}
-
-# Session timeout in seconds (5 minutes)
-SESSION_TIMEOUT = 5 * 60
-
-# Function to store session data
-def set_session_data(key, value):
-    if redis_client:
-        redis_client.set(key, json.dumps(value))
-        redis_client.expire(key, SESSION_TIMEOUT)
-    else:
-        session_store[key] = value
-
-# Function to get session data
-def get_session_data(key):
-    if redis_client:
-        data = redis_client.get(key)
-        return json.loads(data) if data else None
-    else:
-        return session_store.get(key)
+from .activity import (
+    ACTIVITY_MAX_BATCH_EVENTS, TextJSONParser, activity_writer, build_activity, top_search_terms,
+    top_viewed_products,
+)
+from .db_backend.base import connection_stats
+from .session_store import SESSION_TIMEOUT, delete_session, touch_session
 
-# Function to delete session data
-def delete_session_data(key):
-    if redis_client:
-        redis_client.delete(key)
-    elif key in session_store:
-        del session_store[key]
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -92,21 +83,14 @@ def update_admin_activity(request):
     current_time = int(time.time())
     session_key = f"admin_session_{admin.admin_id}"
     
-    # Get the current session data
-    session_data = get_session_data(session_key)
+    # Save the current timestamp and get the previous one in one store operation
+    last_active = touch_session(session_key, current_time)
     
     # Check if session has already timed out
-    if session_data:
-        last_active = session_data.get('last_active', 0)
-        time_since_last_activity = current_time - last_active
-        
-        if time_since_last_activity > SESSION_TIMEOUT:
-            # Session has already expired
-            delete_session_data(session_key)
-            return Response({'status': 'timeout', 'message': 'Session has timed out'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    # Save the current timestamp
-    set_session_data(session_key, {'last_active': current_time})
+    if last_active is not None and current_time - last_active > SESSION_TIMEOUT:
+        # Session has already expired
+        delete_session(session_key)
+        return Response({'status': 'timeout', 'message': 'Session has timed out'}, status=status.HTTP_401_UNAUTHORIZED)
     
     return Response({'status': 'ok', 'last_active': current_time})
 
@@ -123,20 +107,18 @@ def check_user_session(request):
     current_time = int(time.time())
     session_key = f"user_session_{user.user_id}"
     
-    # Get the last activity timestamp
-    session_data = get_session_data(session_key)
+    # Update the last activity timestamp and get the previous one in one store operation
+    last_active = touch_session(session_key, current_time)
     
-    if not session_data:
-        # First time checking, initialize the session
-        set_session_data(session_key, {'last_active': current_time})
+    if last_active is None:
+        # First time checking, the session is now initialized
         return Response({'status': 'active', 'last_active': current_time})
     
-    last_active = session_data.get('last_active', 0)
     time_since_last_activity = current_time - last_active
     
     # Check if session has timed out
     if time_since_last_activity > SESSION_TIMEOUT:
-        delete_session_data(session_key)
+        delete_session(session_key)
         return Response({
             'status': 'timeout', 
             'message': 'Session has timed out',
@@ -144,9 +126,6 @@ def check_user_session(request):
             'timeout_limit': SESSION_TIMEOUT
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Update the last activity timestamp
-    set_session_data(session_key, {'last_active': current_time})
-    
     return Response({
         'status': 'active', 
         'last_active': current_time,
@@ -168,20 +147,18 @@ def check_session_status(request):
     current_time = int(time.time())
     session_key = f"admin_session_{admin.admin_id}"
     
-    # Get the last activity timestamp
-    session_data = get_session_data(session_key)
+    # Update the last activity timestamp and get the previous one in one store operation
+    last_active = touch_session(session_key, current_time)
     
-    if not session_data:
-        # First time checking, initialize the session
-        set_session_data(session_key, {'last_active': current_time})
+    if last_active is None:
+        # First time checking, the session is now initialized
         return Response({'status': 'active', 'last_active': current_time})
     
-    last_active = session_data.get('last_active', 0)
     time_since_last_activity = current_time - last_active
     
     # Check if session has timed out
     if time_since_last_activity > SESSION_TIMEOUT:
-        delete_session_data(session_key)
+        delete_session(session_key)
         return Response({
             'status': 'timeout', 
             'message': 'Session has timed out',
@@ -189,9 +166,6 @@ def check_session_status(request):
             'timeout_limit': SESSION_TIMEOUT
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Update the last activity timestamp
-    set_session_data(session_key, {'last_active': current_time})
-    
     return Response({
         'status': 'active', 
         'last_active': current_time,
@@ -347,6 +321,8 @@ class AdminViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(instance, data=data, partial=partial)
             serializer.is_valid(raise_exception=True)
             admin = serializer.save()
+            # Thông tin xác thực đã cache (vai trò, trạng thái is_active...) phải đọc lại
+            invalidate_principal('admin', admin.admin_id)
             
             # Ghi log
             AuditLog.objects.create(
@@ -366,6 +342,7 @@ class AdminViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         instance_id = instance.admin_id
         self.perform_destroy(instance)
+        invalidate_principal('admin', instance_id)
         
         # Ghi log
         AuditLog.objects.create(
@@ -434,63 +411,65 @@ class PermissionsViewSet(viewsets.ModelViewSet):
 # AuditLogViewSet
 @method_decorator(csrf_exempt, name='dispatch')
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all().order_by('-created_at')
+    """
+    Nhật ký thao tác của admin, luôn phân trang keyset theo (created_at, log_id).
+    Lọc theo table_name, record_id, admin (dùng chỉ mục (table_name, record_id)).
+    """
+    queryset = AuditLog.objects.select_related('admin').order_by('-created_at', '-log_id')
     serializer_class = AuditLogSerializer
     permission_classes = [AllowAny]
+    pagination_class = RequiredKeysetPagination
+    pagination_ordering = ('-created_at', '-log_id')
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('table_name'):
+            queryset = queryset.filter(table_name=params['table_name'])
+        if params.get('record_id', '').isdigit():
+            queryset = queryset.filter(record_id=int(params['record_id']))
+        if params.get('admin', '').isdigit():
+            queryset = queryset.filter(admin_id=int(params['admin']))
+        return queryset
 
 # Dashboard view
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def dashboard_stats(request):
     try:
-        # Số lượng người dùng
-        total_users_count = Users.objects.count()
+        today = timezone.localdate()
         
-        # Số lượng người dùng mới trong 30 ngày qua
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        new_users_count = Users.objects.filter(created_at__gte=thirty_days_ago).count()
+        # Tổng số đơn hàng, doanh thu và số người dùng mới trong 30 ngày qua,
+        # đọc từ bảng số liệu theo ngày (một truy vấn, không quét bảng Orders)
+        totals = sales_totals(recent_since=today - timedelta(days=30))
+        
+        # Tổng số người dùng
+        total_users = Users.objects.count()
         
         # Tổng số sản phẩm
         total_products = Products.objects.count()
         
-        # Tổng số đơn hàng và doanh thu
-        total_orders = Orders.objects.count()
-        # Chuyển về 0 nếu không có doanh thu
-        revenue_data = Orders.objects.filter(order_status='Completed').aggregate(revenue=Sum('total_amount'))
-        total_revenue = revenue_data['revenue'] if revenue_data['revenue'] else 0
-        
         # Sản phẩm bán chạy nhất
-        top_products = Products.objects.order_by('-sold_quantity')[:5]
+        top_products = Products.objects.select_related('category', 'detail', 'effective_price').prefetch_related('images').order_by('-sold_quantity')[:5]
         top_products_data = ProductsSerializer(top_products, many=True).data
         
-        # Đơn hàng theo trạng thái
-        order_status_counts = Orders.objects.values('order_status').annotate(count=Count('order_id'))
-        
-        # Doanh thu theo tháng trong năm hiện tại
-        current_year = timezone.now().year
-        monthly_revenue = []
-        
-        # Dữ liệu theo từng tháng trong năm
-        for month in range(1, 13):
-            month_revenue = Orders.objects.filter(
-                created_at__year=current_year,
-                created_at__month=month,
-                order_status='Completed'
-            ).aggregate(revenue=Sum('total_amount'))
-            
-            monthly_revenue.append({
-                'month': f'{month}/{current_year}',
-                'revenue': month_revenue['revenue'] if month_revenue['revenue'] else 0
-            })
+        # Doanh thu theo tháng trong năm hiện tại (một truy vấn GROUP BY tháng)
+        monthly_revenue = [
+            {
+                'month': f'{point["period"].month}/{point["period"].year}',
+                'revenue': point['revenue']
+            }
+            for point in sales_series(today.replace(month=1, day=1), today.replace(month=12, day=31), 'month')
+        ]
         
         return Response({
-            'total_users': total_users_count,
-            'new_users_count': new_users_count,
+            'total_users': total_users,
+            'new_users_count': totals['recent_new_users'],
             'total_products': total_products,
-            'total_orders': total_orders,
-            'total_revenue': total_revenue,
+            'total_orders': totals['orders_count'],
+            'total_revenue': totals['revenue'],
             'top_products': top_products_data,
-            'order_status_counts': order_status_counts,
+            'order_status_counts': order_status_counts(totals),
             'monthly_revenue': monthly_revenue
         })
     except Exception as e:
@@ -500,6 +479,48 @@ def dashboard_stats(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+# Thống kê bán hàng theo khoảng thời gian
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def sales_stats(request):
+    """
+    API endpoint thống kê bán hàng theo khoảng ngày, đọc từ bảng số liệu theo ngày.
+    
+    Tham số:
+        start        ngày bắt đầu YYYY-MM-DD (mặc định: 30 ngày trước)
+        end          ngày kết thúc YYYY-MM-DD (mặc định: hôm nay)
+        granularity  day, week hoặc month (mặc định: day)
+    """
+    try:
+        today = timezone.localdate()
+        try:
+            end = datetime.date.fromisoformat(request.query_params['end']) if request.query_params.get('end') else today
+            start = datetime.date.fromisoformat(request.query_params['start']) if request.query_params.get('start') else end - timedelta(days=30)
+        except ValueError:
+            return Response({'error': 'start/end phải có dạng YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        granularity = request.query_params.get('granularity', 'day')
+        
+        try:
+            series = sales_series(start, end, granularity)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        totals = sales_totals(start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'granularity': granularity,
+            'totals': totals,
+            'order_status_counts': order_status_counts(totals),
+            'series': series
+        })
+    except Exception as e:
+        print(f"Lỗi khi lấy thống kê bán hàng: {str(e)}")
+        return Response(
+            {'error': f'Không thể lấy thống kê bán hàng: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 # UsersViewSet
 @method_decorator(csrf_exempt, name='dispatch')
 class UsersViewSet(viewsets.ModelViewSet):
@@ -516,6 +537,7 @@ class UsersViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        record_user_change(user)
         
         # Ghi log
         AuditLog.objects.create(
@@ -546,6 +568,7 @@ class UsersViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(instance, data=data, partial=partial)
             serializer.is_valid(raise_exception=True)
             user = serializer.save()
+            invalidate_principal('user', user.user_id)
             
             # Ghi log
             AuditLog.objects.create(
@@ -564,7 +587,22 @@ class UsersViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance_id = instance.user_id
-        self.perform_destroy(instance)
+        
+        # Đơn hàng của người dùng bị xóa theo, trừ khỏi số liệu thống kê
+        order_snapshots = [order_snapshot(order) for order in Orders.objects.filter(user=instance)]
+        # Đánh giá của người dùng cũng bị xóa theo, tính lại bản tổng hợp của các sản phẩm đó
+        reviewed_product_ids = list(
+            Reviews.objects.filter(user=instance).values_list('product_id', flat=True).distinct()
+        )
+        with transaction.atomic():
+            self.perform_destroy(instance)
+            for snapshot in order_snapshots:
+                record_order_change(snapshot, None)
+            record_user_change(instance, -1)
+            refresh_rating_summaries(reviewed_product_ids)
+        invalidate_principal('user', instance_id)
+        if reviewed_product_ids:
+            invalidate_cache_tags('reviews')
         
         # Ghi log
         AuditLog.objects.create(
@@ -578,10 +616,11 @@ class UsersViewSet(viewsets.ModelViewSet):
 
 # CategoriesViewSet
 @method_decorator(csrf_exempt, name='dispatch')
-class CategoriesViewSet(viewsets.ModelViewSet):
+class CategoriesViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Categories.objects.all()
     serializer_class = CategoriesSerializer
     permission_classes = [AllowAny]
+    conditional_collections = ('categories',)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -597,6 +636,14 @@ class CategoriesViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(category)
+        
+        # Tên danh mục có thể đã thay đổi, xóa cache gợi ý tìm kiếm
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('categories')
         
         # Ghi log
         AuditLog.objects.create(
@@ -626,6 +673,14 @@ class CategoriesViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(category)
+        
+        # Tên danh mục có thể đã thay đổi, xóa cache gợi ý tìm kiếm
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('categories')
         
         # Ghi log
         AuditLog.objects.create(
@@ -640,8 +695,16 @@ class CategoriesViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance_id = instance.category_id
+        # Sản phẩm của danh mục và chi tiết đơn hàng bị xóa theo, trừ khỏi số liệu thống kê
+        record_products_deleted(Products.objects.filter(category=instance).values('product_id'))
         self.perform_destroy(instance)
         
+        # Tên danh mục có thể đã thay đổi, xóa cache gợi ý tìm kiếm
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan (sản phẩm của danh mục bị xóa theo)
+        invalidate_cache_tags('categories', 'products')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -652,123 +715,40 @@ class CategoriesViewSet(viewsets.ModelViewSet):
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+def product_list_queryset():
+    """Sản phẩm kèm danh mục, chi tiết, giá hiệu lực và hình ảnh (dùng chung với core.async_views)"""
+    return Products.objects.select_related('category', 'detail', 'effective_price').prefetch_related('images').order_by('product_id')
+
 # ProductsViewSet
 @method_decorator(csrf_exempt, name='dispatch')
-class ProductsViewSet(viewsets.ModelViewSet):
+class ProductsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Products.objects.all().order_by('product_id')
     serializer_class = ProductsSerializer
     permission_classes = [AllowAny]
+    # Giá sau khuyến mãi và tên danh mục nằm trong response sản phẩm
+    conditional_collections = ('products', 'categories', 'promotions')
     
     def get_queryset(self):
-        queryset = Products.objects.all().order_by('product_id')
+        queryset = product_list_queryset()
         
         # Lấy tham số tìm kiếm từ URL nếu có
         search_query = self.request.query_params.get('search', None)
         category_id = self.request.query_params.get('category', None) or self.request.query_params.get('category_id', None)
         
-        # Ghi log debug
-        print(f"[ProductsViewSet] Nhận được request tìm kiếm sản phẩm với tham số: search={search_query}, category={category_id}")
+        logger.debug("[ProductsViewSet] search=%s, category=%s", search_query, category_id)
         
         # Lọc theo danh mục nếu có
         if category_id:
             try:
                 category_id = int(category_id)
                 queryset = queryset.filter(category_id=category_id)
-                print(f"[ProductsViewSet] Lọc theo danh mục {category_id}: {queryset.count()} sản phẩm")
             except (ValueError, TypeError):
-                print(f"[ProductsViewSet] category_id không hợp lệ: {category_id}")
+                logger.debug("[ProductsViewSet] category_id không hợp lệ: %s", category_id)
         
         # Xử lý tìm kiếm nếu có
         if search_query:
-            print(f"[ProductsViewSet] Xử lý tìm kiếm với từ khóa: '{search_query}'")
-            
-            # Sử dụng prefetch_related để lấy thông tin sản phẩm và chi tiết trong một truy vấn
-            queryset = queryset.prefetch_related('product_details')
-            
-            # Phân tách từ khóa tìm kiếm thành các từ riêng biệt
-            search_terms = search_query.lower().split()
-            print(f"[ProductsViewSet] Các từ khóa tìm kiếm: {search_terms}")
-            
-            # Điểm số tương đồng cho mỗi sản phẩm
-            product_scores = {}
-            
-            # Duyệt qua từng sản phẩm để tìm kiếm
-            for product in queryset:
-                # Bỏ qua nếu sản phẩm không có tên
-                if not product.name:
-                    continue
-                
-                # Tổng điểm cho sản phẩm này
-                score = 0
-                
-                # Tách tên sản phẩm thành các từ riêng biệt
-                product_name = product.name.lower()
-                product_name_terms = product_name.split()
-                
-                # Tìm kiếm trong mô tả sản phẩm nếu có
-                product_description = (product.description or "").lower()
-                
-                # Thêm tìm kiếm trong thông số kỹ thuật nếu có
-                product_specs = ""
-                try:
-                    # Lấy thông số kỹ thuật từ product_details
-                    product_details = product.product_details.first()
-                    if product_details and product_details.specification:
-                        product_specs = product_details.specification.lower()
-                except:
-                    pass
-                
-                # Kiểm tra tương đồng với toàn bộ cụm từ tìm kiếm
-                if search_query.lower() in product_name:
-                    score += 10  # Ưu tiên cao nhất nếu tên chứa chính xác cụm từ tìm kiếm
-                
-                # Kiểm tra từng từ trong từ khóa tìm kiếm
-                for search_term in search_terms:
-                    # Kiểm tra xem từ khóa có xuất hiện trong tên sản phẩm không
-                    if search_term in product_name:
-                        score += 5  # Cộng điểm nếu từ khóa xuất hiện trong tên
-                    
-                    # Kiểm tra từng từ trong tên sản phẩm
-                    for product_term in product_name_terms:
-                        # Nếu từ khóa tìm kiếm nằm trong từ của sản phẩm hoặc ngược lại
-                        if search_term in product_term or product_term in search_term:
-                            score += 3
-                        # Nếu từ khóa và từ sản phẩm khớp hoàn toàn
-                        elif search_term == product_term:
-                            score += 4
-                    
-                    # Kiểm tra trong mô tả
-                    if product_description and search_term in product_description:
-                        score += 2
-                    
-                    # Kiểm tra trong thông số kỹ thuật
-                    if product_specs and search_term in product_specs:
-                        score += 1
-                
-                # Lưu điểm nếu sản phẩm có điểm tương đồng > 0
-                if score > 0:
-                    product_scores[product.product_id] = score
-            
-            # Nếu có sản phẩm tương đồng, lọc và sắp xếp theo điểm số
-            if product_scores:
-                # Tạo mảng ID sản phẩm đã sắp xếp theo điểm số giảm dần
-                sorted_ids = sorted(product_scores.keys(), key=lambda x: product_scores.get(x, 0), reverse=True)
-                
-                # Log các kết quả tìm kiếm hàng đầu để debug
-                top_products = sorted_ids[:5] if len(sorted_ids) > 5 else sorted_ids
-                print(f"[ProductsViewSet] Top kết quả tìm kiếm:")
-                for product_id in top_products:
-                    product_name = next((p.name for p in queryset if p.product_id == product_id), "Unknown")
-                    print(f"  - ID: {product_id}, Tên: {product_name}, Điểm: {product_scores[product_id]}")
-                
-                # Tạo danh sách các sản phẩm theo thứ tự đã sắp xếp
-                preserved = Case(*[When(product_id=id, then=pos) for pos, id in enumerate(sorted_ids)])
-                queryset = queryset.filter(product_id__in=sorted_ids).order_by(preserved)
-                print(f"[ProductsViewSet] Tổng số kết quả tìm kiếm: {queryset.count()} sản phẩm")
-            else:
-                # Nếu không có kết quả tương đồng, trả về queryset rỗng
-                queryset = Products.objects.none()
-                print("[ProductsViewSet] Không tìm thấy sản phẩm phù hợp với từ khóa tìm kiếm")
+            # Lọc và xếp hạng theo độ liên quan (chỉ mục toàn văn trên PostgreSQL)
+            queryset = search_products(queryset, search_query)
         
         return queryset
     
@@ -803,6 +783,16 @@ class ProductsViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(product)
+        
+        # Tính giá hiệu lực và chỉ mục tìm kiếm cho sản phẩm mới
+        refresh_effective_prices(product_ids=[product.product_id])
+        update_search_vectors([product.product_id])
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('products')
         
         # Ghi log
         AuditLog.objects.create(
@@ -842,6 +832,17 @@ class ProductsViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(product)
+        
+        # Giá hoặc danh mục có thể đã thay đổi, tính lại giá hiệu lực
+        refresh_effective_prices(product_ids=[product.product_id])
+        # Tên, mô tả hoặc thông số có thể đã thay đổi, cập nhật chỉ mục tìm kiếm
+        update_search_vectors([product.product_id])
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('products')
         
         # Ghi log
         AuditLog.objects.create(
@@ -856,7 +857,13 @@ class ProductsViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance_id = instance.product_id
+        # Chi tiết đơn hàng của sản phẩm bị xóa theo, trừ khỏi số liệu thống kê
+        record_products_deleted([instance_id])
         self.perform_destroy(instance)
+        invalidate_suggestions()
+        
+        # Xóa cache các trang public liên quan (đánh giá của sản phẩm bị xóa theo)
+        invalidate_cache_tags('products', 'reviews')
         
         # Ghi log
         AuditLog.objects.create(
@@ -870,10 +877,11 @@ class ProductsViewSet(viewsets.ModelViewSet):
 
 # PromotionsViewSet
 @method_decorator(csrf_exempt, name='dispatch')
-class PromotionsViewSet(viewsets.ModelViewSet):
+class PromotionsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Promotions.objects.all()
     serializer_class = PromotionsSerializer
     permission_classes = [AllowAny]
+    conditional_collections = ('promotions',)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -906,6 +914,12 @@ class PromotionsViewSet(viewsets.ModelViewSet):
                 except Categories.DoesNotExist:
                     pass
         
+        # Cập nhật giá hiệu lực cho các sản phẩm được áp dụng
+        refresh_effective_prices(*promotion_targets(promotion))
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('promotions')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -923,6 +937,9 @@ class PromotionsViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         promotion = serializer.save()
         
+        # Ghi nhận các sản phẩm/danh mục đang được áp dụng trước khi thay đổi
+        old_product_ids, old_category_ids = promotion_targets(promotion)
+        
         # Xóa tất cả các liên kết khuyến mãi cũ
         ProductPromotions.objects.filter(promotion=promotion).delete()
         
@@ -952,6 +969,13 @@ class PromotionsViewSet(viewsets.ModelViewSet):
                 except Categories.DoesNotExist:
                     pass
         
+        # Cập nhật giá hiệu lực cho cả sản phẩm cũ và mới
+        new_product_ids, new_category_ids = promotion_targets(promotion)
+        refresh_effective_prices(old_product_ids | new_product_ids, old_category_ids | new_category_ids)
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('promotions')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -965,8 +989,15 @@ class PromotionsViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance_id = instance.promotion_id
+        product_ids, category_ids = promotion_targets(instance)
         self.perform_destroy(instance)
         
+        # Bỏ khuyến mãi đã xóa khỏi giá hiệu lực
+        refresh_effective_prices(product_ids, category_ids)
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('promotions')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -977,6 +1008,46 @@ class PromotionsViewSet(viewsets.ModelViewSet):
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+def _product_pk(value):
+    """Mã sản phẩm dạng số nguyên, None nếu không phải số"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def fill_missing_detail_prices(details):
+    """
+    Điền giá khuyến mãi cho các chi tiết đơn hàng chưa có giá (tính theo lô)
+    """
+    # Nếu không có giá hoặc giá là 0, sử dụng giá khuyến mãi
+    missing = [detail for detail in details if 'price' not in detail or not detail['price']]
+    if not missing:
+        return
+    
+    # product có thể là chuỗi ("5") khi lấy từ dữ liệu request; in_bulk trả về dict theo khóa số nguyên
+    product_ids = [_product_pk(detail.get('product')) for detail in missing]
+    products = Products.objects.select_related('effective_price').in_bulk(
+        [product_id for product_id in product_ids if product_id is not None]
+    )
+    price_book = PriceBook().ensure(products.values())
+    for detail, product_id in zip(missing, product_ids):
+        product = products.get(product_id)
+        if product:
+            # Sử dụng str() thay vì float() để giữ nguyên độ chính xác
+            detail['price'] = str(price_book.discounted_price(product))
+
+def with_order_details(queryset):
+    """
+    Nạp sẵn người dùng, thanh toán, chi tiết và sản phẩm của đơn hàng
+    để serialize danh sách đơn hàng với số truy vấn cố định
+    """
+    return queryset.select_related('user', 'payments').prefetch_related(
+        Prefetch(
+            'details',
+            queryset=OrderDetails.objects.select_related('product', 'product__effective_price').order_by('order_detail_id')
+        ),
+    )
+
 # OrdersViewSet
 @method_decorator(csrf_exempt, name='dispatch')
 class OrdersViewSet(viewsets.ModelViewSet):
@@ -984,23 +1055,22 @@ class OrdersViewSet(viewsets.ModelViewSet):
     serializer_class = OrdersSerializer
     permission_classes = [AllowAny]
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve']:
+            queryset = with_order_details(queryset)
+        return queryset
+    
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return OrderCreateSerializer
         return OrdersSerializer
     
+    @method_decorator(idempotent('orders'))
     def create(self, request, *args, **kwargs):
         # Nếu có chi tiết đơn hàng, hãy áp dụng giá khuyến mãi nếu không chỉ định giá rõ ràng
         if 'details' in request.data and isinstance(request.data['details'], list):
-            for detail in request.data['details']:
-                # Nếu không có giá hoặc giá là 0, sử dụng giá khuyến mãi
-                if 'price' not in detail or not detail['price']:
-                    try:
-                        product = Products.objects.get(pk=detail['product'])
-                        # Sử dụng str() thay vì float() để giữ nguyên độ chính xác
-                        detail['price'] = str(product.get_discounted_price())
-                    except Products.DoesNotExist:
-                        pass
+            fill_missing_detail_prices(request.data['details'])
         
         # Lưu thông tin thanh toán nếu có                
         payment_data = None
@@ -1010,11 +1080,12 @@ class OrdersViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
+        record_order_change(None, order_snapshot(order))
         
         # Tạo bản ghi thanh toán
         if payment_data:
             # Tạo mã giao dịch ngẫu nhiên
-            transaction_id = f"TXN{int(timezone.now().timestamp())}"
+            transaction_id = new_transaction_id()
             
             Payments.objects.create(
                 order=order,
@@ -1036,15 +1107,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         # Nếu có chi tiết đơn hàng, hãy áp dụng giá khuyến mãi nếu không chỉ định giá rõ ràng
         if 'details' in request.data and isinstance(request.data['details'], list):
-            for detail in request.data['details']:
-                # Nếu không có giá hoặc giá là 0, sử dụng giá khuyến mãi
-                if 'price' not in detail or not detail['price']:
-                    try:
-                        product = Products.objects.get(pk=detail['product'])
-                        # Sử dụng str() thay vì float() để giữ nguyên độ chính xác
-                        detail['price'] = str(product.get_discounted_price())
-                    except Products.DoesNotExist:
-                        pass
+            fill_missing_detail_prices(request.data['details'])
         
         # Lưu thông tin thanh toán nếu có                
         payment_data = None
@@ -1056,10 +1119,12 @@ class OrdersViewSet(viewsets.ModelViewSet):
         
         # Lưu trạng thái trước khi cập nhật để kiểm tra nếu đổi trạng thái
         previous_status = instance.order_status
+        previous_snapshot = order_snapshot(instance)
         
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
+        record_order_change(previous_snapshot, order_snapshot(order))
         
         # Cập nhật hoặc tạo thông tin thanh toán
         if payment_data:
@@ -1068,7 +1133,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
                 defaults={
                     'payment_method': payment_data.get('payment_method', 'Cash on Delivery'),
                     'payment_status': payment_data.get('payment_status', 'Pending'),
-                    'transaction_id': f"TXN{int(timezone.now().timestamp())}"
+                    'transaction_id': new_transaction_id()
                 }
             )
             
@@ -1098,6 +1163,7 @@ class OrdersViewSet(viewsets.ModelViewSet):
                         product.sold_quantity += quantity
                     
                     product.save()
+                    invalidate_cache_tags('products')
                     
                     # Ghi log
                     AuditLog.objects.create(
@@ -1123,7 +1189,9 @@ class OrdersViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance_id = instance.order_id
+        snapshot = order_snapshot(instance)
         self.perform_destroy(instance)
+        record_order_change(snapshot, None)
         
         # Ghi log
         AuditLog.objects.create(
@@ -1137,10 +1205,11 @@ class OrdersViewSet(viewsets.ModelViewSet):
 
 # BlogViewSet
 @method_decorator(csrf_exempt, name='dispatch')
-class BlogViewSet(viewsets.ModelViewSet):
+class BlogViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Blog.objects.all().order_by('-blog_id')
     serializer_class = BlogSerializer
     permission_classes = [AllowAny]
+    conditional_collections = ('blogs',)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1156,6 +1225,11 @@ class BlogViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(blog)
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('blogs')
         
         # Ghi log
         AuditLog.objects.create(
@@ -1185,6 +1259,11 @@ class BlogViewSet(viewsets.ModelViewSet):
                     image_url=image_data['image_url'],
                     is_primary=is_primary
                 )
+            # Cập nhật hình ảnh đại diện
+            refresh_primary_image(blog)
+        
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('blogs')
         
         # Ghi log
         AuditLog.objects.create(
@@ -1201,6 +1280,9 @@ class BlogViewSet(viewsets.ModelViewSet):
         instance_id = instance.blog_id
         self.perform_destroy(instance)
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('blogs')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1223,6 +1305,9 @@ class FaqViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         faq = serializer.save()
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('faqs')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1240,6 +1325,9 @@ class FaqViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         faq = serializer.save()
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('faqs')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1255,6 +1343,9 @@ class FaqViewSet(viewsets.ModelViewSet):
         instance_id = instance.faq_id
         self.perform_destroy(instance)
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('faqs')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1299,6 +1390,9 @@ class CareersViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         career = serializer.save()
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('careers')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1316,6 +1410,9 @@ class CareersViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         career = serializer.save()
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('careers')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1331,6 +1428,9 @@ class CareersViewSet(viewsets.ModelViewSet):
         instance_id = instance.job_id
         self.perform_destroy(instance)
         
+        # Xóa cache các trang public liên quan
+        invalidate_cache_tags('careers')
+        
         # Ghi log
         AuditLog.objects.create(
             admin_id=request.user.admin_id,
@@ -1347,6 +1447,19 @@ class TermsAndConditionsViewSet(viewsets.ModelViewSet):
     queryset = TermsAndConditions.objects.all()
     serializer_class = TermsAndConditionsSerializer
     permission_classes = [AllowAny]
+    
+    # Xóa cache trang điều khoản phía client sau mỗi thay đổi
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_cache_tags('terms')
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_cache_tags('terms')
+    
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_cache_tags('terms')
 
 # PrivacyPolicyViewSet
 @method_decorator(csrf_exempt, name='dispatch')
@@ -1395,14 +1508,29 @@ def category_promotions(request, category_id):
     except Categories.DoesNotExist:
         return Response({"error": "Danh mục không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
 
+# Endpoint gợi ý tên sản phẩm/danh mục khi người dùng đang gõ (chấp nhận lỗi chính tả)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def product_suggestions(request):
+    query = request.query_params.get('q', '')
+    try:
+        limit = int(request.query_params.get('limit', 8))
+    except (TypeError, ValueError):
+        return Response({"error": "limit phải là số nguyên"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'query': query,
+        'suggestions': suggest(query, limit=limit)
+    })
+
 # Endpoint để lấy giá sau khuyến mãi của sản phẩm
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def product_price(request, product_id):
     try:
-        product = Products.objects.get(product_id=product_id)
+        product = Products.objects.select_related('effective_price').get(product_id=product_id)
         regular_price = product.price
-        discounted_price = product.get_discounted_price()
+        discounted_price = PriceBook().discounted_price(product)
         
         # Kiểm tra nếu có giảm giá
         has_discount = regular_price != discounted_price
@@ -1537,6 +1665,7 @@ def user_register(request):
             phone=data.get('phone', ''),
             address=data.get('address', '')
         )
+        record_user_change(user)
         
         return Response({
             'user_id': user.user_id,
@@ -1631,6 +1760,7 @@ def update_user_profile(request):
         # Lưu thay đổi vào database
         user.save()
         print("Đã lưu thay đổi vào database")
+        invalidate_principal('user', user.user_id)
         
         # Trả về thông tin đã cập nhật
         response_data = {
@@ -1799,35 +1929,39 @@ def user_change_password(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @csrf_exempt
+@idempotent('product_inventory')
 def update_product_inventory(request, product_id):
     try:
-        product = Products.objects.get(product_id=product_id)
-        
         # Lấy số lượng từ request
         quantity = request.data.get('quantity', 0)
         quantity = int(quantity)
         
-        # Nếu quantity < 0, giảm stock_quantity và tăng sold_quantity
-        # Điều này xảy ra khi một đơn hàng được hoàn thành
-        if quantity < 0:
-            abs_quantity = abs(quantity)
+        # Khóa dòng sản phẩm để không ghi đè thay đổi tồn kho đồng thời (checkout, nhập kho hàng loạt)
+        with transaction.atomic():
+            product = Products.objects.select_for_update().get(product_id=product_id)
             
-            # Kiểm tra xem có đủ hàng trong kho không
-            if product.stock_quantity < abs_quantity:
-                return Response({
-                    "error": f"Không đủ hàng trong kho. Hiện chỉ có {product.stock_quantity} sản phẩm."
-                }, status=status.HTTP_400_BAD_REQUEST)
+            # Nếu quantity < 0, giảm stock_quantity và tăng sold_quantity
+            # Điều này xảy ra khi một đơn hàng được hoàn thành
+            if quantity < 0:
+                abs_quantity = abs(quantity)
+                
+                # Kiểm tra xem có đủ hàng trong kho không
+                if product.stock_quantity < abs_quantity:
+                    return Response({
+                        "error": f"Không đủ hàng trong kho. Hiện chỉ có {product.stock_quantity} sản phẩm."
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                # Cập nhật số lượng
+                product.stock_quantity -= abs_quantity
+                product.sold_quantity += abs_quantity
+            else:
+                # Nếu quantity > 0, tăng stock_quantity
+                # Điều này xảy ra khi nhập thêm hàng vào kho
+                product.stock_quantity += quantity
             
-            # Cập nhật số lượng
-            product.stock_quantity -= abs_quantity
-            product.sold_quantity += abs_quantity
-        else:
-            # Nếu quantity > 0, tăng stock_quantity
-            # Điều này xảy ra khi nhập thêm hàng vào kho
-            product.stock_quantity += quantity
-        
-        # Lưu thay đổi
-        product.save()
+            # Lưu thay đổi
+            product.save(update_fields=['stock_quantity', 'sold_quantity', 'updated_at'])
+            invalidate_cache_tags('products')
         
         # Ghi log
         try:
@@ -1854,9 +1988,97 @@ def update_product_inventory(request, product_id):
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Endpoint nhập kho hàng loạt (file CSV/JSON Lines hoặc danh sách JSON)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@csrf_exempt
+def bulk_update_inventory(request):
+    """
+    Cập nhật tồn kho của nhiều sản phẩm trong một request. Mỗi dòng gồm product_id và
+    delta (cộng/trừ số lượng) hoặc stock_quantity (số lượng mới). Dữ liệu gửi bằng:
+    - multipart `file`: CSV có dòng tiêu đề hoặc JSON Lines (.jsonl/.ndjson, hoặc trường format của form)
+    - JSON: {"rows": [...]} hoặc danh sách các dòng
+    
+    Tham số dry_run=true để kiểm tra mà không ghi. Trả về số dòng đã áp dụng và lỗi của từng dòng.
+    """
+    try:
+        upload = request.FILES.get('file')
+        dry_run = str(request.query_params.get('dry_run', request.data.get('dry_run', ''))).lower() in ('1', 'true', 'yes')
+        
+        if upload is not None:
+            # Tham số ?format= trên URL được DRF dùng để chọn renderer, nên đọc từ form
+            file_format = request.data.get('format')
+            if not file_format:
+                file_format = 'jsonl' if upload.name.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+            if file_format not in INVENTORY_FORMATS:
+                return Response(
+                    {"error": f"format phải là một trong: {', '.join(INVENTORY_FORMATS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = read_rows(upload, file_format)
+            source = upload.name
+        else:
+            data = request.data.get('rows') if isinstance(request.data, dict) else request.data
+            if not isinstance(data, list) or not data:
+                return Response(
+                    {"error": "Vui lòng gửi file CSV/JSON Lines hoặc danh sách rows"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = enumerate(data, start=1)
+            source = 'API'
+        
+        admin_id = getattr(request.user, 'admin_id', None)
+        result = import_stock(rows, admin_id=admin_id, source=source, dry_run=dry_run)
+        logger.info(
+            "[bulk_update_inventory] %s: %s/%s dòng, %s lỗi", source, result['applied'], result['rows'], result['failed']
+        )
+        return Response({"success": True, "dry_run": dry_run, **result}, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# Endpoint số lượng có thể bán (tồn kho trừ hàng đang giữ cho giỏ hàng) của nhiều sản phẩm
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def product_availability(request):
+    """
+    Tham số:
+        product_ids  danh sách product_id cách nhau bởi dấu phẩy
+    
+    Không cache vì số lượng thay đổi theo giỏ hàng, mỗi request chỉ một truy vấn.
+    """
+    try:
+        raw_ids = ','.join(request.query_params.getlist('product_ids'))
+        try:
+            product_ids = list(dict.fromkeys(int(value) for value in raw_ids.split(',') if value.strip()))
+        except ValueError:
+            return Response({'error': 'product_ids phải là danh sách số nguyên'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not product_ids:
+            return Response({'error': 'product_ids là bắt buộc'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(product_ids) > AVAILABILITY_MAX_PRODUCTS:
+            return Response(
+                {'error': f'Tối đa {AVAILABILITY_MAX_PRODUCTS} sản phẩm mỗi request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        available = available_quantities(product_ids)
+        return Response({
+            'results': [
+                {'product_id': product_id, 'available_quantity': available[product_id]}
+                for product_id in product_ids if product_id in available
+            ]
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Lỗi khi lấy số lượng có thể bán: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # Endpoint để lấy danh sách các khuyến mãi đang còn hiệu lực
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_view('promotions')
+@cache_response('active_promotions', tags=['promotions'], ttl_func=promotion_boundary_ttl)
 def active_promotions(request):
     try:
         from django.utils import timezone
@@ -1932,9 +2154,71 @@ def promotion_categories(request, promotion_id):
     except Promotions.DoesNotExist:
         return Response({"error": "Khuyến mãi không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
 
+def promotion_frontend_item(promo, product_promotions, category_promotions, price_book):
+    """
+    Dữ liệu một khuyến mãi cho trang Promotions (dùng chung với core.async_views).
+    Giá của các sản phẩm phải được nạp vào price_book trước (price_book.ensure).
+    """
+    products = []
+    for pp in product_promotions:
+        product = {
+            'id': pp.product.product_id,
+            'name': pp.product.name,
+            'regular_price': float(pp.product.price),
+            'discounted_price': float(price_book.discounted_price(pp.product)),
+            # Ảnh chính hoặc ảnh đầu tiên của sản phẩm
+            'image': primary_image_url(pp.product),
+        }
+        
+        products.append(product)
+    
+    categories = []
+    for cp in category_promotions:
+        category = {
+            'id': cp.category.category_id,
+            'name': cp.category.name,
+        }
+        
+        # Thêm URL ảnh danh mục nếu có
+        if cp.category.img_url:
+            category['image'] = cp.category.img_url
+        
+        categories.append(category)
+    
+    # Tạo dữ liệu khuyến mãi
+    return {
+        'id': promo.promotion_id,
+        'title': promo.title,
+        'description': promo.description,
+        'discount_percentage': promo.discount_percentage,
+        'start_date': promo.start_date,
+        'end_date': promo.end_date,
+        'img_banner': promo.img_banner,
+        'products': products,
+        'categories': categories,
+        'code': f"PROMO{promo.promotion_id:02d}",  # Tạo mã khuyến mãi giả
+    }
+
+def promotions_frontend_data(current, upcoming, expired):
+    # Chọn khuyến mãi nổi bật (featured) là khuyến mãi hiện tại đầu tiên hoặc khuyến mãi sắp tới đầu tiên
+    featured = None
+    if current:
+        featured = current[0]
+    elif upcoming:
+        featured = upcoming[0]
+    
+    return {
+        'featured': featured,
+        'current': current,
+        'upcoming': upcoming,
+        'expired': expired
+    }
+
 # Endpoint để lấy thông tin khuyến mãi chi tiết cho trang Promotions
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_view('promotions', 'products', 'categories')
+@cache_response('promotions_frontend', tags=['promotions', 'products', 'categories'], ttl_func=promotion_boundary_ttl)
 def promotions_frontend(request):
     """
     API endpoint cung cấp dữ liệu khuyến mãi cho trang Promotions trên frontend.
@@ -1959,41 +2243,19 @@ def promotions_frontend(request):
             end_date__lt=now
         ).order_by('-end_date')[:10]
         
+        # Bảng giá khuyến mãi dùng chung cho tất cả sản phẩm trong response
+        price_book = PriceBook(now=now)
+        
         # Xử lý và tạo dữ liệu response
         def process_promotions(promotions):
             result = []
             for promo in promotions:
                 # Lấy thông tin sản phẩm được áp dụng
-                product_promotions = ProductPromotions.objects.filter(
+                product_promotions = list(ProductPromotions.objects.filter(
                     promotion=promo, 
                     product__isnull=False
-                ).select_related('product')
-                
-                products = []
-                for pp in product_promotions:
-                    product = {
-                        'id': pp.product.product_id,
-                        'name': pp.product.name,
-                        'regular_price': float(pp.product.price),
-                        'discounted_price': float(pp.product.get_discounted_price()),
-                    }
-                    
-                    # Thêm ảnh sản phẩm nếu có
-                    product_image = ProductImages.objects.filter(
-                        product=pp.product, 
-                        is_primary=True
-                    ).first()
-                    
-                    if product_image:
-                        product['image'] = product_image.image_url
-                    else:
-                        # Lấy ảnh đầu tiên nếu không có ảnh chính
-                        any_image = ProductImages.objects.filter(
-                            product=pp.product
-                        ).first()
-                        product['image'] = any_image.image_url if any_image else None
-                    
-                    products.append(product)
+                ).select_related('product', 'product__effective_price'))
+                price_book.ensure(pp.product for pp in product_promotions)
                 
                 # Lấy thông tin danh mục được áp dụng
                 category_promotions = ProductPromotions.objects.filter(
@@ -2001,34 +2263,7 @@ def promotions_frontend(request):
                     category__isnull=False
                 ).select_related('category')
                 
-                categories = []
-                for cp in category_promotions:
-                    category = {
-                        'id': cp.category.category_id,
-                        'name': cp.category.name,
-                    }
-                    
-                    # Thêm URL ảnh danh mục nếu có
-                    if cp.category.img_url:
-                        category['image'] = cp.category.img_url
-                    
-                    categories.append(category)
-                
-                # Tạo dữ liệu khuyến mãi
-                promotion_data = {
-                    'id': promo.promotion_id,
-                    'title': promo.title,
-                    'description': promo.description,
-                    'discount_percentage': promo.discount_percentage,
-                    'start_date': promo.start_date,
-                    'end_date': promo.end_date,
-                    'img_banner': promo.img_banner,
-                    'products': products,
-                    'categories': categories,
-                    'code': f"PROMO{promo.promotion_id:02d}",  # Tạo mã khuyến mãi giả
-                }
-                
-                result.append(promotion_data)
+                result.append(promotion_frontend_item(promo, product_promotions, category_promotions, price_book))
             
             return result
         
@@ -2037,63 +2272,47 @@ def promotions_frontend(request):
         upcoming = process_promotions(upcoming_promotions)
         expired = process_promotions(expired_promotions)
         
-        # Chọn khuyến mãi nổi bật (featured) là khuyến mãi hiện tại đầu tiên hoặc khuyến mãi sắp tới đầu tiên
-        featured = None
-        if current:
-            featured = current[0]
-        elif upcoming:
-            featured = upcoming[0]
-        
-        response_data = {
-            'featured': featured,
-            'current': current,
-            'upcoming': upcoming,
-            'expired': expired
-        }
-        
-        return Response(response_data)
+        return Response(promotions_frontend_data(current, upcoming, expired))
     
     except Exception as e:
         print(f"Error in promotions_frontend: {str(e)}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Endpoint để lấy thông tin bài viết cho trang Blog
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def blogs_frontend(request):
-    """
-    API endpoint cung cấp dữ liệu bài viết cho trang Blog trên frontend.
-    Trả về danh sách bài viết mới nhất.
-    """
+def blogs_frontend_response(request):
+    """Nội dung của blogs_frontend (dùng chung với core.async_views), `request` là Request của DRF"""
     try:
         # Lấy các bài viết mới nhất
-        blogs = Blog.objects.all().order_by('-created_at')
+        blogs = Blog.objects.prefetch_related(
+            Prefetch('images', queryset=BlogImages.objects.order_by('image_id'))
+        ).order_by('-created_at')
         
         # Số lượng bài viết hiển thị trên mỗi trang
         page_size = int(request.query_params.get('page_size', 10))
         
-        # Trang hiện tại
-        page = int(request.query_params.get('page', 1))
-        
-        # Tính toán vị trí bắt đầu và kết thúc
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        # Phân trang thủ công
-        paginated_blogs = blogs[start:end]
+        # Phân trang keyset khi client gửi cursor (hoặc count); mặc định vẫn phân trang theo số trang
+        # như cũ (page, page_size, trả về total_pages/current_page)
+        use_cursor = 'page' not in request.query_params and any(
+            param in request.query_params
+            for param in (KeysetPagination.cursor_query_param, KeysetPagination.count_query_param)
+        )
+        if not use_cursor:
+            # Phân trang thủ công theo số trang (OFFSET)
+            page = int(request.query_params.get('page', 1))
+            start = (page - 1) * page_size
+            end = start + page_size
+            paginated_blogs = blogs[start:end]
+            paginator = None
+        else:
+            # Phân trang keyset theo (created_at, blog_id)
+            paginator = KeysetPagination(ordering=('-created_at', '-blog_id'), required=True)
+            paginator.page_size = 10
+            paginated_blogs = paginator.paginate_queryset(blogs, request)
         
         # Xử lý và tạo dữ liệu response
         result = []
         for blog in paginated_blogs:
-            # Lấy thông tin hình ảnh
-            blog_images = BlogImages.objects.filter(blog=blog)
-            
-            # Tìm hình ảnh chính
-            primary_image = blog_images.filter(is_primary=True).first()
-            
-            # Nếu không có hình ảnh chính, lấy hình ảnh đầu tiên
-            if not primary_image and blog_images.exists():
-                primary_image = blog_images.first()
+            # Lấy thông tin hình ảnh (đã nạp sẵn)
+            blog_images = blog.images.all()
             
             # Tạo dữ liệu bài viết
             blog_data = {
@@ -2101,7 +2320,7 @@ def blogs_frontend(request):
                 'title': blog.title,
                 'content': blog.content,
                 'created_at': blog.created_at,
-                'primary_image': primary_image.image_url if primary_image else None,
+                'primary_image': primary_image_url(blog),
                 'images': [
                     {
                         'image_id': img.image_id,
@@ -2113,6 +2332,16 @@ def blogs_frontend(request):
             
             result.append(blog_data)
         
+        if paginator is not None:
+            pagination = {
+                'page_size': paginator.page_size_value,
+                'next_cursor': paginator.get_next_cursor(),
+                'next': paginator.get_next_link()
+            }
+            if paginator.count is not None:
+                pagination['total_blogs'] = paginator.count
+            return Response({'blogs': result, 'pagination': pagination})
+        
         # Tổng số bài viết và tổng số trang
         total_blogs = blogs.count()
         total_pages = (total_blogs + page_size - 1) // page_size
@@ -2129,10 +2358,27 @@ def blogs_frontend(request):
         
         return Response(response_data)
     
+    except NotFound as e:
+        return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         print(f"Error in blogs_frontend: {str(e)}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Endpoint để lấy thông tin bài viết cho trang Blog
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_view('blogs')
+@cache_response('blogs_frontend', tags=['blogs'])
+def blogs_frontend(request):
+    """
+    API endpoint cung cấp dữ liệu bài viết cho trang Blog trên frontend.
+    Trả về danh sách bài viết mới nhất.
+    
+    Mặc định phân trang theo số trang (page, page_size) như cũ. Gửi tham số cursor
+    (để trống cho trang đầu) để phân trang bằng cursor, không chậm dần khi trang càng sâu.
+    """
+    return blogs_frontend_response(request)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @csrf_exempt
@@ -2174,31 +2420,36 @@ def add_to_cart(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Kiểm tra xem sản phẩm có đủ số lượng trong kho không
-        if product.stock_quantity < quantity:
+        try:
+            with transaction.atomic():
+                # Kiểm tra xem sản phẩm đã có trong giỏ hàng chưa (chưa được gán cho đơn hàng nào)
+                cart_item = Cart.objects.select_for_update().filter(
+                    user=user, product=product, order__isnull=True
+                ).first()
+                
+                if cart_item:
+                    # Nếu sản phẩm đã có trong giỏ hàng, cập nhật số lượng
+                    cart_item.quantity += quantity
+                    cart_item.save()
+                    message = "Đã cập nhật số lượng sản phẩm trong giỏ hàng"
+                else:
+                    # Nếu sản phẩm chưa có trong giỏ hàng, tạo mới
+                    cart_item = Cart.objects.create(
+                        user=user,
+                        product=product,
+                        quantity=quantity,
+                        created_at=timezone.now()
+                    )
+                    message = "Đã thêm sản phẩm vào giỏ hàng"
+                
+                # Giữ hàng cho giỏ hàng trong STOCK_RESERVATION_TTL giây
+                reservation = reserve(cart_item, cart_item.quantity)
+        except ReservationError as e:
             return Response(
-                {"error": f"Số lượng sản phẩm trong kho không đủ. Hiện chỉ còn {product.stock_quantity} sản phẩm."}, 
+                {"error": str(e), "available_quantity": e.available}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Kiểm tra xem sản phẩm đã có trong giỏ hàng chưa (chưa được gán cho đơn hàng nào)
-        cart_item = Cart.objects.filter(user=user, product=product, order__isnull=True).first()
-        
-        if cart_item:
-            # Nếu sản phẩm đã có trong giỏ hàng, cập nhật số lượng
-            cart_item.quantity += quantity
-            cart_item.save()
-            message = "Đã cập nhật số lượng sản phẩm trong giỏ hàng"
-        else:
-            # Nếu sản phẩm chưa có trong giỏ hàng, tạo mới
-            cart_item = Cart.objects.create(
-                user=user,
-                product=product,
-                quantity=quantity,
-                created_at=timezone.now()
-            )
-            message = "Đã thêm sản phẩm vào giỏ hàng"
-        
         # Trả về thông tin giỏ hàng
         return Response({
             "success": True,
@@ -2209,7 +2460,8 @@ def add_to_cart(request):
                 "product_name": product.name,
                 "quantity": cart_item.quantity,
                 "price": float(product.price),
-                "created_at": cart_item.created_at
+                "created_at": cart_item.created_at,
+                "reserved_until": reservation.expires_at
             }
         }, status=status.HTTP_200_OK)
         
@@ -2238,14 +2490,18 @@ def get_user_cart(request, user_id):
             )
         
         # Lấy giỏ hàng của người dùng (chỉ các sản phẩm chưa được đặt hàng)
-        cart_items = Cart.objects.filter(user=user, order__isnull=True)
+        cart_items = list(
+            Cart.objects.filter(user=user, order__isnull=True)
+            .select_related('product', 'product__category', 'product__effective_price', 'product__reserved_stock', 'reservation')
+        )
+        price_book = PriceBook().ensure(item.product for item in cart_items)
         
         # Serialize dữ liệu
-        serializer = CartDetailSerializer(cart_items, many=True)
+        serializer = CartDetailSerializer(cart_items, many=True, context={'price_book': price_book})
         
         # Tính tổng tiền và các thông tin khác
         total_price = sum(item.product.price * item.quantity for item in cart_items)
-        discounted_total = sum(item.product.get_discounted_price() * item.quantity for item in cart_items)
+        discounted_total = sum(price_book.discounted_price(item.product) * item.quantity for item in cart_items)
         
         # Tính phí vận chuyển mặc định
         shipping_cost = 30000  # 30,000 VND
@@ -2302,26 +2558,28 @@ def update_cart_item(request, cart_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Kiểm tra và lấy cart item
         try:
-            cart_item = Cart.objects.get(cart_id=cart_id)
-        except Cart.DoesNotExist:
-            return Response(
-                {"error": "Sản phẩm không tồn tại trong giỏ hàng"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Kiểm tra số lượng trong kho
-        if cart_item.product.stock_quantity < new_quantity:
+            with transaction.atomic():
+                # Kiểm tra và lấy cart item (khóa dòng giỏ hàng trước, cùng thứ tự khóa với checkout)
+                try:
+                    cart_item = Cart.objects.select_for_update().get(cart_id=cart_id)
+                except Cart.DoesNotExist:
+                    return Response(
+                        {"error": "Sản phẩm không tồn tại trong giỏ hàng"}, 
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+                
+                # Giữ thêm (hoặc trả lại) hàng theo số lượng mới
+                if cart_item.order_id is None:
+                    reserve(cart_item, new_quantity)
+                cart_item.quantity = new_quantity
+                cart_item.save()
+        except ReservationError as e:
             return Response(
-                {"error": f"Số lượng sản phẩm trong kho không đủ. Hiện chỉ còn {cart_item.product.stock_quantity} sản phẩm."}, 
+                {"error": str(e), "available_quantity": e.available}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Cập nhật số lượng
-        cart_item.quantity = new_quantity
-        cart_item.save()
-        
         # Trả về thông tin đã cập nhật
         serializer = CartDetailSerializer(cart_item)
         return Response({
@@ -2344,20 +2602,22 @@ def remove_cart_item(request, cart_id):
     Xóa sản phẩm khỏi giỏ hàng
     """
     try:
-        # Kiểm tra và lấy cart item
-        try:
-            cart_item = Cart.objects.get(cart_id=cart_id)
-        except Cart.DoesNotExist:
-            return Response(
-                {"error": "Sản phẩm không tồn tại trong giỏ hàng"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Lưu thông tin sản phẩm đã xóa để trả về
-        product_name = cart_item.product.name
-        
-        # Xóa sản phẩm khỏi giỏ hàng
-        cart_item.delete()
+        with transaction.atomic():
+            # Kiểm tra và lấy cart item (khóa dòng giỏ hàng trước, cùng thứ tự khóa với checkout)
+            try:
+                cart_item = Cart.objects.select_for_update().get(cart_id=cart_id)
+            except Cart.DoesNotExist:
+                return Response(
+                    {"error": "Sản phẩm không tồn tại trong giỏ hàng"}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            # Lưu thông tin sản phẩm đã xóa để trả về
+            product_name = cart_item.product.name
+            
+            # Trả lại hàng đang giữ rồi xóa sản phẩm khỏi giỏ hàng
+            release_cart_items([cart_item.cart_id])
+            cart_item.delete()
         
         return Response({
             "success": True,
@@ -2374,6 +2634,7 @@ def remove_cart_item(request, cart_id):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @csrf_exempt
+@idempotent('checkout')
 def create_order_from_cart(request):
     """
     Tạo đơn hàng mới từ giỏ hàng của người dùng
@@ -2407,62 +2668,17 @@ def create_order_from_cart(request):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Lấy giỏ hàng của người dùng (chỉ các sản phẩm chưa được đặt hàng)
-        cart_items = Cart.objects.filter(user=user, order__isnull=True)
-        
-        if not cart_items.exists():
+        # Tạo đơn hàng, trừ tồn kho và thanh toán trong một transaction (core.checkout)
+        try:
+            new_order, price_book = checkout_cart(user, shipping_address, payment_method)
+        except CheckoutError as e:
             return Response(
-                {"error": "Giỏ hàng trống, không thể tạo đơn hàng"}, 
+                {"error": str(e), "unavailable": e.unavailable},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Tính tổng tiền
-        total_amount = sum(item.product.get_discounted_price() * item.quantity for item in cart_items)
-        
-        # Thêm phí vận chuyển
-        shipping_cost = 30000  # 30,000 VND
-        total_amount += shipping_cost
-        
-        # Tạo đơn hàng mới
-        new_order = Orders.objects.create(
-            user=user,
-            customer_name=user.username,
-            customer_email=user.email,
-            customer_phone=user.phone,
-            shipping_address=shipping_address,
-            total_amount=total_amount,
-            order_status='Pending'  # Trạng thái mặc định là "Đang xử lý"
-        )
-        
-        # Tạo chi tiết đơn hàng
-        for cart_item in cart_items:
-            OrderDetails.objects.create(
-                order=new_order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.get_discounted_price()  # Lưu giá đã giảm
-            )
-            
-            # Cập nhật số lượng tồn kho của sản phẩm
-            product = cart_item.product
-            product.stock_quantity -= cart_item.quantity
-            product.sold_quantity += cart_item.quantity
-            product.save()
-            
-            # Gán order cho cart_item để đánh dấu đã đặt hàng
-            cart_item.order = new_order
-            cart_item.save()
-        
-        # Tạo thông tin thanh toán
-        payment = Payments.objects.create(
-            order=new_order,
-            payment_method=payment_method,
-            payment_status='Pending',  # Trạng thái mặc định là "Đang xử lý"
-            transaction_id=f"TXN{int(timezone.now().timestamp())}"  # Tạo mã giao dịch
-        )
-        
         # Serialize dữ liệu để trả về
-        order_serializer = OrdersSerializer(new_order)
+        order_serializer = OrdersSerializer(new_order, context={'price_book': price_book})
         
         return Response({
             "success": True,
@@ -2491,71 +2707,27 @@ def get_user_orders(request, user_id):
             return Response({"error": "Người dùng không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
         
         # Lấy đơn hàng của người dùng, sắp xếp theo thời gian tạo giảm dần (mới nhất lên đầu)
-        orders = Orders.objects.filter(user=user).order_by('-created_at')
+        orders = list(with_order_details(Orders.objects.filter(user=user).order_by('-created_at')))
         
         # Serialize dữ liệu
         serializer = OrdersSerializer(orders, many=True)
         
-        # Lấy thêm thông tin hình ảnh cho từng sản phẩm trong đơn hàng
-        enhanced_orders = []
+        # Hình ảnh đại diện của từng sản phẩm trong đơn hàng
+        image_urls = {
+            detail.order_detail_id: primary_image_url(detail.product)
+            for order in orders
+            for detail in order.details.all()
+        }
         
+        enhanced_orders = []
         for order_data in serializer.data:
             # Tạo bản sao của đơn hàng để thêm thông tin hình ảnh
             enhanced_order = dict(order_data)
             
-            # Cập nhật thông tin hình ảnh cho từng sản phẩm trong đơn hàng
             enhanced_details = []
             for detail in enhanced_order['details']:
-                # Lấy product_id từ chi tiết đơn hàng
-                product_id = detail['product']
-                
-                # Tìm hình ảnh chính của sản phẩm
-                try:
-                    # Ưu tiên hình ảnh chính (is_primary=True)
-                    product_image = ProductImages.objects.filter(
-                        product_id=product_id, 
-                        is_primary=True
-                    ).first()
-                    
-                    # Nếu không tìm thấy hình ảnh chính, lấy hình ảnh đầu tiên
-                    if not product_image:
-                        product_image = ProductImages.objects.filter(
-                            product_id=product_id
-                        ).first()
-                    
-                    # Nếu tìm thấy hình ảnh, thêm vào chi tiết
-                    if product_image:
-                        detail['image_url'] = product_image.image_url
-                    else:
-                        detail['image_url'] = None
-                        
-                except Exception as e:
-                    detail['image_url'] = None
-                    print(f"Lỗi khi lấy hình ảnh sản phẩm {product_id}: {str(e)}")
-                
-                # Thử lấy thông tin hình ảnh từ giỏ hàng nếu không tìm thấy hình ảnh trực tiếp
-                if not detail.get('image_url'):
-                    try:
-                        # Tìm mục giỏ hàng tương ứng với sản phẩm trong đơn hàng
-                        cart_item = Cart.objects.filter(
-                            order_id=order_data['order_id'], 
-                            product_id=product_id
-                        ).first()
-                        
-                        if cart_item:
-                            # Lấy sản phẩm từ giỏ hàng
-                            product = cart_item.product
-                            # Lấy hình ảnh chính của sản phẩm
-                            product_image = product.images.filter(is_primary=True).first() or product.images.first()
-                            if product_image:
-                                detail['image_url'] = product_image.image_url
-                    except Exception as e:
-                        print(f"Lỗi khi lấy hình ảnh từ giỏ hàng: {str(e)}")
-                
-                # Nếu vẫn không tìm thấy hình ảnh, sử dụng ảnh mặc định
-                if not detail.get('image_url'):
-                    detail['image_url'] = '/assets/images/product-placeholder.jpg'
-                
+                # Nếu sản phẩm không có hình ảnh, sử dụng ảnh mặc định
+                detail['image_url'] = image_urls.get(detail['order_detail_id']) or '/assets/images/product-placeholder.jpg'
                 enhanced_details.append(detail)
             
             # Cập nhật chi tiết đơn hàng với thông tin đã bổ sung
@@ -2603,8 +2775,10 @@ def cancel_order(request, order_id):
             )
         
         # Cập nhật trạng thái đơn hàng
+        previous_snapshot = order_snapshot(order)
         order.order_status = 'Cancelled'
         order.save()
+        record_order_change(previous_snapshot, order_snapshot(order))
         
         # Cập nhật lại số lượng sản phẩm trong kho
         order_details = OrderDetails.objects.filter(order=order)
@@ -2614,6 +2788,7 @@ def cancel_order(request, order_id):
             product.stock_quantity += detail.quantity
             product.sold_quantity -= detail.quantity
             product.save()
+            invalidate_cache_tags('products')
         
         # Cập nhật trạng thái thanh toán nếu có
         try:
@@ -2682,10 +2857,14 @@ def add_review(request):
         
         if existing_review:
             # Cập nhật đánh giá hiện có
+            previous_rating = existing_review.rating
             existing_review.rating = rating
             existing_review.comment = comment
             existing_review.created_at = timezone.now()
-            existing_review.save()
+            with transaction.atomic():
+                existing_review.save()
+                record_review(product.product_id, rating, previous_rating)
+            invalidate_cache_tags('reviews')
             
             serializer = ReviewsSerializer(existing_review)
             return Response({
@@ -2700,7 +2879,10 @@ def add_review(request):
                 rating=rating,
                 comment=comment
             )
-            new_review.save()
+            with transaction.atomic():
+                new_review.save()
+                record_review(product.product_id, rating)
+            invalidate_cache_tags('reviews')
             
             serializer = ReviewsSerializer(new_review)
             return Response({
@@ -2715,6 +2897,7 @@ def add_review(request):
 # Endpoint để lấy đánh giá sản phẩm theo product_id
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_view('reviews')
 def get_product_reviews(request, product_id):
     """
     API endpoint để lấy tất cả đánh giá của một sản phẩm.
@@ -2727,18 +2910,124 @@ def get_product_reviews(request, product_id):
             return Response({'error': 'Sản phẩm không tồn tại'}, status=status.HTTP_404_NOT_FOUND)
             
         # Lấy tất cả đánh giá của sản phẩm, sắp xếp theo thời gian tạo giảm dần
-        reviews = Reviews.objects.filter(product=product).order_by('-created_at')
+        reviews = Reviews.objects.filter(product=product).select_related('user').order_by('-created_at', '-review_id')
+        
+        # Phân trang khi client gửi cursor/page_size
+        paginated = paginate_list(
+            request, reviews,
+            lambda page: ReviewsSerializer(page, many=True).data
+        )
+        if paginated is not None:
+            return paginated
         
         serializer = ReviewsSerializer(reviews, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
         
+    except NotFound as e:
+        return Response({'error': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         print(f"Lỗi khi lấy đánh giá sản phẩm: {str(e)}")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Endpoint tổng hợp đánh giá của nhiều sản phẩm trong một request
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_view('reviews')
+def review_summaries(request):
+    """
+    API endpoint trả về số lượng, điểm trung bình và phân bố 1-5 sao của nhiều sản phẩm.
+    
+    Tham số:
+        product_ids  danh sách product_id cách nhau bởi dấu phẩy
+        recent       số đánh giá mới nhất của các sản phẩm này cần trả kèm (mặc định 0)
+    """
+    try:
+        raw_ids = ','.join(request.query_params.getlist('product_ids'))
+        try:
+            product_ids = list(dict.fromkeys(int(value) for value in raw_ids.split(',') if value.strip()))
+        except ValueError:
+            return Response({'error': 'product_ids phải là danh sách số nguyên'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not product_ids:
+            return Response({'error': 'product_ids là bắt buộc'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(product_ids) > SUMMARY_MAX_PRODUCTS:
+            return Response(
+                {'error': f'Tối đa {SUMMARY_MAX_PRODUCTS} sản phẩm mỗi request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            recent = max(0, min(int(request.query_params.get('recent', 0)), SUMMARY_MAX_RECENT))
+        except ValueError:
+            recent = 0
+        
+        data = {'results': rating_summaries(product_ids)}
+        if recent:
+            data['recent_reviews'] = ReviewsSerializer(recent_reviews(product_ids, recent), many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Lỗi khi lấy tổng hợp đánh giá sản phẩm: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def promotion_client_item(promo, product_promos, now):
+    """Dữ liệu một khuyến mãi cho component Promotions.js (dùng chung với core.async_views)"""
+    product_image = None
+    if product_promos and product_promos.product:
+        # Ảnh đại diện của sản phẩm
+        product_image = primary_image_url(product_promos.product)
+    
+    # Tạo mã khuyến mãi giả từ ID
+    promo_code = f"PROMO{promo.promotion_id}"
+    
+    # Format thời gian hết hạn
+    expiry_text = promo.end_date.strftime("%d/%m/%Y")
+    if promo.end_date < now:
+        expiry_text = f"Expired {expiry_text}"
+    elif promo.start_date > now:
+        expiry_text = f"Starts {promo.start_date.strftime('%d/%m/%Y')}"
+    
+    return {
+        'id': promo.promotion_id,
+        'title': promo.title,
+        'description': promo.description or "Enjoy special discounts with this promotion",
+        'code': promo_code,
+        'expires': expiry_text,
+        'image': promo.img_banner or product_image
+    }
+
+def promotions_client_data(current, upcoming, expired):
+    # Lấy khuyến mãi nổi bật (featured) là khuyến mãi hiện tại đầu tiên hoặc sắp tới
+    featured = {}
+    if current:
+        featured = {
+            'title': current[0]['title'],
+            'description': current[0]['description'],
+            'code': current[0]['code'],
+            'image': current[0]['image']
+        }
+    elif upcoming:
+        featured = {
+            'title': upcoming[0]['title'],
+            'description': upcoming[0]['description'],
+            'code': upcoming[0]['code'],
+            'image': upcoming[0]['image']
+        }
+    
+    return {
+        'featured': featured,
+        'promotions': {
+            'current': current,
+            'upcoming': upcoming,
+            'expired': expired
+        }
+    }
+
 # Endpoint để lấy thông tin khuyến mãi cho trang client
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_view('promotions', 'products')
+@cache_response('promotions_client', tags=['promotions', 'products'], ttl_func=promotion_boundary_ttl)
 def promotions_client(request):
     """
     API endpoint cung cấp dữ liệu khuyến mãi định dạng phù hợp với component Promotions.js
@@ -2768,34 +3057,10 @@ def promotions_client(request):
             formatted_promos = []
             for promo in promotions_queryset:
                 # Lấy thêm thông tin sản phẩm từ bảng ProductPromotions nếu cần
-                product_promos = ProductPromotions.objects.filter(promotion=promo, product__isnull=False).first()
-                product_image = None
-                if product_promos and product_promos.product:
-                    # Tìm ảnh sản phẩm
-                    product_img = ProductImages.objects.filter(product=product_promos.product, is_primary=True).first()
-                    if not product_img:
-                        product_img = ProductImages.objects.filter(product=product_promos.product).first()
-                    if product_img:
-                        product_image = product_img.image_url
-                
-                # Tạo mã khuyến mãi giả từ ID
-                promo_code = f"PROMO{promo.promotion_id}"
-                
-                # Format thời gian hết hạn
-                expiry_text = promo.end_date.strftime("%d/%m/%Y")
-                if promo.end_date < now:
-                    expiry_text = f"Expired {expiry_text}"
-                elif promo.start_date > now:
-                    expiry_text = f"Starts {promo.start_date.strftime('%d/%m/%Y')}"
-                
-                formatted_promos.append({
-                    'id': promo.promotion_id,
-                    'title': promo.title,
-                    'description': promo.description or "Enjoy special discounts with this promotion",
-                    'code': promo_code,
-                    'expires': expiry_text,
-                    'image': promo.img_banner or product_image
-                })
+                product_promos = ProductPromotions.objects.filter(
+                    promotion=promo, product__isnull=False
+                ).select_related('product').first()
+                formatted_promos.append(promotion_client_item(promo, product_promos, now))
             
             return formatted_promos
         
@@ -2804,33 +3069,7 @@ def promotions_client(request):
         upcoming = format_promotions(upcoming_promotions)
         expired = format_promotions(expired_promotions)
         
-        # Lấy khuyến mãi nổi bật (featured) là khuyến mãi hiện tại đầu tiên hoặc sắp tới
-        featured = {}
-        if current:
-            featured = {
-                'title': current[0]['title'],
-                'description': current[0]['description'],
-                'code': current[0]['code'],
-                'image': current[0]['image']
-            }
-        elif upcoming:
-            featured = {
-                'title': upcoming[0]['title'],
-                'description': upcoming[0]['description'],
-                'code': upcoming[0]['code'],
-                'image': upcoming[0]['image']
-            }
-        
-        response_data = {
-            'featured': featured,
-            'promotions': {
-                'current': current,
-                'upcoming': upcoming,
-                'expired': expired
-            }
-        }
-        
-        return Response(response_data)
+        return Response(promotions_client_data(current, upcoming, expired))
     
     except Exception as e:
         print(f"Error in promotions_client: {str(e)}")
@@ -2847,10 +3086,14 @@ class SocialMediaUrlsViewSet(viewsets.ModelViewSet):
         return obj
     
     def list(self, request, *args, **kwargs):
-        # Always return the first record or create one if none exists
-        instance, created = SocialMediaUrls.objects.get_or_create(pk=1)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        def build():
+            # Always return the first record or create one if none exists
+            instance, created = SocialMediaUrls.objects.get_or_create(pk=1)
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+        
+        # Cache response vì trang public gọi endpoint này ở mọi trang
+        return cached_view_response(request, 'social_media_urls', ['social-media'], build)
     
     def create(self, request, *args, **kwargs):
         # Override create to update or create the first record
@@ -2858,6 +3101,7 @@ class SocialMediaUrlsViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_cache_tags('social-media')
         return Response(serializer.data)
         
     def update(self, request, *args, **kwargs):
@@ -2866,6 +3110,7 @@ class SocialMediaUrlsViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_cache_tags('social-media')
         
         # Log the action
         admin = request.user if hasattr(request, 'user') else None
@@ -2881,6 +3126,7 @@ class SocialMediaUrlsViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_response('faqs_frontend', tags=['faqs'])
 def faqs_frontend(request):
     """
     API endpoint cung cấp dữ liệu FAQs cho trang frontend customer support
@@ -2899,6 +3145,7 @@ def faqs_frontend(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 @csrf_exempt
+@cache_response('client_terms_conditions', tags=['terms'])
 def client_terms_conditions(request):
     """
     API endpoint dành cho trang Terms and Conditions của client frontend
@@ -2911,6 +3158,7 @@ def client_terms_conditions(request):
 # Endpoint để lấy chi tiết sản phẩm theo product_id
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_view('products')
 def get_product_details(request, product_id):
     try:
         # Tìm kiếm chi tiết sản phẩm theo product_id
@@ -2945,21 +3193,14 @@ def update_user_activity(request):
     current_time = int(time.time())
     session_key = f"user_session_{user.user_id}"
     
-    # Get the current session data
-    session_data = get_session_data(session_key)
+    # Save the current timestamp and get the previous one in one store operation
+    last_active = touch_session(session_key, current_time)
     
     # Check if session has already timed out
-    if session_data:
-        last_active = session_data.get('last_active', 0)
-        time_since_last_activity = current_time - last_active
-        
-        if time_since_last_activity > SESSION_TIMEOUT:
-            # Session has already expired
-            delete_session_data(session_key)
-            return Response({'status': 'timeout', 'message': 'Session has timed out'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    # Save the current timestamp
-    set_session_data(session_key, {'last_active': current_time})
+    if last_active is not None and current_time - last_active > SESSION_TIMEOUT:
+        # Session has already expired
+        delete_session(session_key)
+        return Response({'status': 'timeout', 'message': 'Session has timed out'}, status=status.HTTP_401_UNAUTHORIZED)
     
     return Response({
         'status': 'success',
@@ -3006,7 +3247,7 @@ def user_logout(request):
             if user_id:
                 # Xóa dữ liệu phiên
                 session_key = f"user_session_{user_id}"
-                delete_session_data(session_key)
+                delete_session(session_key)
                 
                 # Log hoạt động đăng xuất
                 try:
@@ -3029,6 +3270,7 @@ def user_logout(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_response('careers_client', tags=['careers'])
 def careers_client(request):
     """
     API endpoint cho trang tuyển dụng trên frontend
@@ -3129,10 +3371,21 @@ def get_career_applications(request, job_id):
             )
             
         applications = CareerApplications.objects.filter(career=career)
+        
+        # Phân trang keyset nếu client gửi cursor/page_size/count
+        paginated = paginate_list(
+            request, applications,
+            lambda page: CareerApplicationsSerializer(page, many=True).data
+        )
+        if paginated is not None:
+            return paginated
+        
         serializer = CareerApplicationsSerializer(applications, many=True)
             
         return Response(serializer.data)
         
+    except NotFound as e:
+        return Response({'detail': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         print(f"Lỗi khi lấy danh sách ứng tuyển: {str(e)}")
         return Response(
@@ -3145,50 +3398,31 @@ def get_career_applications(request, job_id):
 def track_user_activity(request):
     """
     API endpoint to track user activities such as page views, searches, etc.
+    Events are validated here and written in batches by core.activity.
     """
     try:
-        user_id = request.data.get('user_id')
-        action_type = request.data.get('action_type')  # e.g., 'page_view', 'search', 'product_view', etc.
-        page_path = request.data.get('page_path', '')
-        search_query = request.data.get('search_query', '')
-        product_id = request.data.get('product_id', None)
-        category_id = request.data.get('category_id', None)
-        
-        # Validate required fields
-        if not user_id or not action_type:
-            return Response({
-                'detail': 'Missing required fields: user_id and action_type are required'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
         # Get device and IP info
         ip_address = request.META.get('REMOTE_ADDR', '')
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        # Format action message based on action type
-        action_message = ''
-        if action_type == 'page_view':
-            action_message = f"Viewed page: {page_path}"
-        elif action_type == 'search':
-            action_message = f"Searched for: {search_query}"
-        elif action_type == 'product_view':
-            action_message = f"Viewed product ID: {product_id}"
-        elif action_type == 'category_view':
-            action_message = f"Viewed category ID: {category_id}"
-        else:
-            action_message = f"{action_type}: {page_path or search_query}"
-        
-        # Create activity log entry
-        UserActivityLog.objects.create(
-            user_id=user_id,
-            action=action_message,
-            device=user_agent,
-            ip_address=ip_address
-        )
+        try:
+            event = build_activity(request.data, ip_address, user_agent)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        accepted, dropped = activity_writer.enqueue([event])
+        if dropped:
+            # Hàng đợi đầy, client nên gửi lại sau
+            return Response(
+                {'detail': 'Activity queue is full, please retry later'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '5'}
+            )
         
         return Response({
             'success': True,
             'message': 'Activity logged successfully'
-        }, status=status.HTTP_201_CREATED)
+        }, status=status.HTTP_202_ACCEPTED)
         
     except Exception as e:
         print(f"Error tracking user activity: {str(e)}")
@@ -3196,6 +3430,112 @@ def track_user_activity(request):
             'detail': f"Error: {str(e)}"
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, TextJSONParser, FormParser, MultiPartParser])
+def track_user_activity_batch(request):
+    """
+    API endpoint to track many user activities in one request.
+    Body: {"events": [{user_id, action_type, ...}, ...]} hoặc một mảng sự kiện.
+    Nhận cả Content-Type text/plain để frontend gửi bằng navigator.sendBeacon.
+    """
+    try:
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list) or not events:
+            return Response({'detail': 'events must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > ACTIVITY_MAX_BATCH_EVENTS:
+            return Response(
+                {'detail': f'At most {ACTIVITY_MAX_BATCH_EVENTS} events per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ip_address = request.META.get('REMOTE_ADDR', '')
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        
+        valid_events = []
+        errors = []
+        for index, data in enumerate(events):
+            try:
+                valid_events.append(build_activity(data, ip_address, user_agent))
+            except ValueError as e:
+                errors.append({'index': index, 'detail': str(e)})
+        
+        accepted, dropped = activity_writer.enqueue(valid_events)
+        response_data = {
+            'success': accepted > 0 or not valid_events,
+            'accepted': accepted,
+            'rejected': len(errors),
+            'dropped': dropped,
+            'errors': errors
+        }
+        if dropped and not accepted:
+            return Response(response_data, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': '5'})
+        return Response(response_data, status=status.HTTP_202_ACCEPTED)
+        
+    except Exception as e:
+        print(f"Error tracking user activity batch: {str(e)}")
+        return Response({
+            'detail': f"Error: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def activity_tracking_stats(request):
+    """Số liệu hàng đợi ghi hoạt động người dùng của worker hiện tại"""
+    return Response(activity_writer.stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def database_connection_stats(request):
+    """
+    Số liệu kết nối database của worker hiện tại: số lần lấy/trả kết nối, thời gian chờ
+    và số liệu của pool psycopg (khi bật DATABASE_POOL)
+    """
+    stats = connection_stats.stats()
+    stats['conn_max_age'] = connection.settings_dict['CONN_MAX_AGE']
+    pool = getattr(connection, 'pool', None)
+    stats['pool'] = pool.get_stats() if pool is not None else None
+    return Response(stats)
+
+def _activity_window(request):
+    """Đọc tham số days (1-366, mặc định 7) và limit (1-100, mặc định 10) của API thống kê hoạt động"""
+    try:
+        days = int(request.query_params.get('days', 7))
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        raise ValueError('days và limit phải là số nguyên')
+    if not 1 <= days <= 366 or not 1 <= limit <= 100:
+        raise ValueError('days phải từ 1 đến 366, limit từ 1 đến 100')
+    return timezone.now() - timedelta(days=days), limit
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def activity_top_products(request):
+    """Các sản phẩm được xem nhiều nhất trong `days` ngày qua"""
+    try:
+        try:
+            since, limit = _activity_window(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'since': since, 'results': top_viewed_products(since, limit=limit)})
+    except Exception as e:
+        print(f"Lỗi khi lấy sản phẩm được xem nhiều nhất: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def activity_top_searches(request):
+    """Các từ khóa được tìm kiếm nhiều nhất trong `days` ngày qua"""
+    try:
+        try:
+            since, limit = _activity_window(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'since': since, 'results': top_search_terms(since, limit=limit)})
+    except Exception as e:
+        print(f"Lỗi khi lấy từ khóa tìm kiếm nhiều nhất: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def subscribe_newsletter(request):
@@ -3231,11 +3571,74 @@ def newsletter_subscribers_list(request):
     """
     try:
         subscribers = NewsletterSubscribers.objects.all().order_by('-created_at')
+        
+        # Phân trang keyset nếu client gửi cursor/page_size/count
+        # (created_at có thể NULL nên phân trang theo id)
+        paginated = paginate_list(
+            request, subscribers,
+            lambda page: NewsletterSubscriberSerializer(page, many=True).data,
+            ordering=('-id',)
+        )
+        if paginated is not None:
+            return paginated
+        
         serializer = NewsletterSubscriberSerializer(subscribers, many=True)
         return Response(serializer.data)
+    except NotFound as e:
+        return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         print(f"Error getting newsletter subscribers: {str(e)}")
         return Response(
             {"error": f"Error getting newsletter subscribers: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+# Endpoint xuất dữ liệu (đơn hàng, người dùng, nhật ký admin, người đăng ký bản tin)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_data(request, resource):
+    """
+    Xuất dữ liệu `resource` ra file CSV hoặc JSON Lines, gửi dần theo luồng
+    (server-side cursor + StreamingHttpResponse) nên không phải nạp cả bảng vào bộ nhớ.
+    Đơn hàng xuất kèm các dòng chi tiết: CSV mỗi dòng chi tiết một dòng, JSON Lines lồng trong 'details'.
+    
+    Tham số:
+        export_format  csv hoặc jsonl (mặc định: csv)
+        start, end     khoảng ngày tạo YYYY-MM-DD (tính cả hai đầu)
+        status         trạng thái đơn hàng / người đăng ký bản tin
+        table_name     chỉ với nhật ký admin
+    """
+    try:
+        params = request.query_params
+        export_format = params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"export_format phải là một trong: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start, end = parse_date_range(params.get('start'), params.get('end'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        order_statuses = [choice for choice, _ in Orders.ORDER_STATUS_CHOICES]
+        if resource == 'orders' and params.get('status') and params['status'] not in order_statuses:
+            return Response(
+                {"error": f"status phải là một trong: {', '.join(order_statuses)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters = {}
+        if resource == 'audit-logs' and params.get('table_name'):
+            filters['table_name'] = params['table_name']
+        
+        stream = export_stream(resource, export_format, start, end, params.get('status') or None, **filters)
+        response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[export_format])
+        filename = f"{resource.replace('-', '_')}_{timezone.localdate():%Y%m%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        logger.info(
+            "[export_data] %s (%s) start=%s end=%s status=%s", resource, export_format, start, end, params.get('status')
+        )
+        return response
+    except Exception as e:
+        print(f"Error exporting {resource}: {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
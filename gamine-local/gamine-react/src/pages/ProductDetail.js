@@ -7,7 +7,8 @@ import {
   fetchReviews, 
   fetchProductPromotions, 
   isPromotionActive, 
-  getProductDiscountedPrice 
+  getProductDiscountedPrice,
+  fetchProductAvailability
 } from '../services/api';
 import activityTracker from '../services/ActivityTracker';
 
@@ -200,6 +201,10 @@ function ProductDetail() {
           reviewCount = 0;
         }
         
+        // Số lượng có thể bán (không tính hàng đang được giữ trong giỏ hàng của người khác)
+        const availability = await fetchProductAvailability([productData.product_id]);
+        const availableStock = availability[productData.product_id] ?? productData.stock_quantity;
+        
         // Định dạng dữ liệu sản phẩm
         const formattedProduct = {
           id: productData.product_id,
@@ -208,7 +213,7 @@ function ProductDetail() {
           discount: promotionData ? promotionData.discount_percentage : 0,
           discounted_price: promotionData ? promotionData.discounted_price : null,
           has_promotion: promotionData ? promotionData.has_active_promotion : false,
-          stock: productData.stock_quantity,
+          stock: availableStock,
           sold: productData.sold_quantity || 0,
           rating: averageRating,
           reviews: reviewCount,
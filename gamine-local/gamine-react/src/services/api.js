@@ -44,6 +44,33 @@ export const trackUserActivity = async (activityData) => {
   }
 };
 
+// Gửi nhiều sự kiện hoạt động trong một request
+// useBeacon: gửi bằng navigator.sendBeacon khi người dùng rời trang (request vẫn được gửi đi)
+// Trả về { success, retryAfter } - retryAfter (giây) khi server đang quá tải
+export const trackUserActivityBatch = async (events, { useBeacon = false } = {}) => {
+  if (!events || events.length === 0) {
+    return { success: true, retryAfter: null };
+  }
+
+  if (useBeacon && navigator.sendBeacon) {
+    // text/plain để trình duyệt không cần gửi preflight CORS
+    const blob = new Blob([JSON.stringify({ events })], { type: 'text/plain' });
+    return { success: navigator.sendBeacon(`${API_URL}/user-activity/track/batch/`, blob), retryAfter: null };
+  }
+
+  try {
+    await api.post('/user-activity/track/batch/', { events });
+    return { success: true, retryAfter: null };
+  } catch (error) {
+    console.error('Error tracking user activity batch:', error);
+    if (error.response && error.response.status === 429) {
+      return { success: false, retryAfter: parseInt(error.response.headers['retry-after'] || '5', 10) };
+    }
+    // Silently fail - don't interrupt user experience for tracking errors
+    return { success: false, retryAfter: null };
+  }
+};
+
 // API cho Terms and Conditions
 export const fetchTermsAndConditions = async () => {
   try {
@@ -448,6 +475,80 @@ export const fetchReviewsByProductId = async (productId) => {
   }
 };
 
+// Số sản phẩm tối đa mỗi request tổng hợp đánh giá (giới hạn của backend)
+const REVIEW_SUMMARY_BATCH_SIZE = 200;
+
+// Lấy tổng hợp đánh giá (số lượng, điểm trung bình, phân bố sao) của nhiều sản phẩm
+// và `recent` đánh giá mới nhất của các sản phẩm đó
+export const fetchReviewSummaries = async (productIds, recent = 0) => {
+  const summaries = { results: [], recent_reviews: [] };
+  if (!productIds || productIds.length === 0) {
+    return summaries;
+  }
+  
+  try {
+    for (let start = 0; start < productIds.length; start += REVIEW_SUMMARY_BATCH_SIZE) {
+      const batchIds = productIds.slice(start, start + REVIEW_SUMMARY_BATCH_SIZE);
+      const params = new URLSearchParams({ product_ids: batchIds.join(',') });
+      if (recent > 0) {
+        params.append('recent', recent);
+      }
+      
+      const response = await fetch(`${API_URL}/reviews/summary/?${params.toString()}`);
+      if (!response.ok) {
+        throw new Error(`Error: ${response.status}`);
+      }
+      
+      const data = await response.json();
+      summaries.results.push(...(data.results || []));
+      summaries.recent_reviews.push(...(data.recent_reviews || []));
+    }
+    
+    // Giữ `recent` đánh giá mới nhất khi gộp nhiều request
+    summaries.recent_reviews = summaries.recent_reviews
+      .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
+      .slice(0, recent);
+    console.log(`Đã tải tổng hợp đánh giá cho ${summaries.results.length} sản phẩm`);
+    return summaries;
+  } catch (error) {
+    console.error('Error fetching review summaries:', error);
+    return summaries;
+  }
+};
+
+// Số sản phẩm tối đa mỗi request số lượng có thể bán (giới hạn của backend)
+const AVAILABILITY_BATCH_SIZE = 200;
+
+// Lấy số lượng có thể bán (tồn kho trừ hàng đang được giữ trong giỏ hàng của người khác)
+// của nhiều sản phẩm: { product_id: số lượng }
+export const fetchProductAvailability = async (productIds) => {
+  const availability = {};
+  if (!productIds || productIds.length === 0) {
+    return availability;
+  }
+  
+  try {
+    for (let start = 0; start < productIds.length; start += AVAILABILITY_BATCH_SIZE) {
+      const batchIds = productIds.slice(start, start + AVAILABILITY_BATCH_SIZE);
+      const params = new URLSearchParams({ product_ids: batchIds.join(',') });
+      
+      const response = await fetch(`${API_URL}/products/availability/?${params.toString()}`);
+      if (!response.ok) {
+        throw new Error(`Error: ${response.status}`);
+      }
+      
+      const data = await response.json();
+      (data.results || []).forEach((item) => {
+        availability[item.product_id] = item.available_quantity;
+      });
+    }
+    return availability;
+  } catch (error) {
+    console.error('Error fetching product availability:', error);
+    return availability;
+  }
+};
+
 export const loginUser = async (loginIdentifier, password) => {
   try {
     console.log("Đang gửi yêu cầu đăng nhập:", loginIdentifier);
@@ -865,12 +966,22 @@ export const removeCartItem = async (cartId) => {
   }
 };
 
-export const checkout = async (userId, shippingAddress, paymentMethod) => {
+// Tạo Idempotency-Key ngẫu nhiên cho các request tạo dữ liệu có thể được gửi lại
+// (crypto.randomUUID chỉ có trong secure context nên dùng getRandomValues)
+export const newIdempotencyKey = () => {
+  const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+// Gửi lại với cùng idempotencyKey sẽ nhận lại đơn hàng đã tạo thay vì tạo đơn mới
+export const checkout = async (userId, shippingAddress, paymentMethod, idempotencyKey = newIdempotencyKey()) => {
   try {
     const response = await axios.post(`${getBaseUrl()}/cart/checkout/`, {
       user_id: userId,
       shipping_address: shippingAddress,
       payment_method: paymentMethod === 'bank_transfer' ? 'Bank Transfer' : 'Cash on Delivery'
+    }, {
+      headers: { 'Idempotency-Key': idempotencyKey }
     });
     return response.data;
   } catch (error) {
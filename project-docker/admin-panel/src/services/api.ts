@@ -2,7 +2,8 @@ import axios, { AxiosError, AxiosResponse } from 'axios';
 import { 
     LoginRequest, Admin, Permission, User, Category, Product, 
     Promotion, Order, Blog, FAQ, Contact, Career, 
-    TermsAndConditions, PrivacyPolicy, DashboardStats, AuditLog, Payment,
+    TermsAndConditions, PrivacyPolicy, DashboardStats, AuditLog, AuditLogQuery, CursorPage, Payment, InventoryImportResult,
+    ExportResource, ExportQuery,
     SocialMediaUrls, CareerApplication
 } from '../types';
 
@@ -58,8 +59,8 @@ export const createPermission = (permission: Partial<Permission>) => API.post('/
 export const updatePermission = (id: number, permission: Partial<Permission>) => API.put(`/permissions/${id}/`, permission);
 export const deletePermission = (id: number) => API.delete(`/permissions/${id}/`);
 
-// AuditLog API
-export const getAuditLogs = () => API.get<AuditLog[]>('/audit-logs/');
+// AuditLog API (luôn phân trang, trang tiếp theo lấy bằng cursor trong trường `next`)
+export const getAuditLogs = (params?: AuditLogQuery) => API.get<CursorPage<AuditLog>>('/audit-logs/', { params });
 
 // User API
 export const getUsers = () => API.get<User[]>('/users/');
@@ -91,10 +92,17 @@ export const deletePromotion = (id: number) => API.delete(`/promotions/${id}/`);
 export const getProductPromotions = (productId: number) => API.get<Promotion[]>(`/products/${productId}/promotions/`);
 export const getCategoryPromotions = (categoryId: number) => API.get<Promotion[]>(`/categories/${categoryId}/promotions/`);
 
+// Tạo Idempotency-Key ngẫu nhiên cho các request tạo dữ liệu có thể được gửi lại
+export const newIdempotencyKey = (): string => {
+    const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
 // Order API
 export const getOrders = () => API.get<Order[]>('/orders/');
 export const getOrder = (id: number) => API.get<Order>(`/orders/${id}/`);
-export const createOrder = (order: any) => API.post('/orders/', order);
+export const createOrder = (order: any, idempotencyKey: string = newIdempotencyKey()) =>
+  API.post('/orders/', order, { headers: { 'Idempotency-Key': idempotencyKey } });
 export const updateOrder = (id: number, order: Partial<Order>) => API.put(`/orders/${id}/`, order);
 export const deleteOrder = (id: number) => API.delete(`/orders/${id}/`);
 
@@ -148,8 +156,17 @@ export const deletePayment = (id: number) => API.delete(`/payments/${id}/`);
 export const getOrderPayment = (orderId: number) => API.get<Payment>(`/orders/${orderId}/payment/`);
 
 // Inventory API
-export const updateProductInventory = (productId: number, quantity: number) => 
-  API.post(`/products/${productId}/update-inventory/`, { quantity });
+export const updateProductInventory = (productId: number, quantity: number, idempotencyKey: string = newIdempotencyKey()) => 
+  API.post(`/products/${productId}/update-inventory/`, { quantity }, { headers: { 'Idempotency-Key': idempotencyKey } });
+
+// Nhập tồn kho hàng loạt từ file CSV (product_id,delta hoặc product_id,stock_quantity) hoặc JSON Lines
+export const importInventoryFile = (file: File, dryRun: boolean = false) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  return API.post<InventoryImportResult>(`/products/inventory/bulk/?dry_run=${dryRun}`, formData, {
+    headers: { 'Content-Type': 'multipart/form-data' }
+  });
+};
 
 // Lấy danh sách sản phẩm đã áp dụng cho một khuyến mãi
 export const getPromotionProducts = (promotionId: number) => {
@@ -206,4 +223,19 @@ export const getSocialMediaUrls = () => API.get<SocialMediaUrls>('/social-media/
 export const updateSocialMediaUrls = (urls: Partial<SocialMediaUrls>) => API.put('/social-media/1/', urls);
 
 // Newsletter Subscribers API
-export const getNewsletterSubscribers = () => API.get('/newsletter-subscribers/');
\ No newline at end of file
+export const getNewsletterSubscribers = () => API.get('/newsletter-subscribers/');
+
+// Xuất dữ liệu ra file CSV/JSON Lines (server đọc và gửi dần theo luồng) rồi tải file về
+export const downloadExport = async (resource: ExportResource, query: ExportQuery = {}) => {
+  const response = await API.get<Blob>(`/${resource}/export/`, { params: query, responseType: 'blob' });
+  const disposition: string = response.headers['content-disposition'] || '';
+  const match = disposition.match(/filename="([^"]+)"/);
+  const url = URL.createObjectURL(response.data);
+  const link = document.createElement('a');
+  link.href = url;
+  link.download = match ? match[1] : `${resource}.${query.export_format || 'csv'}`;
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+  URL.revokeObjectURL(url);
+};
\ No newline at end of file
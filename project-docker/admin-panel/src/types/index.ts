@@ -40,6 +40,22 @@ export interface AuditLog {
     created_at: string;
 }
 
+export interface AuditLogQuery {
+    cursor?: string;
+    page_size?: number;
+    table_name?: string;
+    record_id?: number;
+    admin?: number;
+}
+
+// Một trang dữ liệu phân trang keyset
+export interface CursorPage<T> {
+    count?: number;
+    next: string | null;
+    page_size: number;
+    results: T[];
+}
+
 // Kiểu dữ liệu cho User
 export interface User {
     user_id: number;
@@ -77,6 +93,33 @@ export interface ProductDetail {
     specification: string | null;
 }
 
+// Kết quả nhập kho hàng loạt
+export interface InventoryImportFailure {
+    line: number;
+    product_id: number | string | null;
+    error: string;
+}
+
+export interface InventoryImportResult {
+    success: boolean;
+    dry_run: boolean;
+    rows: number;
+    applied: number;
+    failed: number;
+    batches: number;
+    failures: InventoryImportFailure[];
+}
+
+export type ExportResource = 'orders' | 'users' | 'audit-logs' | 'newsletter-subscribers';
+
+export interface ExportQuery {
+    export_format?: 'csv' | 'jsonl';
+    start?: string;   // YYYY-MM-DD
+    end?: string;     // YYYY-MM-DD
+    status?: string;
+    table_name?: string;
+}
+
 export interface Product {
     product_id: number;
     name: string;
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+import logging
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Các ứng dụng bên thứ ba
     'rest_framework',
@@ -52,14 +54,14 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
+    'core.heartbeat.SessionHeartbeatMiddleware',  # Trả lời heartbeat phiên ngay, không qua các middleware sau
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',  # Tạm thời vô hiệu hóa trong quá trình phát triển
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'core.middleware.JWTAuthMiddleware',  # JWT middleware - bỏ qua vì đã dùng DRF authentication
-    'core.middleware.SessionTimeoutMiddleware',  # Add session timeout middleware
-    'core.user_middleware.UserSessionTimeoutMiddleware',  # Add user session timeout middleware
+    'core.middleware.SessionTimeoutMiddleware',  # Session timeout của admin và khách hàng
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -88,12 +90,17 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # PostgreSQL kèm số liệu kết nối của từng worker (core.db_backend)
+        'ENGINE': 'core.db_backend',
         'NAME': os.environ.get('DATABASE_NAME', 'gamine_admin'),
         'USER': os.environ.get('DATABASE_USER', 'postgres'),
         'PASSWORD': os.environ.get('DATABASE_PASSWORD', '1412'),
         'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
         'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Kiểm tra kết nối giữ lại trước khi dùng cho request mới (xem DATABASE_CONN_MAX_AGE bên dưới)
+        'CONN_HEALTH_CHECKS': True,
+        # Bật khi đi qua PgBouncer ở chế độ transaction (server-side cursor cần giữ nguyên kết nối)
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DATABASE_DISABLE_SERVER_SIDE_CURSORS') == '1',
     }
 }
 
@@ -161,7 +168,10 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
+# Cho phép admin panel đọc tên file của API xuất dữ liệu
+CORS_EXPOSE_HEADERS = ['content-disposition']
 
 # CSRF configuration - vô hiệu hóa cho môi trường phát triển
 CSRF_TRUSTED_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
@@ -186,8 +196,89 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Phân trang keyset, chỉ bật khi request có tham số cursor/page_size/count
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
 }
 
+# Số dòng mặc định và tối đa mỗi trang của các API danh sách
+PAGINATION_PAGE_SIZE = 50
+PAGINATION_MAX_PAGE_SIZE = 200
+
+# Thời gian cache (giây) của các API public như khuyến mãi, blog, FAQ
+RESPONSE_CACHE_TTL = 300
+
+# Ghi nhật ký hoạt động người dùng theo lô bằng luồng nền (core.activity)
+ACTIVITY_QUEUE_SIZE = 10000
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_FLUSH_INTERVAL = 1.0
+ACTIVITY_MAX_BATCH_EVENTS = 100
+
+# Số ngày giữ lại các bảng nhật ký trong database, dòng cũ hơn được lưu ra file
+# bằng lệnh `manage.py archive_logs` (core.retention)
+LOG_RETENTION_DAYS = {
+    'audit_log': 365,
+    'user_activity_log': 180,
+    'activity_event': 400,
+}
+LOG_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')
+
+# Thời gian (giây) giữ response của header Idempotency-Key cho checkout/tạo đơn hàng/cập nhật kho
+# (core.idempotency), key hết hạn được xóa bằng lệnh `manage.py purge_idempotency_keys`
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Thời gian (giây) giữ hàng cho sản phẩm trong giỏ (core.reservations), hàng giữ quá hạn
+# được trả lại bằng lệnh `manage.py release_expired_reservations`
+STOCK_RESERVATION_TTL = 15 * 60
+
+# Redis cho phiên đăng nhập và cache (core.redis_pool, mỗi worker một connection pool).
+# Khi Redis không khả dụng, phiên được lưu trong file SQLite dùng chung giữa các worker (core.session_store)
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_MAX_CONNECTIONS = 50
+
+# Chế độ chạy server: 'wsgi' (gunicorn sync worker, mặc định) hoặc 'asgi' (gunicorn + uvicorn worker).
+# Với 'asgi', các API đọc public của cửa hàng dùng view async trong core.async_views
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
+
+# Kết nối PostgreSQL của mỗi worker, số liệu tại /api/database/connections/:
+# - Mặc định giữ kết nối DATABASE_CONN_MAX_AGE giây giữa các request thay vì mở/đóng ở mỗi request.
+#   Với ASGI mỗi request chạy ORM trong thread riêng nên kết nối không dùng lại được, mặc định 0
+# - DATABASE_POOL=1: pool của psycopg 3 trong mỗi worker (DATABASE_POOL_MIN_SIZE..DATABASE_POOL_MAX_SIZE
+#   kết nối, chờ tối đa DATABASE_POOL_TIMEOUT giây khi hết kết nối). Cần Django >= 5.1 và
+#   `pip install "psycopg[binary,pool]"`, dùng được cho cả WSGI và ASGI.
+#   Nên dùng khi chạy ASGI: số kết nối của worker không vượt DATABASE_POOL_MAX_SIZE dù có nhiều request đồng thời,
+#   request chờ kết nối rảnh (mặc định tối đa 30 giây với ASGI) thay vì mở thêm kết nối
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', 0 if ASYNC_VIEWS else 60))
+DATABASE_POOL = os.environ.get('DATABASE_POOL', '0') == '1'
+DATABASE_POOL_MIN_SIZE = int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2))
+DATABASE_POOL_MAX_SIZE = int(os.environ.get('DATABASE_POOL_MAX_SIZE', 10))
+DATABASE_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', 30 if ASYNC_VIEWS else 10))
+
+if DATABASE_POOL:
+    import django
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        psycopg_pool = None
+    if psycopg_pool is None or django.VERSION < (5, 1):
+        logging.getLogger(__name__).warning(
+            "DATABASE_POOL cần Django >= 5.1 và psycopg[pool], dùng kết nối giữ lại (DATABASE_CONN_MAX_AGE)"
+        )
+        DATABASE_POOL = False
+
+if DATABASE_POOL:
+    # Kết nối được trả về pool sau mỗi request nên không dùng CONN_MAX_AGE
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': DATABASE_POOL_MIN_SIZE,
+            'max_size': DATABASE_POOL_MAX_SIZE,
+            'timeout': DATABASE_POOL_TIMEOUT,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
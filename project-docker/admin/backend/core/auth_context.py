@@ -0,0 +1,148 @@
+import json
+
+import jwt as pyjwt
+from django.conf import settings
+
+from .cache import LocalCache, guarded_redis_call
+from .models import Admin, Users
+
+# Thời gian giữ thông tin tài khoản đã xác thực (giây): trong bộ nhớ mỗi tiến trình và trong Redis.
+# Bản trong tiến trình không bị xóa ở worker khác nên giữ rất ngắn.
+PRINCIPAL_LOCAL_TTL = getattr(settings, 'PRINCIPAL_LOCAL_TTL', 5)
+PRINCIPAL_CACHE_TTL = getattr(settings, 'PRINCIPAL_CACHE_TTL', 60)
+PRINCIPAL_LOCAL_SIZE = 1024
+PRINCIPAL_KEY_PREFIX = 'principal'
+
+PRINCIPAL_MODELS = {
+    'admin': Admin,
+    'user': Users,
+}
+# Không lưu mật khẩu trong cache, trường này được nạp lại từ database khi cần
+_EXCLUDED_FIELDS = {'password'}
+
+_local_principals = LocalCache(max_size=PRINCIPAL_LOCAL_SIZE)
+
+
+class AuthContext:
+    """
+    Thông tin đọc từ header Authorization của một request.
+
+    kind là 'admin', 'user' hoặc None; claims là payload của JWT (None với token
+    dạng user_<id>_<hash> hoặc token không hợp lệ).
+    """
+
+    def __init__(self, token=None, kind=None, principal_id=None, claims=None, error=None):
+        self.token = token
+        self.kind = kind
+        self.principal_id = principal_id
+        self.claims = claims
+        self.error = error
+
+    @property
+    def admin_id(self):
+        return self.principal_id if self.kind == 'admin' else None
+
+
+def parse_token(token):
+    """Đọc token: dạng user_<id>_<hash> của khách hàng, hoặc JWT (kiểm tra chữ ký HS256)"""
+    if token.startswith('user_'):
+        parts = token.split('_')
+        try:
+            return AuthContext(token, 'user', int(parts[1]))
+        except (IndexError, ValueError):
+            return AuthContext(token, error='Token người dùng không hợp lệ')
+
+    try:
+        claims = pyjwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=['HS256'],
+            options={"verify_exp": False}  # Bỏ qua kiểm tra hết hạn
+        )
+    except pyjwt.exceptions.PyJWTError as e:
+        return AuthContext(token, error=f'Lỗi JWT: {str(e)}')
+
+    if claims.get('admin_id') is not None:
+        return AuthContext(token, 'admin', claims['admin_id'], claims)
+    if claims.get('user_id') is not None:
+        return AuthContext(token, 'user', claims['user_id'], claims)
+    return AuthContext(token, claims=claims, error='Token không có admin_id hoặc user_id')
+
+
+def get_auth_context(request):
+    """
+    AuthContext của request, token chỉ được đọc và kiểm tra chữ ký một lần rồi lưu trên request
+    để middleware và JWTAuthentication dùng chung. Nhận HttpRequest hoặc Request của DRF.
+    """
+    request = getattr(request, '_request', request)
+    context = getattr(request, 'auth_context', None)
+    if context is None:
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            context = parse_token(auth_header.split(' ')[1])
+        else:
+            context = AuthContext()
+        request.auth_context = context
+    return context
+
+
+def _principal_key(kind, principal_id):
+    return f'{PRINCIPAL_KEY_PREFIX}:{kind}:{principal_id}'
+
+
+def _dump(instance):
+    data = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in _EXCLUDED_FIELDS:
+            continue
+        value = field.value_from_object(instance)
+        if value is not None and not isinstance(value, (bool, int, float, str)):
+            # datetime... lưu dạng chuỗi, to_python đọc lại khi tạo đối tượng
+            value = field.value_to_string(instance)
+        data[field.attname] = value
+    return data
+
+
+def _load(model, data):
+    """Tạo lại đối tượng như khi đọc từ database, mật khẩu là trường hoãn nạp (deferred)"""
+    fields = [field for field in model._meta.concrete_fields if field.attname in data]
+    return model.from_db(
+        'default',
+        [field.attname for field in fields],
+        [field.to_python(data[field.attname]) for field in fields],
+    )
+
+
+def get_principal(kind, principal_id):
+    """
+    Admin hoặc Users theo id, đọc từ cache trong tiến trình, rồi Redis, rồi database.
+    Trả về None nếu tài khoản không tồn tại.
+    """
+    model = PRINCIPAL_MODELS[kind]
+    key = _principal_key(kind, principal_id)
+    data = _local_principals.get(key)
+    if data is not None:
+        return _load(model, data)
+
+    raw = guarded_redis_call('get', key)
+    if raw is not None:
+        data = json.loads(raw)
+
+    if data is None:
+        instance = model.objects.defer(*_EXCLUDED_FIELDS).filter(pk=principal_id).first()
+        if instance is None:
+            return None
+        data = _dump(instance)
+        guarded_redis_call('set', key, json.dumps(data), ex=PRINCIPAL_CACHE_TTL)
+        _local_principals.set(key, data, PRINCIPAL_LOCAL_TTL * 1000)
+        return instance
+
+    _local_principals.set(key, data, PRINCIPAL_LOCAL_TTL * 1000)
+    return _load(model, data)
+
+
+def invalidate_principal(kind, principal_id):
+    """Xóa tài khoản khỏi cache sau khi cập nhật, vô hiệu hóa hoặc xóa"""
+    key = _principal_key(kind, principal_id)
+    _local_principals.delete(key)
+    guarded_redis_call('delete', key)
@@ -0,0 +1,410 @@
+import asyncio
+import functools
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .redis_pool import CircuitBreaker, get_async_client, get_client
+
+# Client Redis cho cache response trên pool dùng chung của core.redis_pool (chỉ kết nối khi gửi lệnh
+# đầu tiên). Redis lỗi hay không được dùng quyết định ở từng lời gọi qua _breaker, xem _call
+redis_client = getattr(settings, 'REDIS_CLIENT', None) or get_client()
+
+# Thời gian cache mặc định của response (giây)
+RESPONSE_CACHE_TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+# Số response tối đa giữ trong bộ nhớ khi không có Redis
+LOCAL_CACHE_SIZE = 256
+
+KEY_PREFIX = 'respcache'
+# Thời gian giữ dấu phiên bản của tập dữ liệu (giây), dấu được tính lại ngay khi tag thay đổi.
+# Không giữ lâu hơn response đã cache: thay đổi không làm đổi tag (ghi thẳng vào database,
+# tag chỉ đổi trong bộ nhớ khi Redis lỗi) chỉ bị bỏ qua trong thời gian này
+STAMP_TTL = RESPONSE_CACHE_TTL
+# Mọi tag dùng với invalidate_cache_tags, tăng phiên bản tất cả khi Redis hoạt động trở lại
+CACHE_TAGS = (
+    'products', 'categories', 'reviews', 'promotions', 'blogs', 'faqs', 'careers', 'terms', 'social-media',
+)
+
+
+class LocalCache:
+    """Cache LRU trong tiến trình, dùng khi Redis không khả dụng (và cho cache tài khoản, xem core.auth_context)"""
+
+    def __init__(self, max_size=LOCAL_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_ms):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_ms / 1000, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class _RedisBackend:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl_ms):
+        self.client.set(key, value, px=ttl_ms)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def versions(self, tags):
+        values = self.client.mget([f'{KEY_PREFIX}:tag:{tag}' for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags):
+        pipe = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f'{KEY_PREFIX}:tag:{tag}')
+        pipe.execute()
+
+
+class _AsyncRedisBackend:
+    """Như _RedisBackend cho view async, dùng client redis.asyncio của event loop hiện tại"""
+
+    async def get(self, key):
+        value = await get_async_client().get(key)
+        return value.decode('utf-8') if value is not None else None
+
+    async def set(self, key, value, ttl_ms):
+        await get_async_client().set(key, value, px=ttl_ms)
+
+    async def versions(self, tags):
+        values = await get_async_client().mget([f'{KEY_PREFIX}:tag:{tag}' for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+
+_local_backend = LocalCache()
+_redis_backend = _RedisBackend(redis_client)
+_async_backend = _AsyncRedisBackend()
+
+
+def _bump_all_tags():
+    """
+    Khi mạch ngắt, invalidate_cache_tags chỉ tăng phiên bản trong bộ nhớ của worker đã ghi nên
+    response và dấu phiên bản trong Redis có thể đã cũ: làm mất hiệu lực tất cả khi Redis trở lại.
+    """
+    try:
+        _redis_backend.bump(CACHE_TAGS)
+    except redis.RedisError as e:
+        print(f"Warning: Response cache: không tăng được phiên bản tag sau khi Redis trở lại: {str(e)}")
+
+
+# Dùng chung cho lời gọi sync và async: Redis lỗi liên tiếp thì mọi lời gọi đi thẳng vào bộ nhớ
+_breaker = CircuitBreaker('Response cache', on_recover=_bump_all_tags)
+
+
+def _call(method, *args):
+    """Gọi Redis, chuyển sang cache trong bộ nhớ khi Redis lỗi hoặc mạch đang ngắt"""
+    if _breaker.allow():
+        try:
+            result = getattr(_redis_backend, method)(*args)
+            _breaker.success()
+            return result
+        except redis.RedisError as e:
+            _breaker.failure(e)
+    return getattr(_local_backend, method)(*args)
+
+
+async def _acall(method, *args):
+    """Như _call cho view async"""
+    if _breaker.allow():
+        try:
+            result = await getattr(_async_backend, method)(*args)
+            _breaker.success()
+            return result
+        except redis.RedisError as e:
+            _breaker.failure(e)
+    return getattr(_local_backend, method)(*args)
+
+
+def guarded_redis_call(method, *args, **kwargs):
+    """
+    Gọi một lệnh của redis_client qua cùng mạch với cache response (dùng cho cache khác
+    trên Redis), trả về None khi Redis lỗi hoặc mạch đang ngắt.
+    """
+    if not _breaker.allow():
+        return None
+    try:
+        result = getattr(redis_client, method)(*args, **kwargs)
+        _breaker.success()
+        return result
+    except redis.RedisError as e:
+        _breaker.failure(e)
+        return None
+
+
+def invalidate_cache_tags(*tags):
+    """
+    Làm mất hiệu lực các response đã cache gắn với `tags`.
+    Gọi sau khi create/update/destroy dữ liệu tương ứng.
+    """
+    if tags:
+        _call('bump', tags)
+
+
+def promotion_boundary_ttl(now=None):
+    """
+    Số giây tới thời điểm gần nhất có khuyến mãi bắt đầu hoặc kết thúc,
+    để response về khuyến mãi hết hạn đúng lúc danh sách thay đổi.
+    """
+    from .models import Promotions
+
+    now = now or timezone.now()
+    boundaries = Promotions.objects.aggregate(
+        next_start=Min('start_date', filter=Q(start_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gte=now)),
+    )
+    upcoming = [boundary for boundary in boundaries.values() if boundary is not None]
+    if not upcoming:
+        return None
+    # Khuyến mãi hết hạn ngay sau end_date (end_date__gte=now vẫn còn hiệu lực)
+    return max((min(upcoming) - now).total_seconds(), 0) + 0.001
+
+
+def _cache_key(name, request, kwargs, versions):
+    # request.GET: cùng QueryDict với request.query_params của DRF, view sync và async dùng chung key
+    params = sorted(
+        (key, value)
+        for key in request.GET
+        for value in request.GET.getlist(key)
+    )
+    raw = json.dumps([
+        request.get_host(),
+        params,
+        sorted(kwargs.items()),
+        versions,
+    ], default=str)
+    return f'{KEY_PREFIX}:{name}:{hashlib.sha1(raw.encode("utf-8")).hexdigest()}'
+
+
+def _cache_ttl_ms(ttl, boundary):
+    ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+    if boundary is not None:
+        ttl = min(ttl, boundary)
+    return int(math.ceil(ttl * 1000))
+
+
+def cached_view_response(request, name, tags, build, ttl=None, ttl_func=None, kwargs=None):
+    """
+    Trả về response đã cache của view `name` nếu có, nếu không gọi `build()`
+    và lưu kết quả (chỉ cache response 200).
+    """
+    if request.method != 'GET':
+        return build()
+
+    key = _cache_key(name, request, kwargs or {}, _call('versions', tags))
+    cached = _call('get', key)
+    if cached is not None:
+        return Response(json.loads(cached))
+
+    response = build()
+    if response.status_code != 200 or not isinstance(response, Response):
+        return response
+
+    ttl_ms = _cache_ttl_ms(ttl, ttl_func() if ttl_func is not None else None)
+    if ttl_ms > 0:
+        _call('set', key, json.dumps(response.data, cls=JSONEncoder), ttl_ms)
+    return response
+
+
+async def acached_view_response(request, name, tags, build, ttl=None, ttl_func=None, kwargs=None):
+    """Như cached_view_response cho view async: `build` là coroutine function, Redis được gọi bằng client async"""
+    if request.method != 'GET':
+        return await build()
+
+    key = _cache_key(name, request, kwargs or {}, await _acall('versions', tags))
+    cached = await _acall('get', key)
+    if cached is not None:
+        return Response(json.loads(cached))
+
+    response = await build()
+    if response.status_code != 200 or not isinstance(response, Response):
+        return response
+
+    ttl_ms = _cache_ttl_ms(ttl, await sync_to_async(ttl_func)() if ttl_func is not None else None)
+    if ttl_ms > 0:
+        await _acall('set', key, json.dumps(response.data, cls=JSONEncoder), ttl_ms)
+    return response
+
+
+def cache_response(name, tags, ttl=None, ttl_func=None):
+    """
+    Cache response của API public theo endpoint + query params.
+
+    Dùng ngay trên hàm view (dưới @api_view/@permission_classes):
+
+        @api_view(['GET'])
+        @permission_classes([AllowAny])
+        @cache_response('faqs_frontend', tags=['faqs'])
+        def faqs_frontend(request): ...
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached_view_response(
+                request, name, tags,
+                lambda: view(request, *args, **kwargs),
+                ttl=ttl, ttl_func=ttl_func, kwargs=kwargs
+            )
+        return wrapper
+    return decorator
+
+
+def acache_response(name, tags, ttl=None, ttl_func=None):
+    """Như cache_response cho hàm view async (core.async_views)"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            return await acached_view_response(
+                request, name, tags,
+                lambda: view(request, *args, **kwargs),
+                ttl=ttl, ttl_func=ttl_func, kwargs=kwargs
+            )
+        return wrapper
+    return decorator
+
+
+def _collection_models():
+    from .models import Blog, Categories, Products, Promotions, Reviews
+
+    # Tên tập dữ liệu trùng với tag dùng ở invalidate_cache_tags
+    return {
+        'products': Products,
+        'categories': Categories,
+        'reviews': Reviews,
+        'promotions': Promotions,
+        'blogs': Blog,
+    }
+
+
+def _fingerprint(name, now):
+    """
+    Dấu phiên bản của tập dữ liệu: max(updated_at) + số dòng (xóa dòng làm đổi số dòng).
+    Trả về (dấu, thời điểm sửa gần nhất, thời điểm dấu hết hạn hoặc None).
+    """
+    from .pricing import active_promotions_q
+
+    model = _collection_models()[name]
+    state = model.objects.aggregate(last=Max('updated_at'), total=Count('pk'))
+    parts = [state['last'], state['total']]
+    expires_at = None
+    if name == 'promotions':
+        # Khuyến mãi bắt đầu/kết thúc làm đổi giá hiển thị mà không có thao tác ghi nào
+        parts.append(sorted(
+            model.objects.filter(active_promotions_q(now, prefix='')).values_list('pk', flat=True)
+        ))
+        boundary = promotion_boundary_ttl(now)
+        if boundary is not None:
+            expires_at = now.timestamp() + boundary
+    raw = json.dumps(parts, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16], state['last'], expires_at
+
+
+def _is_current_stamp(stored, versions, now):
+    return (
+        stored is not None
+        and stored['versions'] == versions
+        and (stored['expires_at'] is None or stored['expires_at'] > now.timestamp())
+    )
+
+
+def collection_stamp(name):
+    """
+    Dấu phiên bản (etag, last_modified) của tập dữ liệu `name`.
+
+    Dấu được lưu cùng phiên bản tag của tập dữ liệu nên chỉ cần một lần đọc cache;
+    sau khi invalidate_cache_tags(name) dấu được tính lại bằng một truy vấn aggregate.
+    """
+    key = f'{KEY_PREFIX}:stamp:{name}'
+    versions = _call('versions', [name])
+    now = timezone.now()
+    # Khi mạch ngắt phiên bản tag chỉ đổi trong bộ nhớ của từng worker: không đọc/lưu dấu, tính lại mỗi lần
+    shared = not _breaker.is_open
+
+    cached = _call('get', key) if shared else None
+    stored = json.loads(cached) if cached is not None else None
+    if _is_current_stamp(stored, versions, now):
+        return stored['etag'], datetime.fromisoformat(stored['modified'])
+
+    etag, modified, expires_at = _fingerprint(name, now)
+    modified = modified or now
+    if stored is not None:
+        previous = datetime.fromisoformat(stored['modified'])
+        if stored['etag'] == etag:
+            modified = previous
+        elif modified <= previous:
+            # Dữ liệu đổi mà max(updated_at) không tăng (xóa dòng, khuyến mãi hết hạn)
+            modified = now
+
+    if not shared:
+        return etag, modified
+    _call('set', key, json.dumps({
+        'versions': versions,
+        'etag': etag,
+        'modified': modified.isoformat(),
+        'expires_at': expires_at,
+    }), STAMP_TTL * 1000)
+    return etag, modified
+
+
+async def acollection_stamp(name):
+    """
+    Như collection_stamp cho view async: phiên bản tag và dấu được đọc cùng lúc bằng client async,
+    chỉ khi dấu cần tính lại mới chạy truy vấn aggregate (qua sync_to_async).
+    """
+    if _breaker.is_open:
+        return await sync_to_async(collection_stamp)(name)
+    versions, cached = await asyncio.gather(
+        _acall('versions', [name]), _acall('get', f'{KEY_PREFIX}:stamp:{name}')
+    )
+    stored = json.loads(cached) if cached is not None else None
+    if _is_current_stamp(stored, versions, timezone.now()):
+        return stored['etag'], datetime.fromisoformat(stored['modified'])
+    return await sync_to_async(collection_stamp)(name)
@@ -0,0 +1,152 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import invalidate_cache_tags
+from .models import Cart, OrderDetails, Orders, Payments, ProductReservedStock, Products, StockReservation
+from .pricing import PriceBook
+from .reservations import adjust_reserved, release_expired_for_products
+from .stats import order_snapshot, record_order_change
+
+# Phí vận chuyển cố định mỗi đơn hàng (VND)
+SHIPPING_COST = 30000
+
+
+def new_transaction_id():
+    """Mã giao dịch duy nhất: thời điểm tạo (để dễ đọc) + 64 bit ngẫu nhiên"""
+    return f"TXN{timezone.now():%Y%m%d%H%M%S}{uuid.uuid4().hex[:16].upper()}"
+
+
+class CheckoutError(ValueError):
+    """Không tạo được đơn hàng từ giỏ hàng (giỏ trống, không đủ hàng...)"""
+
+    def __init__(self, message, unavailable=None):
+        super().__init__(message)
+        # Các sản phẩm không đủ hàng: {product_id, name, requested, available}
+        self.unavailable = unavailable or []
+
+
+def checkout_cart(user, shipping_address, payment_method='COD'):
+    """
+    Tạo đơn hàng từ giỏ hàng của người dùng trong một transaction.
+
+    Các dòng giỏ hàng, lượt giữ hàng và sản phẩm được khóa (SELECT ... FOR UPDATE, sản phẩm
+    theo thứ tự product_id để các checkout đồng thời không deadlock), số lượng có thể bán
+    (không tính hàng đang giữ cho giỏ hàng khác) được kiểm tra rồi tồn kho được trừ bằng
+    biểu thức F() và hàng đang giữ được chuyển thành hàng đã bán (core.reservations).
+    Giá của cả giỏ hàng được tính bằng một PriceBook.
+    Lỗi ở bất kỳ bước nào sẽ hủy toàn bộ đơn hàng.
+
+    Trả về (order, price_book). Raise CheckoutError nếu giỏ trống hoặc không đủ hàng.
+    """
+    with transaction.atomic():
+        cart_items = list(
+            Cart.objects.select_for_update().filter(user=user, order__isnull=True).order_by('cart_id')
+        )
+        if not cart_items:
+            raise CheckoutError('Giỏ hàng trống, không thể tạo đơn hàng')
+
+        quantities = {}
+        for item in cart_items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+        # Hàng đang giữ cho giỏ hàng này (kể cả lượt giữ đã hết hạn nhưng chưa được trả lại)
+        holds = list(StockReservation.objects.select_for_update().filter(
+            cart_id__in=[item.cart_id for item in cart_items]
+        ))
+        held = {}
+        for hold in holds:
+            held[hold.product_id] = held.get(hold.product_id, 0) + hold.quantity
+
+        products = {
+            product.product_id: product
+            for product in Products.objects.select_for_update(of=('self',)).select_related(
+                'effective_price'
+            ).filter(product_id__in=quantities).order_by('product_id')
+        }
+        release_expired_for_products(list(products), [item.cart_id for item in cart_items])
+        # Đọc sau khi khóa sản phẩm để có số lượng đang giữ mới nhất
+        reserved = dict(
+            ProductReservedStock.objects.filter(product_id__in=quantities).values_list('product_id', 'reserved_quantity')
+        )
+
+        unavailable = []
+        for product in products.values():
+            # Số lượng có thể bán cho giỏ hàng này: tồn kho trừ hàng đang giữ cho giỏ hàng khác
+            available = product.stock_quantity - reserved.get(product.product_id, 0) + held.get(product.product_id, 0)
+            if available < quantities[product.product_id]:
+                unavailable.append({
+                    'product_id': product.product_id,
+                    'name': product.name,
+                    'requested': quantities[product.product_id],
+                    'available': max(available, 0),
+                })
+        if unavailable:
+            names = ', '.join(item['name'] for item in unavailable)
+            raise CheckoutError(f'Số lượng trong kho không đủ cho: {names}', unavailable)
+
+        for item in cart_items:
+            item.product = products[item.product_id]
+
+        # Tính giá khuyến mãi cho toàn bộ giỏ hàng trong một lần
+        price_book = PriceBook().ensure(products.values())
+        total_amount = sum(price_book.discounted_price(item.product) * item.quantity for item in cart_items)
+        total_amount += SHIPPING_COST
+
+        order = Orders.objects.create(
+            user=user,
+            customer_name=user.username,
+            customer_email=user.email,
+            customer_phone=user.phone,
+            shipping_address=shipping_address,
+            total_amount=total_amount,
+            order_status='Pending'
+        )
+        # Cập nhật số liệu thống kê theo ngày
+        record_order_change(None, order_snapshot(order))
+
+        OrderDetails.objects.bulk_create([
+            OrderDetails(
+                order=order,
+                product=item.product,
+                quantity=item.quantity,
+                price=price_book.discounted_price(item.product)  # Lưu giá đã giảm
+            )
+            for item in cart_items
+        ])
+
+        # Trừ tồn kho bằng một câu lệnh UPDATE với biểu thức F()
+        now = timezone.now()
+        Products.objects.bulk_update([
+            Products(
+                product_id=product_id,
+                stock_quantity=F('stock_quantity') - quantity,
+                sold_quantity=F('sold_quantity') + quantity,
+                updated_at=now,
+            )
+            for product_id, quantity in quantities.items()
+        ], ['stock_quantity', 'sold_quantity', 'updated_at'])
+        # Các dòng đang bị khóa nên có thể cập nhật giá trị trong bộ nhớ trực tiếp
+        for product_id, quantity in quantities.items():
+            products[product_id].stock_quantity -= quantity
+            products[product_id].sold_quantity += quantity
+            products[product_id].updated_at = now
+        # Chuyển hàng đang giữ thành hàng đã bán
+        StockReservation.objects.filter(reservation_id__in=[hold.reservation_id for hold in holds]).delete()
+        adjust_reserved({product_id: -quantity for product_id, quantity in held.items()})
+
+        # Gán đơn hàng cho các dòng giỏ hàng để đánh dấu đã đặt hàng
+        Cart.objects.filter(cart_id__in=[item.cart_id for item in cart_items]).update(order=order)
+
+        Payments.objects.create(
+            order=order,
+            payment_method=payment_method,
+            payment_status='Pending',
+            transaction_id=new_transaction_id()
+        )
+
+        transaction.on_commit(lambda: invalidate_cache_tags('products'))
+
+    return order, price_book
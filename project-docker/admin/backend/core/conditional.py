@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cache import acollection_stamp, collection_stamp
+
+
+def _combine_stamps(collections, stamps):
+    raw = '|'.join(f'{name}:{etag}' for name, (etag, _) in zip(collections, stamps))
+    etag = '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+    last_modified = int(max(modified for _, modified in stamps).timestamp())
+    return etag, last_modified
+
+
+def collection_etag(collections):
+    """ETag và Last-Modified (timestamp) của response phụ thuộc các tập dữ liệu `collections`"""
+    return _combine_stamps(collections, [collection_stamp(name) for name in collections])
+
+
+async def acollection_etag(collections):
+    """Như collection_etag, dấu trong Redis của các tập dữ liệu được đọc đồng thời (dấu cần tính lại vẫn truy vấn lần lượt)"""
+    stamps = await asyncio.gather(*(acollection_stamp(name) for name in collections))
+    return _combine_stamps(collections, stamps)
+
+
+def _not_modified(request, etag, last_modified):
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        # Giữ các header xác thực để trình duyệt tiếp tục dùng bản đã lưu
+        not_modified.headers['ETag'] = etag
+        not_modified.headers['Last-Modified'] = http_date(last_modified)
+    return not_modified
+
+
+def _add_validators(response, etag, last_modified):
+    if response.status_code == 200:
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # Trình duyệt luôn hỏi lại server (rẻ nhờ 304) thay vì tự đoán thời gian cache
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_response(request, collections, build):
+    """
+    Trả về 304 Not Modified nếu If-None-Match/If-Modified-Since của request còn khớp
+    với phiên bản hiện tại của `collections`, không gọi `build()` (không serialize).
+    Nếu không, gọi `build()` và gắn ETag/Last-Modified vào response 200.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return build()
+
+    etag, last_modified = collection_etag(collections)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    return _add_validators(build(), etag, last_modified)
+
+
+async def aconditional_response(request, collections, build):
+    """Như conditional_response cho view async: `build` là coroutine function"""
+    if request.method not in ('GET', 'HEAD'):
+        return await build()
+
+    etag, last_modified = await acollection_etag(collections)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    return _add_validators(await build(), etag, last_modified)
+
+
+def conditional_view(*collections):
+    """
+    Hỗ trợ GET có điều kiện cho API viết dạng hàm, đặt ngay trên hàm view
+    (trên @cache_response nếu có):
+
+        @api_view(['GET'])
+        @permission_classes([AllowAny])
+        @conditional_view('reviews')
+        def get_product_reviews(request, product_id): ...
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return conditional_response(
+                request, collections, lambda: view(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def aconditional_view(*collections):
+    """Như conditional_view cho hàm view async (core.async_views)"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            return await aconditional_response(
+                request, collections, lambda: view(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Hỗ trợ GET có điều kiện cho list/retrieve của ViewSet.
+    Khai báo các tập dữ liệu mà response phụ thuộc ở `conditional_collections`.
+    """
+    conditional_collections = ()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_collections,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_collections,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
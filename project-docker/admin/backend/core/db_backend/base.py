@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+
+class ConnectionStats:
+    """
+    Số liệu kết nối database của worker hiện tại.
+
+    checkouts: số lần lấy kết nối. Không dùng pool thì mỗi lần là một kết nối mới tới PostgreSQL
+    (hoặc PgBouncer), với pool là một lần lấy kết nối từ pool.
+    wait_ms_*: thời gian lấy kết nối (mở kết nối mới hoặc chờ pool).
+    releases: số lần đóng kết nối / trả kết nối về pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.counters = {'checkouts': 0, 'checkout_errors': 0, 'releases': 0}
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def _ensure_process(self):
+        # Không tính số liệu của tiến trình cha sau khi gunicorn fork
+        if self._pid != os.getpid():
+            self._reset()
+
+    def checkout(self, wait_ms):
+        with self._lock:
+            self._ensure_process()
+            self.counters['checkouts'] += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def count(self, name):
+        with self._lock:
+            self._ensure_process()
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            self._ensure_process()
+            stats = dict(self.counters)
+            stats['wait_ms_total'] = round(self.wait_ms_total, 3)
+            stats['wait_ms_avg'] = round(self.wait_ms_total / stats['checkouts'], 3) if stats['checkouts'] else 0.0
+            stats['wait_ms_max'] = round(self.wait_ms_max, 3)
+        stats['pid'] = self._pid
+        return stats
+
+
+connection_stats = ConnectionStats()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except Exception:
+            connection_stats.count('checkout_errors')
+            raise
+        connection_stats.checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+    def _close(self):
+        had_connection = self.connection is not None
+        result = super()._close()
+        if had_connection:
+            connection_stats.count('releases')
+        return result
@@ -0,0 +1,134 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# Thời gian giữ response của một key (giây), sau đó key có thể được dùng lại
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Mã băm của người gửi, method, đường dẫn và nội dung request"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = sorted(data.lists())
+    user = getattr(request, 'user', None)
+    raw = json.dumps([
+        type(user).__name__,
+        getattr(user, 'pk', None),
+        request.method,
+        request.path,
+        data,
+    ], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Lấy (và khóa) bản ghi của key, tạo mới nếu chưa có hoặc đã hết hạn.
+    Trả về (bản ghi, True nếu request này được xử lý).
+
+    Gọi trong transaction: request trùng key gửi đồng thời sẽ chờ ở khóa dòng
+    (hoặc ở unique index khi cùng INSERT) cho tới khi request đầu tiên commit.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+    record = IdempotencyKey.objects.select_for_update().filter(scope=scope, key=key).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=fingerprint, created_at=now, expires_at=expires_at
+                ), True
+        except IntegrityError:
+            # Request khác cùng key vừa commit
+            record = IdempotencyKey.objects.select_for_update().get(scope=scope, key=key)
+
+    if record.expires_at <= now:
+        record.fingerprint = fingerprint
+        record.status_code = None
+        record.response_body = None
+        record.created_at = now
+        record.expires_at = expires_at
+        record.save()
+        return record, True
+    return record, False
+
+
+def _replay(record):
+    response = Response(json.loads(record.response_body), status=record.status_code)
+    response[f'{IDEMPOTENCY_HEADER}-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Hỗ trợ header Idempotency-Key cho API tạo/cập nhật dữ liệu.
+
+    Request đầu tiên với một key được xử lý bình thường, response thành công (2xx) được lưu
+    cùng transaction với dữ liệu view ghi ra. Request gửi lại cùng key và cùng nội dung trong
+    IDEMPOTENCY_KEY_TTL nhận lại response đó; cùng key nhưng khác nội dung trả về 422.
+    Response lỗi không được lưu và mọi thay đổi của view bị hủy, client có thể gửi lại.
+    Request không có header được xử lý như cũ.
+
+    Dùng ngay trên hàm view (dưới @api_view/@permission_classes):
+
+        @api_view(['POST'])
+        @permission_classes([AllowAny])
+        @idempotent('checkout')
+        def create_order_from_cart(request): ...
+
+    hoặc với method của ViewSet: @method_decorator(idempotent('orders'))
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH or not key.isprintable():
+                return Response(
+                    {"error": f"{IDEMPOTENCY_HEADER} không hợp lệ (tối đa {MAX_KEY_LENGTH} ký tự)"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            fingerprint = request_fingerprint(request)
+            with transaction.atomic():
+                record, claimed = _claim(scope, key, fingerprint)
+                if not claimed:
+                    if record.fingerprint != fingerprint:
+                        return Response(
+                            {"error": f"{IDEMPOTENCY_HEADER} đã được dùng cho một yêu cầu khác"},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                        )
+                    return _replay(record)
+
+                response = view(request, *args, **kwargs)
+                if not isinstance(response, Response) or not status.is_success(response.status_code):
+                    transaction.set_rollback(True)
+                    return response
+
+                record.status_code = response.status_code
+                record.response_body = json.dumps(response.data, cls=JSONEncoder)
+                record.save(update_fields=['status_code', 'response_body'])
+                return response
+        return wrapper
+    return decorator
+
+
+def purge_expired_keys(now=None):
+    """Xóa các key đã hết hạn, trả về số dòng đã xóa"""
+    now = now or timezone.now()
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+    return deleted
@@ -0,0 +1,191 @@
+import codecs
+import csv
+import json
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_cache_tags
+from .models import AuditLog, Products
+
+# Số dòng mỗi transaction khi nhập kho hàng loạt
+INVENTORY_CHUNK_SIZE = 500
+# Số lỗi tối đa trả về chi tiết (vẫn đếm tất cả)
+MAX_REPORTED_FAILURES = 1000
+INVENTORY_FORMATS = ('csv', 'jsonl')
+
+
+class InventoryRowError(ValueError):
+    pass
+
+
+def _to_int(value, name):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value) if isinstance(value, str) else value
+        if isinstance(number, bool) or int(number) != number:
+            raise ValueError
+        return int(number)
+    except (TypeError, ValueError):
+        raise InventoryRowError(f'{name} phải là số nguyên')
+
+
+def parse_row(row):
+    """
+    Đọc một dòng nhập kho: product_id và đúng một trong hai cột
+    delta (số lượng cộng thêm, âm để trừ) hoặc stock_quantity (số lượng tồn kho mới).
+    Trả về (product_id, stock_quantity hoặc None, delta).
+    """
+    if not isinstance(row, dict):
+        raise InventoryRowError('Mỗi dòng phải là một object')
+    product_id = _to_int(row.get('product_id'), 'product_id')
+    if product_id is None:
+        raise InventoryRowError('Thiếu product_id')
+    delta = _to_int(row.get('delta'), 'delta')
+    absolute = _to_int(row.get('stock_quantity'), 'stock_quantity')
+    if (delta is None) == (absolute is None):
+        raise InventoryRowError('Cần đúng một trong hai cột delta hoặc stock_quantity')
+    if absolute is not None and absolute < 0:
+        raise InventoryRowError('stock_quantity không được âm')
+    return product_id, absolute, delta or 0
+
+
+def read_csv_rows(stream):
+    """Đọc từng dòng CSV (có dòng tiêu đề) từ file nhị phân hoặc văn bản: (số dòng, dict)"""
+    if 'b' in getattr(stream, 'mode', 'b'):
+        stream = codecs.getreader('utf-8-sig')(stream)
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_json_lines(stream):
+    """Đọc từng dòng JSON Lines (mỗi dòng một object): (số dòng, dict hoặc lỗi)"""
+    for line_number, line in enumerate(stream, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, InventoryRowError('Dòng JSON không hợp lệ')
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        return read_csv_rows(stream)
+    if file_format == 'jsonl':
+        return read_json_lines(stream)
+    raise ValueError(f'Định dạng phải là một trong: {", ".join(INVENTORY_FORMATS)}')
+
+
+def _update_stock(new_stock, now):
+    """Ghi số lượng tồn kho mới bằng UPDATE ... FROM (VALUES ...), chia nhỏ theo giới hạn tham số"""
+    qn = connection.ops.quote_name
+    table = qn(Products._meta.db_table)
+    items = sorted(new_stock.items())
+    max_params = connection.features.max_query_params or 2000
+    step = max(1, (max_params - 1) // 2)
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), step):
+            batch = items[start:start + step]
+            values = ', '.join(['(%s, %s)'] * len(batch))
+            params = [now]
+            for product_id, stock in batch:
+                params += [product_id, stock]
+            cursor.execute(
+                f'UPDATE {table} SET {qn("stock_quantity")} = v.column2, {qn("updated_at")} = %s '
+                f'FROM (VALUES {values}) AS v WHERE {table}.{qn("product_id")} = v.column1',
+                params
+            )
+
+
+def _apply_chunk(rows, admin_id, source, dry_run):
+    """
+    Áp dụng một đợt dòng đã kiểm tra trong một transaction. Các sản phẩm được khóa theo
+    thứ tự product_id (cùng thứ tự với checkout) rồi ghi bằng một câu lệnh UPDATE.
+    Trả về (số dòng đã áp dụng, danh sách lỗi).
+    """
+    failures = []
+    with transaction.atomic():
+        stock = dict(
+            Products.objects.select_for_update().filter(product_id__in={row[1] for row in rows})
+            .order_by('product_id').values_list('product_id', 'stock_quantity')
+        )
+        new_stock = {}
+        applied = 0
+        added = removed = 0
+        for line, product_id, absolute, delta in rows:
+            if product_id not in stock:
+                failures.append({'line': line, 'product_id': product_id, 'error': 'Sản phẩm không tồn tại'})
+                continue
+            current = new_stock.get(product_id, stock[product_id])
+            value = (absolute if absolute is not None else current) + delta
+            if value < 0:
+                failures.append({
+                    'line': line, 'product_id': product_id,
+                    'error': f'Không đủ hàng trong kho. Hiện chỉ có {current} sản phẩm.'
+                })
+                continue
+            new_stock[product_id] = value
+            applied += 1
+            if value > current:
+                added += value - current
+            else:
+                removed += current - value
+
+        if new_stock:
+            _update_stock(new_stock, timezone.now())
+            # Ghi một dòng nhật ký tóm tắt cho cả đợt
+            AuditLog.objects.create(
+                admin_id=admin_id,
+                action=f"Nhập kho hàng loạt{f' ({source})' if source else ''}: "
+                       f"{applied} dòng, {len(new_stock)} sản phẩm, +{added}/-{removed}",
+                table_name='Products',
+            )
+        if dry_run:
+            transaction.set_rollback(True)
+    return applied, failures
+
+
+def import_stock(rows, admin_id=None, source='', chunk_size=INVENTORY_CHUNK_SIZE, dry_run=False):
+    """
+    Nhập kho từ các dòng (số dòng, dict) đọc theo luồng, mỗi `chunk_size` dòng một transaction,
+    nên bộ nhớ không phụ thuộc kích thước file. Lỗi của từng dòng không chặn các dòng khác.
+    Trả về {'rows', 'applied', 'failed', 'batches', 'failures'}.
+    """
+    result = {'rows': 0, 'applied': 0, 'failed': 0, 'batches': 0, 'failures': []}
+
+    def fail(items):
+        result['failed'] += len(items)
+        room = MAX_REPORTED_FAILURES - len(result['failures'])
+        result['failures'].extend(items[:max(room, 0)])
+
+    def flush(chunk):
+        applied, failures = _apply_chunk(chunk, admin_id, source, dry_run)
+        result['applied'] += applied
+        result['batches'] += 1
+        fail(failures)
+
+    chunk = []
+    for line, row in rows:
+        result['rows'] += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            chunk.append((line, *parse_row(row)))
+        except InventoryRowError as e:
+            fail([{'line': line, 'product_id': row.get('product_id') if isinstance(row, dict) else None,
+                   'error': str(e)}])
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    if result['applied'] and not dry_run:
+        invalidate_cache_tags('products')
+    return result
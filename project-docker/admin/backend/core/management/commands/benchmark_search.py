@@ -0,0 +1,84 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from core.models import Categories, ProductDetails, Products
+from core.search import legacy_search_scores, search_product_ids, update_search_vectors
+
+BRANDS = ['Logitech', 'Razer', 'Corsair', 'SteelSeries', 'HyperX', 'Asus', 'MSI', 'Akko', 'Dareu', 'Fuhlen']
+KINDS = ['Chuột', 'Bàn phím', 'Tai nghe', 'Lót chuột', 'Ghế', 'Màn hình', 'Micro', 'Webcam']
+TRAITS = ['Gaming', 'Wireless', 'RGB', 'Pro', 'Mini', 'TKL', 'Hero', 'Ultra', 'Lite', 'X']
+SPECS = ['DPI 16000', 'Switch Red', 'Switch Blue', 'Bluetooth 5.0', 'USB-C', '144Hz', '7.1 Surround', 'Pin 70 giờ']
+DEFAULT_QUERIES = ['logitech', 'chuột gaming', 'razer wireless', 'switch red', 'bàn phím tkl rgb', 'g502']
+
+
+class Command(BaseCommand):
+    help = 'So sánh tốc độ tìm kiếm toàn văn với cách chấm điểm cũ trên danh mục sản phẩm giả lập'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Số sản phẩm giả lập')
+        parser.add_argument('--repeat', type=int, default=5, help='Số lần chạy mỗi truy vấn')
+        parser.add_argument('--query', action='append', dest='queries', help='Từ khóa tìm kiếm (có thể lặp lại)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Benchmark tìm kiếm toàn văn cần PostgreSQL')
+
+        queries = options['queries'] or DEFAULT_QUERIES
+        # Dữ liệu giả lập được tạo trong transaction và rollback khi kết thúc
+        with transaction.atomic():
+            category = self._build_catalog(options['products'])
+            self.stdout.write(f'Đã tạo {options["products"]} sản phẩm giả lập')
+
+            catalog = Products.objects.filter(category=category)
+            for query in queries:
+                legacy_time = self._measure(options['repeat'], lambda: self._legacy_search(catalog, query))
+                indexed_time = self._measure(options['repeat'], lambda: search_product_ids(query, queryset=catalog))
+                self.stdout.write(
+                    f'{query!r}: cũ {legacy_time * 1000:.1f} ms, '
+                    f'toàn văn {indexed_time * 1000:.1f} ms (x{legacy_time / max(indexed_time, 1e-9):.0f})'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Hoàn tất benchmark, dữ liệu giả lập đã được xóa'))
+
+    def _build_catalog(self, size, batch_size=5000):
+        rng = random.Random(42)
+        category = Categories.objects.create(name='Benchmark', description='Dữ liệu benchmark tìm kiếm')
+        product_ids = []
+        for start in range(0, size, batch_size):
+            products = Products.objects.bulk_create([
+                Products(
+                    name=f'{rng.choice(KINDS)} {rng.choice(BRANDS)} {rng.choice(TRAITS)} G{rng.randint(100, 999)}',
+                    description=f'{rng.choice(KINDS)} {rng.choice(TRAITS).lower()} chính hãng {rng.choice(BRANDS)}',
+                    price=rng.randint(100, 5000) * 1000,
+                    stock_quantity=rng.randint(0, 100),
+                    category=category,
+                )
+                for _ in range(min(batch_size, size - start))
+            ])
+            ProductDetails.objects.bulk_create([
+                ProductDetails(product=product, specification=', '.join(rng.sample(SPECS, 3)))
+                for product in products
+            ])
+            product_ids.extend(product.product_id for product in products)
+        update_search_vectors(product_ids)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_products')
+        return category
+
+    def _legacy_search(self, catalog, query):
+        # Cách cũ: đọc toàn bộ sản phẩm rồi chấm điểm trong Python
+        rows = catalog.values_list('product_id', 'name', 'description', 'detail__specification')
+        product_scores = legacy_search_scores(rows, query)
+        return sorted(product_scores, key=lambda product_id: -product_scores[product_id])[:20]
+
+    def _measure(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
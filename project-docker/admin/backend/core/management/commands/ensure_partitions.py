@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core.partitions import PARTITION_MONTHS_AHEAD, ensure_partitions, uses_partitions
+
+class Command(BaseCommand):
+    help = 'Tạo trước các partition theo tháng cho các bảng nhật ký (PostgreSQL)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                            help='Số tháng tạo partition trước')
+    
+    def handle(self, *args, **options):
+        if not uses_partitions():
+            self.stdout.write('Database không phải PostgreSQL, bỏ qua')
+            return
+        
+        created = ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'Đã tạo partition {name}')
+        self.stdout.write(self.style.SUCCESS(f'Đã tạo {len(created)} partition'))
@@ -0,0 +1,48 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from core.inventory import INVENTORY_CHUNK_SIZE, INVENTORY_FORMATS, import_stock, read_rows
+
+class Command(BaseCommand):
+    help = 'Nhập tồn kho hàng loạt từ file CSV hoặc JSON Lines (product_id + delta hoặc stock_quantity)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Đường dẫn file, "-" để đọc từ stdin')
+        parser.add_argument('--format', choices=INVENTORY_FORMATS,
+                            help='Định dạng file (mặc định: theo phần mở rộng, CSV nếu không rõ)')
+        parser.add_argument('--chunk-size', type=int, default=INVENTORY_CHUNK_SIZE,
+                            help='Số dòng mỗi transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Chỉ kiểm tra dữ liệu, không ghi vào database')
+    
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if not file_format:
+            file_format = 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+        
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+        
+        try:
+            result = import_stock(
+                read_rows(stream, file_format),
+                source=os.path.basename(path) if path != '-' else 'stdin',
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        
+        for failure in result['failures']:
+            self.stdout.write(f"Dòng {failure['line']} (product_id={failure['product_id']}): {failure['error']}")
+        if result['failed'] > len(result['failures']):
+            self.stdout.write(f"... và {result['failed'] - len(result['failures'])} lỗi khác")
+        verb = 'Sẽ áp dụng' if options['dry_run'] else 'Đã áp dụng'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['applied']}/{result['rows']} dòng trong {result['batches']} đợt, {result['failed']} dòng lỗi"
+        ))
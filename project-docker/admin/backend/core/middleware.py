@@ -1,75 +1,96 @@
 import jwt as pyjwt
+import re
 import time
-import json
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.http import JsonResponse
+from .auth_context import get_auth_context
+from .session_store import SESSION_KEY_FORMATS, SESSION_TIMEOUT, delete_session, refresh_session
 from .models import Admin
 
+# Các đường dẫn không kiểm tra phiên: đăng nhập/đăng ký, heartbeat (tự kiểm tra phiên)
+# và các API công khai của cửa hàng (kết quả như nhau dù request có token hay không)
+SESSION_EXEMPT_PATHS = re.compile(r'^/api/(?:%s)' % '|'.join([
+    r'login/$',
+    r'customer/(?:login|register)/$',
+    r'(?:admin|user)-session/',
+    r'session-heartbeat/$',
+    r'frontend/',
+    r'client/(?:promotions|terms-conditions|careers)/$',
+    r'active-promotions/$',
+    r'product-details/',
+    r'products/(?:suggest|availability)/$',
+    r'reviews/(?:product/|summary/$)',
+    r'user-activity/track/(?:batch/)?$',
+    r'newsletter/subscribe/$',
+]))
+
 class SessionTimeoutMiddleware:
     """
-    Middleware to track admin session activity and enforce a 5-minute timeout
+    Middleware to track admin and user session activity and enforce a 5-minute timeout
     """
+    # Chạy được cả WSGI và ASGI; với ASGI chỉ request cần kiểm tra phiên mới chuyển sang thread
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Skip middleware for login path
-        if request.path == '/api/login/':
-            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = None
+        if self._needs_check(request):
+            response = self._check_session(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = None
+        if self._needs_check(request):
+            response = await sync_to_async(self._check_session)(request)
+        return response if response is not None else await self.get_response(request)
+
+    def _needs_check(self, request):
+        # Skip session work for anonymous requests and exempt paths
+        # (token được đọc một lần và dùng chung với JWTAuthentication)
+        context = get_auth_context(request)
+        if context.kind is None or SESSION_EXEMPT_PATHS.match(request.path):
+            return False
+        # Admin token, hoặc token JWT có user_id của khách hàng
+        # (token dạng user_<id>_<hash> không bị giới hạn phiên như trước)
+        return context.kind == 'admin' or bool(context.claims)
+
+    def _check_session(self, request):
+        """Trả về response 401 nếu phiên đã hết hạn, None nếu request được tiếp tục"""
+        context = get_auth_context(request)
+        try:
+            current_time = int(time.time())
+            session_key = SESSION_KEY_FORMATS[context.kind].format(context.principal_id)
             
-        # Check for activity timestamp for admin paths
-        auth_header = request.headers.get('Authorization', '')
-        if auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
+            # Check and refresh the last activity time in one store operation
+            last_active = refresh_session(session_key, current_time)
             
-            try:
-                # Try to decode the token to get admin_id
-                payload = pyjwt.decode(
-                    token, 
-                    settings.SECRET_KEY, 
-                    algorithms=['HS256'],
-                    options={"verify_exp": False}
-                )
-                
-                admin_id = payload.get('admin_id')
-                
-                # If this is an admin user, check/update the last activity
-                if admin_id:
-                    current_time = int(time.time())
-                    session_key = f"admin_session_{admin_id}"
-                    
-                    # Check if we need to get session data from Redis/storage
-                    from .views import get_session_data, set_session_data, SESSION_TIMEOUT, delete_session_data
-                    
-                    # Get last activity time
-                    session_data = get_session_data(session_key)
-                    
-                    # Check session timeout except for checking status or updating activity endpoints
-                    if session_data and not (request.path == '/api/admin-session/check/' or request.path == '/api/admin-session/update/'):
-                        last_active = session_data.get('last_active', 0)
-                        time_since_last_activity = current_time - last_active
-                        
-                        # If session has timed out, return 401
-                        if time_since_last_activity > SESSION_TIMEOUT:
-                            delete_session_data(session_key)
-                            return JsonResponse({
-                                'status': 'timeout',
-                                'message': 'Your session has timed out. Please login again.'
-                            }, status=401)
-                    
-                    # Update the last activity timestamp in the request
-                    request.last_active = current_time
-                    
-                    # Store the session key for later use
-                    request.session_key = session_key
-                    
-            except Exception as e:
-                print(f"Session middleware error: {str(e)}")
-                # Continue processing even if token is invalid
-                pass
-        
-        response = self.get_response(request)
-        return response
+            # If session has timed out, return 401
+            if last_active is not None and current_time - last_active > SESSION_TIMEOUT:
+                delete_session(session_key)
+                return JsonResponse({
+                    'status': 'timeout',
+                    'message': 'Your session has timed out. Please login again.'
+                }, status=401)
+            
+            # Update the last activity timestamp in the request
+            request.last_active = current_time
+            
+            # Store the session key for later use
+            request.session_key = session_key
+            
+        except Exception as e:
+            print(f"Session middleware error: {str(e)}")
+            # Continue processing even if session storage fails
+            pass
+        return None
 
 class JWTAuthMiddleware:
     def __init__(self, get_response):
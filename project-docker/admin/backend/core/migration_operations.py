@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+
+class AddIndexOnPostgres(migrations.AddIndex):
+    """Chỉ mục GIN chỉ tạo được trên PostgreSQL, bỏ qua với các backend khác"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def _create_partitioned_table(schema_editor, model, partition_field):
+    """Tạo bảng của model chia partition theo khoảng giá trị `partition_field`, kèm partition mặc định"""
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    partition_column = model._meta.get_field(partition_field).column
+    columns = []
+    for field in model._meta.local_concrete_fields:
+        if field.primary_key:
+            # Cột identity không dùng được trên bảng partition (trước PostgreSQL 17), dùng sequence
+            serial = 'bigserial' if field.get_internal_type() == 'BigAutoField' else 'serial'
+            columns.append(f'{qn(field.column)} {serial} NOT NULL')
+            continue
+        definition, _ = schema_editor.column_sql(model, field)
+        columns.append(f'{qn(field.column)} {definition}')
+    columns.append(f'PRIMARY KEY ({qn(model._meta.pk.column)}, {qn(partition_column)})')
+
+    schema_editor.execute(
+        f'CREATE TABLE {qn(table)} ({", ".join(columns)}) PARTITION BY RANGE ({qn(partition_column)})'
+    )
+    schema_editor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+
+def _add_foreign_keys(schema_editor, model):
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    for field in model._meta.local_concrete_fields:
+        if field.remote_field is None or not field.db_constraint:
+            continue
+        schema_editor.execute(
+            f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f"{table}_{field.column}_fk")} '
+            f'FOREIGN KEY ({qn(field.column)}) '
+            f'REFERENCES {qn(field.remote_field.model._meta.db_table)} ({qn(field.target_field.column)}) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+def _copy_rows(schema_editor, model, source_table):
+    """Chép toàn bộ dòng từ `source_table` sang bảng của model và đặt lại sequence khóa chính"""
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    columns = ', '.join(qn(field.column) for field in model._meta.local_concrete_fields)
+    pk_column = model._meta.pk.column
+    schema_editor.execute(f'INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(source_table)}')
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({qn(pk_column)}), 1), MAX({qn(pk_column)}) IS NOT NULL) "
+        f"FROM {qn(table)}",
+        [table, pk_column]
+    )
+
+
+class CreateModelPartitionedByMonth(migrations.CreateModel):
+    """
+    CreateModel, trên PostgreSQL bảng được chia partition theo tháng của cột `partition_field`
+    kèm một partition mặc định nhận các dòng chưa có partition riêng (xem core.partitions).
+    Khóa chính trong database gồm khóa chính của model và cột partition.
+    """
+
+    def __init__(self, *args, partition_field, **kwargs):
+        self.partition_field = partition_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs['partition_field'] = self.partition_field
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+            return
+
+        model = to_state.apps.get_model(app_label, self.name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        _create_partitioned_table(schema_editor, model, self.partition_field)
+        _add_foreign_keys(schema_editor, model)
+
+
+class PartitionTableByMonth(migrations.operations.base.Operation):
+    """
+    Chuyển bảng đã có của model thành bảng chia partition theo tháng của `partition_field`
+    (chỉ PostgreSQL, không đổi trạng thái model). Partition được tạo cho mỗi tháng đang có dữ liệu,
+    cùng tên với core.partitions, rồi dữ liệu được chép sang và bảng cũ bị xóa.
+    """
+    reversible = True
+
+    def __init__(self, model_name, partition_field):
+        self.model_name = model_name
+        self.partition_field = partition_field
+
+    def deconstruct(self):
+        return self.__class__.__name__, [], {
+            'model_name': self.model_name,
+            'partition_field': self.partition_field,
+        }
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _fetch(self, schema_editor, sql, params):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _retire_table(self, schema_editor, model):
+        """
+        Đổi tên bảng hiện tại thành <bảng>_old và giải phóng tên sequence, ràng buộc, chỉ mục
+        để bảng mới dùng lại. Trả về tên bảng cũ.
+        """
+        qn = schema_editor.quote_name
+        table = model._meta.db_table
+        old_table = f'{table}_old'
+        sequence = self._fetch(schema_editor, 'SELECT pg_get_serial_sequence(%s, %s)', [table, model._meta.pk.column])[0]
+
+        schema_editor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}')
+        if sequence:
+            # pg_get_serial_sequence trả về tên đã có schema và dấu nháy
+            schema_editor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {qn(old_table + "_seq")}')
+        # Bỏ qua ràng buộc NOT NULL (PostgreSQL >= 18 lưu trong pg_constraint, không xóa được trên cột khóa chính)
+        for name in self._fetch(
+            schema_editor, "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype <> 'n'", [old_table]
+        ):
+            schema_editor.execute(f'ALTER TABLE {qn(old_table)} DROP CONSTRAINT {qn(name)}')
+        for name in self._fetch(schema_editor, 'SELECT indexname FROM pg_indexes WHERE tablename = %s', [old_table]):
+            schema_editor.execute(f'DROP INDEX {qn(name)}')
+        return old_table
+
+    def _create_month_partitions(self, schema_editor, model, source_table):
+        qn = schema_editor.quote_name
+        table = model._meta.db_table
+        column = model._meta.get_field(self.partition_field).column
+        months = self._fetch(
+            schema_editor,
+            f"SELECT DISTINCT date_trunc('month', {qn(column)} AT TIME ZONE 'UTC')::date FROM {qn(source_table)} "
+            f"WHERE {qn(column)} IS NOT NULL",
+            []
+        )
+        for month in months:
+            end = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+            schema_editor.execute(
+                f'CREATE TABLE {qn(f"{table}_{month:%Y%m}")} PARTITION OF {qn(table)} '
+                f"FOR VALUES FROM ('{month.isoformat()}T00:00:00+00:00') TO ('{end.isoformat()}T00:00:00+00:00')"
+            )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        old_table = self._retire_table(schema_editor, model)
+        _create_partitioned_table(schema_editor, model, self.partition_field)
+        self._create_month_partitions(schema_editor, model, old_table)
+        _copy_rows(schema_editor, model, old_table)
+        schema_editor.execute(f'DROP TABLE {schema_editor.quote_name(old_table)} CASCADE')
+
+        # Tạo lại khóa ngoại và chỉ mục sau khi chép dữ liệu
+        _add_foreign_keys(schema_editor, model)
+        for field in model._meta.local_concrete_fields:
+            if field.db_index and not field.unique and not field.primary_key:
+                schema_editor.execute(schema_editor._create_index_sql(model, fields=[field]))
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        old_table = self._retire_table(schema_editor, model)
+        schema_editor.create_model(model)
+        _copy_rows(schema_editor, model, old_table)
+        schema_editor.execute(f'DROP TABLE {schema_editor.quote_name(old_table)} CASCADE')
+
+    def describe(self):
+        return f'Partition {self.model_name} by month of {self.partition_field}'
+
+    @property
+    def migration_name_fragment(self):
+        return f'partition_{self.model_name.lower()}'
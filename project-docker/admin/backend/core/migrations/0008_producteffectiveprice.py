@@ -0,0 +1,24 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_useractivitylog_device_useractivitylog_ip_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductEffectivePrice',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='effective_price', serialize=False, to='core.products')),
+                ('regular_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount_percentage', models.IntegerField(default=0)),
+                ('discounted_price', models.DecimalField(db_index=True, decimal_places=2, max_digits=10)),
+                ('valid_until', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('promotion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.promotions')),
+            ],
+        ),
+    ]
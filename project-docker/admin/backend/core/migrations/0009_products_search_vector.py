@@ -0,0 +1,39 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.migration_operations import AddIndexOnPostgres
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("""
+        UPDATE core_products AS p SET search_vector =
+            setweight(to_tsvector('simple', COALESCE(p.name, '')), 'A')
+            || setweight(to_tsvector('simple', COALESCE(p.description, '')), 'B')
+            || setweight(to_tsvector('simple', COALESCE((
+                SELECT d.specification FROM core_productdetails AS d
+                WHERE d.product_id = p.product_id LIMIT 1
+            ), '')), 'C')
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_producteffectiveprice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        AddIndexOnPostgres(
+            model_name='products',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='products_search_vector_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.migration_operations import AddIndexOnPostgres
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_products_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexOnPostgres(
+            model_name='categories',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='categories_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexOnPostgres(
+            model_name='products',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='products_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+STATUS_FIELDS = {
+    'Pending': 'pending_orders',
+    'Processing': 'processing_orders',
+    'In transit': 'in_transit_orders',
+    'Completed': 'completed_orders',
+    'Cancelled': 'cancelled_orders',
+}
+
+
+def populate_sales_rollups(apps, schema_editor):
+    Orders = apps.get_model('core', 'Orders')
+    OrderDetails = apps.get_model('core', 'OrderDetails')
+    Users = apps.get_model('core', 'Users')
+    DailySalesRollup = apps.get_model('core', 'DailySalesRollup')
+
+    rows = {}
+
+    def row(day):
+        return rows.setdefault(day, DailySalesRollup(day=day))
+
+    orders = Orders.objects.annotate(day=TruncDate('created_at')).values('day', 'order_status').annotate(
+        count=Count('order_id'),
+        revenue=Sum('total_amount', filter=Q(order_status='Completed')),
+    ).order_by()
+    for item in orders:
+        rollup = row(item['day'])
+        rollup.orders_count += item['count']
+        if item['order_status'] in STATUS_FIELDS:
+            field = STATUS_FIELDS[item['order_status']]
+            setattr(rollup, field, getattr(rollup, field) + item['count'])
+        rollup.revenue += item['revenue'] or 0
+
+    units = OrderDetails.objects.filter(order__order_status='Completed').annotate(
+        day=TruncDate('order__created_at')
+    ).values('day').annotate(units=Sum('quantity')).order_by()
+    for item in units:
+        row(item['day']).units_sold += item['units'] or 0
+
+    users = Users.objects.annotate(day=TruncDate('created_at')).values('day').annotate(
+        count=Count('user_id')
+    ).order_by()
+    for item in users:
+        row(item['day']).new_users += item['count']
+
+    DailySalesRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_productratingsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('orders_count', models.IntegerField(default=0)),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('processing_orders', models.IntegerField(default=0)),
+                ('in_transit_orders', models.IntegerField(default=0)),
+                ('completed_orders', models.IntegerField(default=0)),
+                ('cancelled_orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_sold', models.IntegerField(default=0)),
+                ('new_users', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_sales_rollups, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone
-from decimal import Decimal
 
 # Models dựa trên cấu trúc cơ sở dữ liệu
 
@@ -56,6 +57,13 @@ class AuditLog(models.Model):
     table_name = models.CharField(max_length=100, null=True)
     record_id = models.IntegerField(null=True)
     created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Trên PostgreSQL bảng được chia partition theo tháng của created_at (core.partitions, core.retention)
+        indexes = [
+            models.Index(fields=['created_at'], name='auditlog_created_idx'),
+            models.Index(fields=['table_name', 'record_id'], name='auditlog_table_record_idx'),
+        ]
     
     def __str__(self):
         return f"{self.admin.username if self.admin else 'Unknown'} - {self.action}"
@@ -89,15 +97,69 @@ class UserActivityLog(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     device = models.CharField(max_length=255, null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+
+    class Meta:
+        # Trên PostgreSQL bảng được chia partition theo tháng của created_at (core.partitions, core.retention)
+        indexes = [
+            models.Index(fields=['created_at'], name='useractivitylog_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.action}"
 
+class ActivityEvent(models.Model):
+    """
+    Sự kiện hoạt động của người dùng trên trang (xem trang, tìm kiếm, xem sản phẩm...)
+    lưu theo cột để thống kê bằng truy vấn trên chỉ mục.
+
+    Trên PostgreSQL bảng được chia partition theo tháng của created_at (core.partitions),
+    khóa chính thật trong database là (event_id, created_at).
+    """
+    EVENT_TYPE_CHOICES = [
+        ('page_view', 'Page view'),
+        ('search', 'Search'),
+        ('product_view', 'Product view'),
+        ('category_view', 'Category view'),
+        ('promotion_view', 'Promotion view'),
+    ]
+
+    event_id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(Users, on_delete=models.CASCADE, db_index=False)
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES)
+    # Không dùng khóa ngoại để giữ lại lịch sử khi sản phẩm/danh mục/khuyến mãi bị xóa
+    product_id = models.IntegerField(null=True, blank=True)
+    category_id = models.IntegerField(null=True, blank=True)
+    promotion_id = models.IntegerField(null=True, blank=True)
+    search_query = models.CharField(max_length=255, blank=True, default='')
+    page_path = models.CharField(max_length=500, blank=True, default='')
+    device = models.CharField(max_length=255, null=True, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event_type', 'created_at'], name='activity_type_created_idx'),
+            models.Index(fields=['product_id', 'created_at'], name='activity_product_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.event_type}"
+
 class Categories(models.Model):
     category_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(null=True, blank=True)
     img_url = models.TextField(null=True, blank=True)
+    # Hình ảnh đại diện (ảnh chính hoặc ảnh đầu tiên), cập nhật qua core.images
+    primary_image_url = models.TextField(null=True, blank=True, editable=False)
+    # Thời điểm sửa gần nhất, dùng làm dấu phiên bản cho ETag/Last-Modified (core.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['name'], name='categories_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
@@ -120,33 +182,29 @@ class Products(models.Model):
     sold_quantity = models.IntegerField(default=0)
     category = models.ForeignKey(Categories, on_delete=models.CASCADE)
     created_at = models.DateTimeField(default=timezone.now)
+    # Thời điểm sửa gần nhất, dùng làm dấu phiên bản cho ETag/Last-Modified (core.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Hình ảnh đại diện (ảnh chính hoặc ảnh đầu tiên), cập nhật qua core.images
+    primary_image_url = models.TextField(null=True, blank=True, editable=False)
+    # Chỉ mục tìm kiếm toàn văn (PostgreSQL), cập nhật qua core.search.update_search_vectors
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='products_search_vector_gin'),
+            # Gợi ý tìm kiếm chấp nhận lỗi chính tả (pg_trgm)
+            GinIndex(fields=['name'], name='products_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
         
     def get_discounted_price(self):
         """Tính giá sau khuyến mãi cho sản phẩm"""
-        # Lấy khuyến mãi áp dụng cho sản phẩm
-        product_promotions = ProductPromotions.objects.filter(product=self)
-        
-        # Lấy khuyến mãi áp dụng cho danh mục
-        category_promotions = ProductPromotions.objects.filter(category=self.category)
-        
-        # Tìm mức giảm giá cao nhất
-        max_discount = 0
-        for pp in list(product_promotions) + list(category_promotions):
-            if pp.promotion.discount_percentage > max_discount:
-                max_discount = pp.promotion.discount_percentage
-        
-        # Tính giá sau khuyến mãi
-        if max_discount > 0:
-            # Chuyển đổi max_discount thành Decimal để tránh lỗi khi thực hiện phép tính với Decimal
-            max_discount_decimal = Decimal(str(max_discount))
-            discount_factor = Decimal('1') - (max_discount_decimal / Decimal('100'))
-            discounted_price = self.price * discount_factor
-            return round(discounted_price, 2)
-        
-        return self.price
+        # Khi cần giá cho nhiều sản phẩm, dùng PriceBook trong core.pricing
+        # để tránh truy vấn khuyến mãi cho từng sản phẩm
+        from .pricing import PriceBook
+        return PriceBook().discounted_price(self)
 
 class ProductImages(models.Model):
     image_id = models.AutoField(primary_key=True)
@@ -173,6 +231,8 @@ class Promotions(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     img_banner = models.TextField(null=True, blank=True)
+    # Thời điểm sửa gần nhất, dùng làm dấu phiên bản cho ETag/Last-Modified (core.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def __str__(self):
         return self.title
@@ -200,6 +260,20 @@ class ProductPromotions(models.Model):
             from django.core.exceptions import ValidationError
             raise ValidationError("Chỉ có thể chọn sản phẩm hoặc danh mục, không phải cả hai")
 
+class ProductEffectivePrice(models.Model):
+    """Giá hiệu lực đã tính sẵn của sản phẩm (xem core.pricing)"""
+    product = models.OneToOneField(Products, primary_key=True, related_name='effective_price', on_delete=models.CASCADE)
+    regular_price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount_percentage = models.IntegerField(default=0)
+    discounted_price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)
+    promotion = models.ForeignKey(Promotions, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Thời điểm giá có thể thay đổi (khuyến mãi bắt đầu hoặc kết thúc), None nếu không có
+    valid_until = models.DateTimeField(null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Effective price for product #{self.product_id}"
+
 class Reviews(models.Model):
     review_id = models.AutoField(primary_key=True)
     product = models.ForeignKey(Products, on_delete=models.CASCADE)
@@ -207,10 +281,38 @@ class Reviews(models.Model):
     rating = models.IntegerField()
     comment = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Thời điểm sửa gần nhất, dùng làm dấu phiên bản cho ETag/Last-Modified (core.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def __str__(self):
         return f"{self.user.username} - {self.product.name}"
 
+class ProductRatingSummary(models.Model):
+    """Tổng hợp đánh giá của sản phẩm, cập nhật tăng dần khi thêm/sửa đánh giá (xem core.reviews)"""
+    product = models.OneToOneField(Products, primary_key=True, related_name='rating_summary', on_delete=models.CASCADE)
+    review_count = models.IntegerField(default=0)
+    rating_total = models.IntegerField(default=0)
+    # Số đánh giá theo từng mức sao
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Rating summary for product #{self.product_id}"
+
+class ProductReservedStock(models.Model):
+    """
+    Tổng số lượng sản phẩm đang được giữ cho các giỏ hàng (xem core.reservations).
+    Số lượng có thể bán = stock_quantity - reserved_quantity
+    """
+    product = models.OneToOneField(Products, primary_key=True, related_name='reserved_stock', on_delete=models.CASCADE)
+    reserved_quantity = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Reserved stock for product #{self.product_id}"
+
 class Orders(models.Model):
     ORDER_STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -235,6 +337,27 @@ class Orders(models.Model):
             return f"Order #{self.order_id} - {self.user.username}"
         return f"Order #{self.order_id} - {self.customer_name or 'Guest'}"
 
+class DailySalesRollup(models.Model):
+    """
+    Số liệu bán hàng theo ngày (theo ngày tạo đơn hàng / ngày đăng ký người dùng),
+    cập nhật tăng dần khi đơn hàng đổi trạng thái (xem core.stats)
+    """
+    day = models.DateField(primary_key=True)
+    orders_count = models.IntegerField(default=0)
+    # Số đơn hàng theo trạng thái hiện tại
+    pending_orders = models.IntegerField(default=0)
+    processing_orders = models.IntegerField(default=0)
+    in_transit_orders = models.IntegerField(default=0)
+    completed_orders = models.IntegerField(default=0)
+    cancelled_orders = models.IntegerField(default=0)
+    # Doanh thu và số sản phẩm đã bán của các đơn hàng hoàn thành
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_sold = models.IntegerField(default=0)
+    new_users = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Sales rollup {self.day}"
+
 class OrderDetails(models.Model):
     order_detail_id = models.AutoField(primary_key=True)
     order = models.ForeignKey(Orders, related_name='details', on_delete=models.CASCADE)
@@ -256,6 +379,18 @@ class Cart(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.product.name}"
 
+class StockReservation(models.Model):
+    """Số lượng sản phẩm giữ cho một dòng giỏ hàng tới `expires_at` (xem core.reservations)"""
+    reservation_id = models.AutoField(primary_key=True)
+    cart = models.OneToOneField(Cart, related_name='reservation', on_delete=models.CASCADE)
+    product = models.ForeignKey(Products, on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Reservation {self.quantity} x product #{self.product_id} for cart #{self.cart_id}"
+
 class Payments(models.Model):
     payment_id = models.AutoField(primary_key=True)
     order = models.OneToOneField(Orders, on_delete=models.CASCADE)
@@ -267,11 +402,37 @@ class Payments(models.Model):
     def __str__(self):
         return f"Payment for Order #{self.order.order_id}"
 
+class IdempotencyKey(models.Model):
+    """
+    Response đã trả cho một Idempotency-Key, để request gửi lại (retry) nhận lại
+    đúng response đó thay vì tạo đơn hàng/cập nhật kho lần nữa (xem core.idempotency)
+    """
+    key_id = models.BigAutoField(primary_key=True)
+    # Tên endpoint, cùng một key có thể dùng cho các endpoint khác nhau
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    # Mã băm của người gửi + method + đường dẫn + nội dung request
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.IntegerField(null=True, blank=True)
+    response_body = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('scope', 'key')
+
+    def __str__(self):
+        return f"{self.scope}: {self.key}"
+
 class Blog(models.Model):
     blog_id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
+    # Thời điểm sửa gần nhất, dùng làm dấu phiên bản cho ETag/Last-Modified (core.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Hình ảnh đại diện (ảnh chính hoặc ảnh đầu tiên), cập nhật qua core.images
+    primary_image_url = models.TextField(null=True, blank=True, editable=False)
     
     def __str__(self):
         return self.title
@@ -0,0 +1,148 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Các bảng chia partition theo tháng (PostgreSQL): tên bảng -> cột thời gian
+PARTITIONED_TABLES = {
+    'core_activityevent': 'created_at',
+    'core_auditlog': 'created_at',
+    'core_useractivitylog': 'created_at',
+}
+# Số tháng tạo partition trước, để dòng mới không rơi vào partition mặc định
+PARTITION_MONTHS_AHEAD = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+
+
+def uses_partitions():
+    return connection.vendor == 'postgresql'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(table, month):
+    return f'{table}_{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _bound(month):
+    # Ranh giới partition theo giờ UTC, dạng hằng SQL
+    return "'%s'" % partition_bounds(month)[0].isoformat()
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table AS pt
+            JOIN pg_class AS c ON c.oid = pt.partrelid
+            WHERE c.relname = %s
+            """,
+            [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table):
+    """Các partition theo tháng của bảng: danh sách (tên partition, ngày đầu tháng), theo thứ tự tháng"""
+    pattern = re.compile(r'^%s_(\d{4})(\d{2})$' % re.escape(table))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits AS i
+            JOIN pg_class AS parent ON parent.oid = i.inhparent
+            JOIN pg_class AS child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1).date()))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_month_partition(table, column, month):
+    """
+    Tạo partition cho tháng `month` và chuyển các dòng của tháng đó đang nằm
+    trong partition mặc định sang partition mới, trong một transaction.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(table, month)
+    start, end = _bound(month), _bound(next_month(month))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {qn(default_partition_name(table))} '
+            f'WHERE {qn(column)} >= {start} AND {qn(column)} < {end} RETURNING *'
+            f') INSERT INTO {qn(name)} SELECT * FROM moved'
+        )
+        cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ({start}) TO ({end})')
+    return name
+
+
+def months_in_default(table, column):
+    """Các tháng (ngày đầu tháng, UTC) đang có dòng trong partition mặc định"""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {qn(column)} AT TIME ZONE 'UTC')::date "
+            f"FROM {qn(default_partition_name(table))}"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ensure_monthly_partitions(table, column, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Tạo partition cho tháng hiện tại và `months_ahead` tháng tới, cùng các tháng
+    đang có dòng trong partition mặc định. Trả về tên các partition đã tạo.
+    """
+    if not uses_partitions() or not is_partitioned(table):
+        return []
+
+    existing = {month for _, month in list_partitions(table)}
+    month = month_start(timezone.now().astimezone(dt_timezone.utc).date())
+    wanted = set(months_in_default(table, column))
+    for _ in range(months_ahead + 1):
+        wanted.add(month)
+        month = next_month(month)
+
+    return [create_month_partition(table, column, month) for month in sorted(wanted - existing)]
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Tạo các partition còn thiếu cho tất cả bảng trong PARTITIONED_TABLES"""
+    created = []
+    for table, column in PARTITIONED_TABLES.items():
+        created += ensure_monthly_partitions(table, column, months_ahead)
+    return created
+
+
+def partition_bounds(month):
+    """Khoảng thời gian [bắt đầu, kết thúc) của partition tháng `month` (UTC)"""
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = next_month(month)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def drop_partition(table, name):
+    """Tách partition khỏi bảng và xóa (gọi trong transaction sau khi đã lưu trữ dữ liệu)"""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+        cursor.execute(f'DROP TABLE {qn(name)}')
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .models import Admin
+
 class IsAdminOrSelf(permissions.BasePermission):
     """
     Custom permission để cho phép admin chỉnh sửa thông tin của chính mình
@@ -22,4 +24,11 @@ class IsAdminOrSelf(permissions.BasePermission):
             return True
         
         # Admin thường chỉ có thể sửa thông tin của chính mình
-        return obj.admin_id == request.user.admin_id 
\ No newline at end of file
+        return obj.admin_id == request.user.admin_id 
+
+class IsAdminUser(permissions.BasePermission):
+    """
+    Chỉ cho phép tài khoản Admin (token của khách hàng Users cũng được xác thực)
+    """
+    def has_permission(self, request, view):
+        return isinstance(request.user, Admin)
@@ -0,0 +1,227 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProductEffectivePrice, ProductPromotions, Products
+
+
+def apply_discount(price, discount_percentage):
+    """Áp dụng phần trăm giảm giá lên giá gốc (làm tròn 2 chữ số)"""
+    if not discount_percentage or discount_percentage <= 0:
+        return price
+    # Chuyển đổi sang Decimal để tránh lỗi khi thực hiện phép tính với Decimal
+    discount_factor = Decimal('1') - (Decimal(str(discount_percentage)) / Decimal('100'))
+    return round(price * discount_factor, 2)
+
+
+def active_promotions_q(now, prefix='promotion__'):
+    """Điều kiện lọc các khuyến mãi đang trong thời gian hiệu lực"""
+    return Q(**{f'{prefix}start_date__lte': now, f'{prefix}end_date__gte': now})
+
+
+def _is_fresh(row, product, now):
+    return (
+        row is not None
+        and row.regular_price == product.price
+        and (row.valid_until is None or row.valid_until > now)
+    )
+
+
+class PriceBook:
+    """
+    Bảng giá khuyến mãi cho một tập sản phẩm.
+
+    Giá được đọc từ bảng ProductEffectivePrice nếu bản ghi còn hiệu lực.
+    Các sản phẩm còn lại được tính bằng một truy vấn duy nhất (khuyến mãi theo
+    sản phẩm + theo danh mục) rồi so sánh trong bộ nhớ. Bảng giá chỉ đọc, không ghi:
+    bảng ProductEffectivePrice được cập nhật bởi refresh_effective_prices (khi sửa
+    sản phẩm/khuyến mãi) và sweep_effective_prices (chạy định kỳ).
+    Chỉ các khuyến mãi còn hiệu lực tại thời điểm `now` mới được tính.
+    """
+
+    def __init__(self, now=None, materialized=True):
+        self.now = now or timezone.now()
+        self.materialized = materialized
+        # product_id -> (discount_percentage, promotion_id)
+        self._best = {}
+        # product_id -> giá sau khuyến mãi
+        self._prices = {}
+        # product_id -> thời điểm giá có thể thay đổi
+        self._valid_until = {}
+
+    def __contains__(self, product):
+        return product.pk in self._best
+
+    def ensure(self, products):
+        """Nạp giá khuyến mãi cho các sản phẩm chưa có trong bảng giá"""
+        missing = {}
+        for product in products:
+            if product is not None and product.pk not in self._best:
+                missing[product.pk] = product
+        if not missing:
+            return self
+
+        if self.materialized:
+            self._load_materialized(missing)
+        if missing:
+            self._compute(missing)
+        return self
+
+    def _remember(self, product_id, discount, promotion_id, price, valid_until):
+        self._best[product_id] = (discount, promotion_id)
+        self._prices[product_id] = price
+        self._valid_until[product_id] = valid_until
+
+    def _load_materialized(self, missing):
+        """Đọc giá đã tính sẵn, loại các sản phẩm đã có giá khỏi `missing`"""
+        cached_descriptor = Products.effective_price
+        unloaded = []
+        for product_id, product in list(missing.items()):
+            # Bản ghi đã được nạp qua select_related('effective_price')
+            if cached_descriptor.is_cached(product):
+                row = getattr(product, 'effective_price', None)
+                if _is_fresh(row, product, self.now):
+                    self._remember(product_id, row.discount_percentage, row.promotion_id,
+                                   row.discounted_price, row.valid_until)
+                    del missing[product_id]
+            else:
+                unloaded.append(product_id)
+
+        if not unloaded:
+            return
+        for row in ProductEffectivePrice.objects.filter(product_id__in=unloaded):
+            product = missing[row.product_id]
+            if _is_fresh(row, product, self.now):
+                self._remember(row.product_id, row.discount_percentage, row.promotion_id,
+                               row.discounted_price, row.valid_until)
+                del missing[row.product_id]
+
+    def _compute(self, missing):
+        product_ids = set(missing)
+        category_ids = {product.category_id for product in missing.values()}
+
+        # Khuyến mãi đang diễn ra hoặc sắp diễn ra (để biết thời điểm giá thay đổi)
+        links = ProductPromotions.objects.filter(
+            Q(product_id__in=product_ids) | Q(category_id__in=category_ids),
+            promotion__end_date__gte=self.now,
+        ).order_by('product_promotion_id').values_list(
+            'product_id', 'category_id', 'promotion_id', 'promotion__discount_percentage',
+            'promotion__start_date', 'promotion__end_date'
+        )
+
+        by_product = defaultdict(list)
+        by_category = defaultdict(list)
+        for product_id, category_id, *promotion in links:
+            if product_id in product_ids:
+                by_product[product_id].append(promotion)
+            if category_id in category_ids:
+                by_category[category_id].append(promotion)
+
+        for product_id, product in missing.items():
+            # Khuyến mãi theo sản phẩm được ưu tiên khi có cùng mức giảm
+            best = (0, None)
+            valid_until = None
+            for promotion_id, discount, start_date, end_date in by_product[product_id] + by_category[product.category_id]:
+                if start_date > self.now:
+                    boundary = start_date
+                else:
+                    boundary = end_date
+                    if discount > best[0]:
+                        best = (discount, promotion_id)
+                if valid_until is None or boundary < valid_until:
+                    valid_until = boundary
+            self._remember(product_id, best[0], best[1],
+                           apply_discount(product.price, best[0]), valid_until)
+
+    def materialize(self, products):
+        """Ghi giá đã tính của các sản phẩm vào bảng ProductEffectivePrice"""
+        # Ghi theo thứ tự product_id để các lần ghi đồng thời khóa dòng cùng thứ tự (không deadlock)
+        rows = [
+            ProductEffectivePrice(
+                product_id=product.pk,
+                regular_price=product.price,
+                discount_percentage=self._best[product.pk][0],
+                discounted_price=self._prices[product.pk],
+                promotion_id=self._best[product.pk][1],
+                valid_until=self._valid_until[product.pk],
+            )
+            for product in sorted(products, key=lambda product: product.pk)
+        ]
+        ProductEffectivePrice.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['regular_price', 'discount_percentage', 'discounted_price',
+                           'promotion', 'valid_until', 'updated_at'],
+        )
+
+    def discount_percentage(self, product):
+        self.ensure([product])
+        return self._best[product.pk][0]
+
+    def promotion_id(self, product):
+        self.ensure([product])
+        return self._best[product.pk][1]
+
+    def discounted_price(self, product):
+        self.ensure([product])
+        return self._prices[product.pk]
+
+
+def build_price_book(products, now=None):
+    """Tạo bảng giá khuyến mãi cho danh sách sản phẩm"""
+    return PriceBook(now=now).ensure(products)
+
+
+def promotion_targets(promotion):
+    """Trả về (product_ids, category_ids) đang gắn với một khuyến mãi"""
+    links = ProductPromotions.objects.filter(promotion=promotion).values_list('product_id', 'category_id')
+    product_ids = {product_id for product_id, _ in links if product_id}
+    category_ids = {category_id for _, category_id in links if category_id}
+    return product_ids, category_ids
+
+
+def refresh_effective_prices(product_ids=(), category_ids=(), now=None, batch_size=500):
+    """
+    Tính lại giá hiệu lực cho các sản phẩm được chỉ định hoặc thuộc các danh mục
+    được chỉ định. Trả về số sản phẩm đã cập nhật.
+    """
+    product_ids = set(product_ids)
+    category_ids = set(category_ids)
+    if not product_ids and not category_ids:
+        return 0
+
+    products = Products.objects.filter(
+        Q(product_id__in=product_ids) | Q(category_id__in=category_ids)
+    ).only('product_id', 'price', 'category_id').order_by('product_id')
+
+    now = now or timezone.now()
+    refreshed = 0
+    batch = []
+    for product in products.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            PriceBook(now=now, materialized=False).ensure(batch).materialize(batch)
+            refreshed += len(batch)
+            batch = []
+    if batch:
+        PriceBook(now=now, materialized=False).ensure(batch).materialize(batch)
+        refreshed += len(batch)
+    return refreshed
+
+
+def sweep_effective_prices(now=None, batch_size=500):
+    """
+    Tính lại giá của các sản phẩm đã qua mốc bắt đầu/kết thúc khuyến mãi
+    và các sản phẩm chưa có giá hiệu lực. Trả về số sản phẩm đã cập nhật.
+    """
+    now = now or timezone.now()
+    stale_ids = set(
+        ProductEffectivePrice.objects.filter(valid_until__lte=now).values_list('product_id', flat=True)
+    )
+    stale_ids.update(
+        Products.objects.filter(effective_price__isnull=True).values_list('product_id', flat=True)
+    )
+    return refresh_effective_prices(product_ids=stale_ids, now=now, batch_size=batch_size)
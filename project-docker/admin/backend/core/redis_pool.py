@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+REDIS_URL = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+# Số kết nối tối đa của mỗi tiến trình, request chờ tối đa REDIS_SOCKET_TIMEOUT nếu hết kết nối
+REDIS_MAX_CONNECTIONS = getattr(settings, 'REDIS_MAX_CONNECTIONS', 50)
+# Thời gian chờ kết nối/lệnh (giây), để Redis chậm hoặc không truy cập được không giữ worker
+REDIS_SOCKET_TIMEOUT = getattr(settings, 'REDIS_SOCKET_TIMEOUT', 0.5)
+
+_pool = None
+_pool_lock = threading.Lock()
+# Client async theo event loop (kết nối async không dùng được trên event loop khác)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_pool():
+    """Connection pool dùng chung trong tiến trình, tạo khi cần (không kết nối lúc import)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = redis.BlockingConnectionPool.from_url(
+                    REDIS_URL,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30,
+                )
+    return _pool
+
+
+def get_client():
+    """Client Redis trên pool dùng chung, chỉ kết nối khi gửi lệnh đầu tiên"""
+    return redis.Redis(connection_pool=get_pool())
+
+
+def get_async_client():
+    """Client Redis async (redis.asyncio) cho view async, một client và pool cho mỗi event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            # Chờ kết nối rảnh không giữ thread nào nên không giới hạn; Redis chậm hoặc không
+            # truy cập được vẫn bị chặn bởi socket timeout và CircuitBreaker
+            timeout=None,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            health_check_interval=30,
+        )
+        client = _async_clients[loop] = aioredis.Redis(connection_pool=pool)
+    return client
+
+
+class CircuitBreaker:
+    """
+    Ngắt các lời gọi tới Redis sau `failure_threshold` lỗi liên tiếp, trong `reset_timeout` giây
+    mọi lời gọi đi thẳng sang phương án dự phòng thay vì chờ timeout. Hết thời gian đó một lời gọi
+    được thử lại: thành công thì đóng mạch, lỗi thì ngắt tiếp.
+    `on_recover` (nếu có) được gọi mỗi khi mạch đóng lại.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30, on_recover=None):
+        self.name = name
+        self.on_recover = on_recover
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """True nếu được gọi Redis"""
+        if self._opened_at is None:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        if self._failures or self._opened_at is not None:
+            with self._lock:
+                recovered = self._opened_at is not None
+                if recovered:
+                    print(f"{self.name}: Redis hoạt động trở lại")
+                self._failures = 0
+                self._opened_at = None
+                self._trial = False
+            if recovered and self.on_recover is not None:
+                self.on_recover()
+
+    def failure(self, error):
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._opened_at is None and self._failures >= self.failure_threshold):
+                print(f"Warning: {self.name}: Redis lỗi ({str(error)}), dùng phương án dự phòng "
+                      f"trong {self.reset_timeout} giây")
+                self._opened_at = time.monotonic()
+            self._trial = False
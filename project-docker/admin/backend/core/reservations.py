@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import ProductReservedStock, Products, StockReservation
+
+# Thời gian giữ hàng cho sản phẩm trong giỏ (giây), gia hạn mỗi lần thêm/cập nhật giỏ hàng
+STOCK_RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', 15 * 60)
+# Số lượt giữ hàng hết hạn trả lại mỗi transaction
+RELEASE_BATCH_SIZE = 500
+# Số sản phẩm tối đa mỗi request của API số lượng có thể bán
+AVAILABILITY_MAX_PRODUCTS = 200
+
+# Thứ tự khóa dòng để các thao tác đồng thời không deadlock:
+# StockReservation -> Products -> ProductReservedStock (nhiều sản phẩm theo thứ tự product_id)
+
+
+class ReservationError(ValueError):
+    """Không đủ hàng để giữ cho giỏ hàng"""
+
+    def __init__(self, message, available):
+        super().__init__(message)
+        self.available = available
+
+
+def reserved_quantity(product):
+    """Số lượng đang được giữ của sản phẩm (dùng select_related('reserved_stock') để không tốn truy vấn)"""
+    row = getattr(product, 'reserved_stock', None)
+    return row.reserved_quantity if row is not None else 0
+
+
+def available_quantity(product):
+    """Số lượng có thể bán = tồn kho - số lượng đang được giữ"""
+    return max(product.stock_quantity - reserved_quantity(product), 0)
+
+
+def available_quantities(product_ids):
+    """Số lượng có thể bán của nhiều sản phẩm trong một truy vấn: {product_id: số lượng}"""
+    rows = Products.objects.filter(product_id__in=product_ids).values_list(
+        'product_id', 'stock_quantity', 'reserved_stock__reserved_quantity'
+    )
+    return {product_id: max(stock - (reserved or 0), 0) for product_id, stock, reserved in rows}
+
+
+def adjust_reserved(changes):
+    """Cộng `changes` {product_id: số lượng} vào số lượng đang giữ, theo thứ tự product_id"""
+    for product_id in sorted(changes):
+        if changes[product_id]:
+            ProductReservedStock.objects.filter(product_id=product_id).update(
+                reserved_quantity=F('reserved_quantity') + changes[product_id]
+            )
+
+
+def _release(reservations):
+    """Xóa các lượt giữ hàng (đã khóa) và trả lại số lượng, trả về số lượt đã xóa"""
+    if not reservations:
+        return 0
+    changes = {}
+    for reservation in reservations:
+        changes[reservation.product_id] = changes.get(reservation.product_id, 0) - reservation.quantity
+    StockReservation.objects.filter(
+        reservation_id__in=[reservation.reservation_id for reservation in reservations]
+    ).delete()
+    adjust_reserved(changes)
+    return len(reservations)
+
+
+def release_expired_for_products(product_ids, exclude_cart_ids=(), now=None):
+    """
+    Trả lại các lượt giữ hàng đã hết hạn của các sản phẩm (trừ của `exclude_cart_ids`),
+    để hàng giữ quá hạn không chặn người mua khác khi lệnh dọn dẹp chưa chạy.
+    Gọi trong transaction sau khi đã khóa sản phẩm; bỏ qua các lượt đang bị khóa.
+    """
+    now = now or timezone.now()
+    return _release(list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(product_id__in=product_ids, expires_at__lte=now)
+        .exclude(cart_id__in=exclude_cart_ids)
+    ))
+
+
+def reserve(cart_item, quantity, now=None):
+    """
+    Giữ `quantity` sản phẩm cho dòng giỏ hàng `cart_item` (thay cho số lượng đang giữ)
+    và gia hạn thời gian giữ. Các lượt giữ đã hết hạn của sản phẩm được trả lại trước khi kiểm tra.
+
+    Gọi trong transaction. Raise ReservationError nếu số lượng có thể bán không đủ.
+    """
+    now = now or timezone.now()
+    hold = StockReservation.objects.select_for_update().filter(cart_id=cart_item.cart_id).first()
+    product = Products.objects.select_for_update().get(product_id=cart_item.product_id)
+
+    release_expired_for_products([product.product_id], [cart_item.cart_id], now)
+    counter, _ = ProductReservedStock.objects.get_or_create(product_id=product.product_id)
+
+    held = hold.quantity if hold else 0
+    available = product.stock_quantity - counter.reserved_quantity + held
+    if quantity > available:
+        available = max(available, 0)
+        raise ReservationError(
+            f"Số lượng sản phẩm trong kho không đủ. Hiện chỉ còn {available} sản phẩm.", available
+        )
+
+    adjust_reserved({product.product_id: quantity - held})
+    expires_at = now + timedelta(seconds=STOCK_RESERVATION_TTL)
+    if hold:
+        hold.quantity = quantity
+        hold.expires_at = expires_at
+        hold.save(update_fields=['quantity', 'expires_at'])
+        return hold
+    return StockReservation.objects.create(
+        cart_id=cart_item.cart_id, product_id=product.product_id, quantity=quantity, expires_at=expires_at
+    )
+
+
+def release_cart_items(cart_ids):
+    """Trả lại hàng đang giữ cho các dòng giỏ hàng (trước khi xóa dòng giỏ hàng)"""
+    with transaction.atomic():
+        return _release(list(StockReservation.objects.select_for_update().filter(cart_id__in=cart_ids)))
+
+
+def release_expired_reservations(now=None, batch_size=RELEASE_BATCH_SIZE):
+    """Trả lại hàng của các giỏ hàng đã hết thời gian giữ, mỗi đợt một transaction ngắn"""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            count = _release(list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now).order_by('expires_at')[:batch_size]
+            ))
+        if not count:
+            return released
+        released += count
+
+
+def reconcile_reserved_stock():
+    """
+    Tính lại số lượng đang giữ từ bảng StockReservation (khi dòng giỏ hàng bị xóa
+    theo người dùng/sản phẩm mà không trả lại hàng). Trả về số sản phẩm đã sửa.
+    """
+    fixed = 0
+    with transaction.atomic():
+        counters = {
+            counter.product_id: counter
+            for counter in ProductReservedStock.objects.select_for_update().order_by('product_id')
+        }
+        totals = dict(
+            StockReservation.objects.values('product_id').annotate(total=Sum('quantity'))
+            .values_list('product_id', 'total').order_by()
+        )
+        for product_id, counter in counters.items():
+            total = totals.get(product_id, 0)
+            if counter.reserved_quantity != total:
+                counter.reserved_quantity = total
+                counter.save(update_fields=['reserved_quantity'])
+                fixed += 1
+        missing = [
+            ProductReservedStock(product_id=product_id, reserved_quantity=total)
+            for product_id, total in totals.items() if product_id not in counters
+        ]
+        ProductReservedStock.objects.bulk_create(missing)
+    return fixed + len(missing)
@@ -0,0 +1,242 @@
+import gzip
+import json
+import os
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ActivityEvent, AuditLog, UserActivityLog
+from .partitions import (
+    drop_partition, ensure_monthly_partitions, is_partitioned, list_partitions, month_start, months_in_default,
+    next_month, partition_bounds, partition_name, uses_partitions,
+)
+
+# Các bảng nhật ký được lưu trữ và dọn dẹp
+RETAINED_LOGS = {
+    'audit_log': AuditLog,
+    'user_activity_log': UserActivityLog,
+    'activity_event': ActivityEvent,
+}
+# Số ngày giữ lại trong database của từng bảng, dòng cũ hơn được lưu ra file rồi xóa
+LOG_RETENTION_DAYS = getattr(settings, 'LOG_RETENTION_DAYS', {
+    'audit_log': 365,
+    'user_activity_log': 180,
+    'activity_event': 400,
+})
+LOG_ARCHIVE_DIR = getattr(settings, 'LOG_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+ARCHIVE_FORMATS = ('jsonl', 'parquet')
+# Số dòng mỗi lần đọc/ghi/xóa khi lưu trữ
+ARCHIVE_CHUNK_SIZE = 5000
+
+_INTEGER_TYPES = {'AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField'}
+
+
+class JsonLinesArchive:
+    """File JSON Lines nén gzip, mỗi dòng một bản ghi"""
+    extension = 'jsonl.gz'
+
+    def __init__(self, path, fields):
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetArchive:
+    """File Parquet (cần pyarrow), kiểu cột lấy theo field của model"""
+    extension = 'parquet'
+
+    def __init__(self, path, fields):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('Lưu trữ dạng Parquet cần cài pyarrow (pip install pyarrow)')
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(field.attname, self._column_type(field)) for field in fields])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def _column_type(self, field):
+        target = field.target_field if field.is_relation else field
+        if target.get_internal_type() in _INTEGER_TYPES:
+            return self.pyarrow.int64()
+        if target.get_internal_type() == 'DateTimeField':
+            return self.pyarrow.timestamp('us', tz='UTC')
+        return self.pyarrow.string()
+
+    def write(self, rows):
+        self.writer.write_table(self.pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _archive_class(archive_format):
+    if archive_format == 'jsonl':
+        return JsonLinesArchive
+    if archive_format == 'parquet':
+        return ParquetArchive
+    raise ValueError(f'Định dạng lưu trữ phải là một trong: {", ".join(ARCHIVE_FORMATS)}')
+
+
+def archive_rows(model, start, end, directory, archive_format='jsonl'):
+    """
+    Ghi các dòng có created_at trong [start, end) ra một file trong `directory`.
+    File được ghi tạm rồi đổi tên khi hoàn tất. Trả về (đường dẫn, số dòng, khóa chính lớn nhất),
+    đường dẫn là None nếu không có dòng nào.
+    """
+    archive_class = _archive_class(archive_format)
+    fields = model._meta.concrete_fields
+    pk_name = model._meta.pk.attname
+    table = model._meta.db_table
+
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    path = os.path.join(directory, f'{table}_{start:%Y%m}_{stamp}.{archive_class.extension}')
+    temp_path = path + '.part'
+
+    rows = model.objects.filter(created_at__gte=start, created_at__lt=end).order_by(pk_name).values(
+        *[field.attname for field in fields]
+    )
+    count = 0
+    max_pk = None
+    archive = archive_class(temp_path, fields)
+    try:
+        batch = []
+        for row in rows.iterator(chunk_size=ARCHIVE_CHUNK_SIZE):
+            batch.append(row)
+            if len(batch) >= ARCHIVE_CHUNK_SIZE:
+                archive.write(batch)
+                count += len(batch)
+                max_pk = batch[-1][pk_name]
+                batch = []
+        if batch:
+            archive.write(batch)
+            count += len(batch)
+            max_pk = batch[-1][pk_name]
+        archive.close()
+    except BaseException:
+        archive.close()
+        os.remove(temp_path)
+        raise
+
+    if not count:
+        os.remove(temp_path)
+        return None, 0, None
+    os.replace(temp_path, path)
+    return path, count, max_pk
+
+
+def _delete_archived(model, start, end, max_pk):
+    """Xóa theo từng đợt các dòng đã lưu trữ, mỗi đợt một transaction ngắn"""
+    pk_name = model._meta.pk.attname
+    rows = model.objects.filter(created_at__gte=start, created_at__lt=end, **{f'{pk_name}__lte': max_pk})
+    deleted = 0
+    while True:
+        ids = list(rows.values_list(pk_name, flat=True)[:ARCHIVE_CHUNK_SIZE])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            model.objects.filter(**{f'{pk_name}__in': ids}).delete()
+        deleted += len(ids)
+
+
+def _planned_partitions(model, cutoff):
+    """
+    Như _archive_partitions nhưng chỉ đọc (dry run): gồm cả các tháng còn nằm trong partition mặc định,
+    không tạo partition và không chuyển dòng ra khỏi partition mặc định.
+    """
+    table = model._meta.db_table
+    months = {month for _, month in list_partitions(table)}
+    months.update(months_in_default(table, 'created_at'))
+
+    results = []
+    for month in sorted(months):
+        start, end = partition_bounds(month)
+        if end > cutoff:
+            break
+        results.append({'month': month, 'rows': model.objects.filter(created_at__gte=start, created_at__lt=end).count(),
+                        'path': None, 'partition': partition_name(table, month)})
+    return results
+
+
+def _archive_partitions(model, cutoff, directory, archive_format, dry_run):
+    """PostgreSQL: lưu trữ rồi xóa nguyên partition của các tháng đã kết thúc trước `cutoff`"""
+    if dry_run:
+        return _planned_partitions(model, cutoff)
+
+    table = model._meta.db_table
+    # Tách các dòng cũ trong partition mặc định ra partition theo tháng trước
+    ensure_monthly_partitions(table, 'created_at')
+
+    results = []
+    for name, month in list_partitions(table):
+        start, end = partition_bounds(month)
+        if end > cutoff:
+            break
+
+        with transaction.atomic():
+            # Chặn ghi vào partition trong lúc lưu trữ, vẫn cho phép đọc
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {connection.ops.quote_name(name)} IN SHARE MODE')
+            path, count, _ = archive_rows(model, start, end, directory, archive_format)
+            drop_partition(table, name)
+        results.append({'month': month, 'rows': count, 'path': path, 'partition': name})
+    return results
+
+
+def _archive_chunks(model, cutoff, directory, archive_format, dry_run):
+    """Các backend khác hoặc bảng không chia partition: lưu trữ theo tháng rồi xóa theo từng đợt"""
+    oldest = model.objects.filter(created_at__lt=cutoff).order_by('created_at').values_list('created_at', flat=True).first()
+    if oldest is None:
+        return []
+
+    results = []
+    month = month_start(oldest.astimezone(dt_timezone.utc).date())
+    while True:
+        start, end = partition_bounds(month)
+        if start >= cutoff:
+            break
+        end = min(end, cutoff)
+        if dry_run:
+            count = model.objects.filter(created_at__gte=start, created_at__lt=end).count()
+            path = None
+        else:
+            path, count, max_pk = archive_rows(model, start, end, directory, archive_format)
+            if count:
+                _delete_archived(model, start, end, max_pk)
+        if count:
+            results.append({'month': month, 'rows': count, 'path': path, 'partition': None})
+        month = next_month(month)
+    return results
+
+
+def archive_logs(name, days=None, directory=LOG_ARCHIVE_DIR, archive_format='jsonl', dry_run=False):
+    """
+    Lưu trữ ra file và xóa khỏi database các dòng của bảng nhật ký `name` (khóa trong RETAINED_LOGS)
+    cũ hơn `days` ngày (mặc định LOG_RETENTION_DAYS).
+
+    Trên PostgreSQL chỉ các partition tháng đã kết thúc hoàn toàn trước mốc được xử lý
+    (mỗi tháng một file, xóa bằng DROP partition); các backend khác xóa chính xác theo mốc.
+    Trả về danh sách {'month', 'rows', 'path', 'partition'}.
+    """
+    if name not in RETAINED_LOGS:
+        raise ValueError(f'Bảng nhật ký phải là một trong: {", ".join(RETAINED_LOGS)}')
+    _archive_class(archive_format)
+    model = RETAINED_LOGS[name]
+    days = LOG_RETENTION_DAYS.get(name) if days is None else days
+    if days is None or days < 1:
+        raise ValueError('Số ngày giữ lại phải lớn hơn 0')
+
+    cutoff = timezone.now() - timedelta(days=days)
+    directory = os.path.join(directory, name)
+    if uses_partitions() and is_partitioned(model._meta.db_table):
+        return _archive_partitions(model, cutoff, directory, archive_format, dry_run)
+    return _archive_chunks(model, cutoff, directory, archive_format, dry_run)
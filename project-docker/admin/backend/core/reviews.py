@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import ProductRatingSummary, Reviews
+
+RATINGS = range(1, 6)
+# Số sản phẩm tối đa trong một request tổng hợp đánh giá
+SUMMARY_MAX_PRODUCTS = 200
+# Số đánh giá mới nhất tối đa kèm theo bản tổng hợp
+SUMMARY_MAX_RECENT = 50
+
+
+def _summary_aggregates():
+    return {
+        'review_count': Count('review_id'),
+        'rating_total': Sum('rating'),
+        **{f'rating_{n}': Count('review_id', filter=Q(rating=n)) for n in RATINGS},
+    }
+
+
+def _aggregate_summary(product_id):
+    """Tính lại bản tổng hợp của sản phẩm từ bảng đánh giá"""
+    values = Reviews.objects.filter(product_id=product_id).aggregate(**_summary_aggregates())
+    values['rating_total'] = values['rating_total'] or 0
+    ProductRatingSummary.objects.filter(product_id=product_id).update(**values)
+
+
+def refresh_rating_summaries(product_ids):
+    """
+    Tính lại bản tổng hợp của các sản phẩm sau khi đánh giá bị xóa (ví dụ xóa người dùng
+    xóa theo các đánh giá của họ). Gọi sau khi đã xóa, trong cùng transaction.
+    """
+    # Theo thứ tự product_id để các transaction đồng thời khóa dòng cùng thứ tự
+    for product_id in sorted(set(product_ids)):
+        _aggregate_summary(product_id)
+
+
+def rebuild_rating_summaries():
+    """Tính lại toàn bộ bảng tổng hợp từ bảng đánh giá. Trả về số sản phẩm có đánh giá"""
+    rows = Reviews.objects.values('product_id').annotate(**_summary_aggregates()).order_by('product_id')
+    with transaction.atomic():
+        ProductRatingSummary.objects.all().delete()
+        summaries = ProductRatingSummary.objects.bulk_create(
+            [ProductRatingSummary(**row) for row in rows], batch_size=1000
+        )
+    return len(summaries)
+
+
+def record_review(product_id, rating, previous_rating=None):
+    """
+    Cập nhật bản tổng hợp đánh giá của sản phẩm sau khi thêm đánh giá mới
+    (previous_rating=None) hoặc sửa đánh giá cũ có số sao previous_rating.
+    Gọi sau khi đã lưu đánh giá, trong cùng transaction.
+    """
+    if previous_rating == rating:
+        # Số sao không đổi, bản tổng hợp giữ nguyên
+        return
+
+    with transaction.atomic():
+        _, created = ProductRatingSummary.objects.get_or_create(product_id=product_id)
+        if created:
+            # Chưa có bản tổng hợp (dữ liệu cũ), tính lại từ bảng đánh giá đã gồm đánh giá vừa lưu
+            _aggregate_summary(product_id)
+            return
+
+        changes = {
+            'rating_total': F('rating_total') + rating - (previous_rating or 0),
+            f'rating_{rating}': F(f'rating_{rating}') + 1,
+        }
+        if previous_rating is None:
+            changes['review_count'] = F('review_count') + 1
+        else:
+            changes[f'rating_{previous_rating}'] = F(f'rating_{previous_rating}') - 1
+        ProductRatingSummary.objects.filter(product_id=product_id).update(**changes)
+
+
+def _summary_data(product_id, summary=None):
+    count = summary.review_count if summary else 0
+    return {
+        'product_id': product_id,
+        'count': count,
+        'average': round(summary.rating_total / count, 2) if count else 0,
+        'histogram': {str(n): getattr(summary, f'rating_{n}') if summary else 0 for n in RATINGS},
+    }
+
+
+def rating_summaries(product_ids):
+    """Tổng hợp đánh giá (số lượng, trung bình, phân bố 1-5 sao) của nhiều sản phẩm, một truy vấn"""
+    summaries = ProductRatingSummary.objects.in_bulk(product_ids)
+    return [_summary_data(product_id, summaries.get(product_id)) for product_id in product_ids]
+
+
+def recent_reviews(product_ids, limit):
+    """Các đánh giá mới nhất của các sản phẩm, kèm thông tin người dùng"""
+    return Reviews.objects.filter(product_id__in=product_ids).select_related('user').order_by(
+        '-created_at', '-review_id'
+    )[:limit]
@@ -0,0 +1,329 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Value, When
+
+from .models import Categories, ProductDetails, Products
+
+# Cấu hình 'simple' không stem từ, phù hợp với tên thương hiệu/mã sản phẩm
+SEARCH_CONFIG = 'simple'
+
+# Trọng số ts_rank theo thứ tự D, C, B, A:
+# tên sản phẩm (A) > mô tả (B) > thông số kỹ thuật (C)
+SEARCH_RANK_WEIGHTS = [0.0, 0.1, 0.2, 0.8]
+
+# Điểm cộng khi tên sản phẩm chứa nguyên cụm từ tìm kiếm
+EXACT_PHRASE_BONUS = 1.0
+
+
+def uses_full_text_search():
+    return connection.vendor == 'postgresql'
+
+
+def search_terms(search_query):
+    """Tách từ khóa tìm kiếm thành các từ (chữ thường, bỏ ký tự đặc biệt)"""
+    return re.findall(r'\w+', search_query.lower())
+
+
+def product_search_vector():
+    """Biểu thức tsvector của sản phẩm: tên (A), mô tả (B), thông số kỹ thuật (C)"""
+    specification = Subquery(
+        ProductDetails.objects.filter(product_id=OuterRef('pk')).values('specification')[:1]
+    )
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(specification, weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(product_ids=None):
+    """
+    Cập nhật cột search_vector cho các sản phẩm (None = toàn bộ).
+    Gọi sau mỗi lần ghi sản phẩm hoặc chi tiết sản phẩm.
+    """
+    if not uses_full_text_search():
+        return 0
+    queryset = Products.objects.all()
+    if product_ids is not None:
+        queryset = queryset.filter(product_id__in=list(product_ids))
+    return queryset.update(search_vector=product_search_vector())
+
+
+def search_products(queryset, search_query):
+    """
+    Lọc và sắp xếp queryset sản phẩm theo mức độ liên quan với từ khóa.
+
+    PostgreSQL: dùng chỉ mục GIN trên search_vector và xếp hạng bằng ts_rank,
+    toàn bộ thực hiện trong một truy vấn. Các backend khác dùng cách chấm điểm
+    trong Python (legacy_search_scores).
+    """
+    terms = search_terms(search_query)
+    if not terms:
+        return queryset.none()
+
+    if not uses_full_text_search():
+        return _search_products_in_python(queryset, search_query)
+
+    # Khớp theo tiền tố của từng từ, sản phẩm chỉ cần chứa một trong các từ
+    ts_query = SearchQuery(' | '.join(f'{term}:*' for term in terms),
+                           search_type='raw', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=ts_query).annotate(
+        search_rank=SearchRank(F('search_vector'), ts_query, weights=SEARCH_RANK_WEIGHTS) + Case(
+            When(name__icontains=search_query.strip(), then=Value(EXACT_PHRASE_BONUS)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by('-search_rank', 'product_id')
+
+
+def search_product_ids(search_query, limit=20, offset=0, queryset=None):
+    """Trả về một trang ID sản phẩm đã xếp hạng theo từ khóa"""
+    queryset = Products.objects.all() if queryset is None else queryset
+    results = search_products(queryset, search_query)
+    return list(results.values_list('product_id', flat=True)[offset:offset + limit])
+
+
+def legacy_search_scores(products, search_query):
+    """
+    Chấm điểm tương đồng cho từng sản phẩm trong Python.
+    Dùng cho backend không phải PostgreSQL và để so sánh trong benchmark.
+    `products` là iterable các bộ (product_id, name, description, specification).
+    """
+    search_phrase = search_query.lower()
+    terms = search_phrase.split()
+    product_scores = {}
+
+    for product_id, name, description, specification in products:
+        # Bỏ qua nếu sản phẩm không có tên
+        if not name:
+            continue
+
+        score = 0
+        product_name = name.lower()
+        product_name_terms = product_name.split()
+        product_description = (description or "").lower()
+        product_specs = (specification or "").lower()
+
+        # Ưu tiên cao nhất nếu tên chứa chính xác cụm từ tìm kiếm
+        if search_phrase in product_name:
+            score += 10
+
+        for search_term in terms:
+            # Cộng điểm nếu từ khóa xuất hiện trong tên
+            if search_term in product_name:
+                score += 5
+
+            for product_term in product_name_terms:
+                # Nếu từ khóa tìm kiếm nằm trong từ của sản phẩm hoặc ngược lại
+                if search_term in product_term or product_term in search_term:
+                    score += 3
+                # Nếu từ khóa và từ sản phẩm khớp hoàn toàn
+                elif search_term == product_term:
+                    score += 4
+
+            if product_description and search_term in product_description:
+                score += 2
+
+            if product_specs and search_term in product_specs:
+                score += 1
+
+        if score > 0:
+            product_scores[product_id] = score
+
+    return product_scores
+
+
+def _search_products_in_python(queryset, search_query):
+    rows = queryset.values_list('product_id', 'name', 'description', 'detail__specification')
+    product_scores = legacy_search_scores(rows, search_query)
+    if not product_scores:
+        return queryset.none()
+
+    sorted_ids = sorted(product_scores, key=lambda product_id: (-product_scores[product_id], product_id))
+    preserved = Case(*[When(product_id=product_id, then=pos) for pos, product_id in enumerate(sorted_ids)])
+    return queryset.filter(product_id__in=sorted_ids).order_by(preserved)
+
+
+# ---------------------------------------------------------------------------
+# Gợi ý tìm kiếm (autocomplete) chấp nhận lỗi chính tả bằng trigram
+# ---------------------------------------------------------------------------
+
+SUGGEST_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+# Ngưỡng word_similarity tối thiểu, thấp hơn mặc định 0.6 của pg_trgm
+# để vẫn khớp các lỗi gõ như "razr" -> "Razer"
+SUGGEST_MIN_SIMILARITY = 0.5
+
+# Cache trong tiến trình cho các tiền tố ngắn (được gõ nhiều nhất)
+SUGGEST_CACHE_PREFIX_LENGTH = 4
+SUGGEST_CACHE_SIZE = 512
+SUGGEST_CACHE_TTL = 60
+
+# Chỉ mục trigram trong bộ nhớ (SQLite) được dựng lại sau khoảng thời gian này
+MEMORY_INDEX_TTL = 300
+
+
+def normalize_suggest_query(query):
+    return ' '.join(search_terms(query or ''))
+
+
+def trigrams(text):
+    """Tập trigram của chuỗi theo cách pg_trgm: mỗi từ được đệm 2 khoảng trắng đầu, 1 cuối"""
+    result = set()
+    for word in search_terms(text):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class PrefixCache:
+    """Cache LRU có thời hạn cho kết quả gợi ý của các tiền tố ngắn"""
+
+    def __init__(self, max_size=SUGGEST_CACHE_SIZE, ttl=SUGGEST_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class MemoryTrigramIndex:
+    """
+    Chỉ mục trigram trong bộ nhớ cho tên sản phẩm và danh mục.
+    Dùng khi database không phải PostgreSQL (SQLite khi chạy test).
+    """
+
+    def __init__(self, ttl=MEMORY_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._names = {}
+        self._postings = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        with self._lock:
+            if self._built_at is not None and time.monotonic() - self._built_at < self.ttl:
+                return
+            names = {}
+            for product_id, name in Products.objects.values_list('product_id', 'name').iterator():
+                names[('product', product_id)] = name
+            for category_id, name in Categories.objects.values_list('category_id', 'name'):
+                names[('category', category_id)] = name
+            postings = defaultdict(set)
+            for key, name in names.items():
+                for trigram in trigrams(name):
+                    postings[trigram].add(key)
+            self._names = names
+            self._postings = dict(postings)
+            self._built_at = time.monotonic()
+
+    def search(self, query, limit):
+        self._ensure_built()
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        hits = defaultdict(int)
+        for trigram in query_trigrams:
+            for key in self._postings.get(trigram, ()):
+                hits[key] += 1
+        results = []
+        for (kind, object_id), count in hits.items():
+            similarity = count / len(query_trigrams)
+            if similarity >= SUGGEST_MIN_SIMILARITY:
+                results.append(_suggestion(kind, object_id, self._names[(kind, object_id)], similarity))
+        return _rank_suggestions(results, query, limit)
+
+
+_prefix_cache = PrefixCache()
+_memory_index = MemoryTrigramIndex()
+
+
+def _suggestion(kind, object_id, name, similarity):
+    return {'type': kind, 'id': object_id, 'name': name, 'similarity': round(similarity, 3)}
+
+
+def _rank_suggestions(results, query, limit):
+    # Tên bắt đầu bằng chuỗi đang gõ được ưu tiên, sau đó đến độ tương đồng
+    return sorted(
+        results,
+        key=lambda item: (not item['name'].lower().startswith(query), -item['similarity'], item['name'])
+    )[:limit]
+
+
+def _suggest_postgres(query, limit):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL pg_trgm.word_similarity_threshold = %s', [SUGGEST_MIN_SIMILARITY])
+        # Toán tử %> dùng chỉ mục GIN gin_trgm_ops trên cột name
+        products = Products.objects.filter(name__trigram_word_similar=query).annotate(
+            similarity=TrigramWordSimilarity(query, 'name')
+        ).order_by('-similarity', 'product_id').values_list('product_id', 'name', 'similarity')[:limit]
+        categories = Categories.objects.filter(name__trigram_word_similar=query).annotate(
+            similarity=TrigramWordSimilarity(query, 'name')
+        ).order_by('-similarity', 'category_id').values_list('category_id', 'name', 'similarity')[:limit]
+        results = [_suggestion('product', *row) for row in products]
+        results += [_suggestion('category', *row) for row in categories]
+    return _rank_suggestions(results, query, limit)
+
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    """
+    Gợi ý tên sản phẩm và danh mục gần đúng với chuỗi đang gõ.
+    Trả về danh sách dict {type, id, name, similarity}.
+    """
+    query = normalize_suggest_query(query)
+    if not query:
+        return []
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+    cacheable = len(query) <= SUGGEST_CACHE_PREFIX_LENGTH
+    if cacheable:
+        cached = _prefix_cache.get((query, limit))
+        if cached is not None:
+            return cached
+
+    if uses_full_text_search():
+        results = _suggest_postgres(query, limit)
+    else:
+        results = _memory_index.search(query, limit)
+
+    if cacheable:
+        _prefix_cache.set((query, limit), results)
+    return results
+
+
+def invalidate_suggestions():
+    """Xóa cache gợi ý sau khi thêm/sửa/xóa sản phẩm hoặc danh mục"""
+    _prefix_cache.clear()
+    _memory_index.invalidate()
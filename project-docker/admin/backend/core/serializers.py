@@ -1,10 +1,42 @@
 from rest_framework import serializers
+from django.db import models
 from .models import (
     Admin, Permissions, AuditLog, Users, UserActivityLog, Categories, 
     Products, ProductImages, ProductDetails, Promotions, ProductPromotions, 
     Reviews, Orders, OrderDetails, Cart, Payments, Blog, BlogImages, 
     Careers, Contact, Faq, TermsAndConditions, PrivacyPolicy, CategoryImages, SocialMediaUrls, CareerApplications, NewsletterSubscribers
 )
+from .images import primary_image_url
+from .pricing import PriceBook
+from .reservations import reserved_quantity
+
+class PricedListSerializer(serializers.ListSerializer):
+    """
+    Nạp giá khuyến mãi cho toàn bộ danh sách trước khi serialize từng phần tử
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.get_price_book().ensure(self.child.get_priced_product(item) for item in items)
+        return super().to_representation(items)
+
+class PricedSerializerMixin:
+    """
+    Dùng chung PriceBook trong context (`price_book`) để tính giá khuyến mãi
+    """
+    # Tên thuộc tính trỏ tới sản phẩm, None nếu chính đối tượng là sản phẩm
+    priced_product_field = None
+    
+    def get_priced_product(self, obj):
+        if self.priced_product_field:
+            return getattr(obj, self.priced_product_field)
+        return obj
+        
+    def get_price_book(self):
+        price_book = self.context.get('price_book')
+        if price_book is None:
+            price_book = PriceBook()
+            self.context['price_book'] = price_book
+        return price_book
 
 class AdminSerializer(serializers.ModelSerializer):
     class Meta:
@@ -117,7 +149,7 @@ class ProductDetailsSerializer(serializers.ModelSerializer):
         model = ProductDetails
         fields = ['product_detail_id', 'specification']
 
-class ProductsSerializer(serializers.ModelSerializer):
+class ProductsSerializer(PricedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.SerializerMethodField()
     images = ProductImagesSerializer(many=True, read_only=True)
     detail = ProductDetailsSerializer(read_only=True)
@@ -127,12 +159,13 @@ class ProductsSerializer(serializers.ModelSerializer):
         model = Products
         fields = ['product_id', 'name', 'description', 'price', 'discounted_price', 'stock_quantity', 
                  'sold_quantity', 'category', 'category_name', 'created_at', 'images', 'detail']
+        list_serializer_class = PricedListSerializer
                  
     def get_category_name(self, obj):
         return obj.category.name
         
     def get_discounted_price(self, obj):
-        return obj.get_discounted_price()
+        return self.get_price_book().discounted_price(obj)
 
 class ProductCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -177,19 +210,33 @@ class ReviewsSerializer(serializers.ModelSerializer):
     def get_username(self, obj):
         return obj.user.username
 
-class OrderDetailsSerializer(serializers.ModelSerializer):
+class OrderDetailsSerializer(PricedSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.SerializerMethodField()
     discounted_price = serializers.SerializerMethodField()
+    priced_product_field = 'product'
     
     class Meta:
         model = OrderDetails
         fields = ['order_detail_id', 'product', 'product_name', 'quantity', 'price', 'discounted_price']
+        list_serializer_class = PricedListSerializer
         
     def get_product_name(self, obj):
         return obj.product.name
         
     def get_discounted_price(self, obj):
-        return obj.product.get_discounted_price()
+        return self.get_price_book().discounted_price(obj.product)
+
+class OrdersListSerializer(serializers.ListSerializer):
+    """
+    Nạp giá khuyến mãi cho sản phẩm của tất cả đơn hàng trong danh sách cùng lúc
+    """
+    def to_representation(self, data):
+        orders = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        details_serializer = self.child.fields['details'].child
+        details_serializer.get_price_book().ensure(
+            detail.product for order in orders for detail in order.details.all()
+        )
+        return super().to_representation(orders)
 
 class OrdersSerializer(serializers.ModelSerializer):
     details = OrderDetailsSerializer(many=True, read_only=True)
@@ -204,6 +251,7 @@ class OrdersSerializer(serializers.ModelSerializer):
             'customer_phone', 'shipping_address', 'total_amount', 'order_status', 
             'created_at', 'details', 'payment_method', 'payment_status'
         ]
+        list_serializer_class = OrdersListSerializer
         
     def get_username(self, obj):
         if obj.user:
@@ -211,16 +259,15 @@ class OrdersSerializer(serializers.ModelSerializer):
         return None
         
     def get_payment_method(self, obj):
+        # Dùng quan hệ một-một để tận dụng select_related('payments')
         try:
-            payment = Payments.objects.get(order=obj)
-            return payment.payment_method
+            return obj.payments.payment_method
         except Payments.DoesNotExist:
             return "Cash on Delivery"  # Mặc định
             
     def get_payment_status(self, obj):
         try:
-            payment = Payments.objects.get(order=obj)
-            return payment.payment_status
+            return obj.payments.payment_status
         except Payments.DoesNotExist:
             return "Pending"  # Mặc định
 
@@ -290,29 +337,23 @@ class CartSerializer(serializers.ModelSerializer):
     def get_product_price(self, obj):
         return obj.product.price
 
-class CartDetailSerializer(serializers.ModelSerializer):
+class CartDetailSerializer(PricedSerializerMixin, serializers.ModelSerializer):
     product_detail = serializers.SerializerMethodField()
     total_price = serializers.SerializerMethodField()
     discounted_price = serializers.SerializerMethodField()
+    reserved_until = serializers.SerializerMethodField()
+    priced_product_field = 'product'
     
     class Meta:
         model = Cart
-        fields = ['cart_id', 'user', 'product', 'quantity', 'created_at', 'product_detail', 'total_price', 'discounted_price']
+        fields = ['cart_id', 'user', 'product', 'quantity', 'created_at', 'product_detail', 'total_price', 'discounted_price',
+                  'reserved_until']
+        list_serializer_class = PricedListSerializer
     
     def get_product_detail(self, obj):
         product = obj.product
-        # Lấy hình ảnh đầu tiên của sản phẩm
-        images = product.images.all()
-        image_url = None
-        
-        if images.exists():
-            # Ưu tiên lấy hình ảnh chính
-            primary_image = images.filter(is_primary=True).first()
-            if primary_image:
-                image_url = primary_image.image_url
-            else:
-                # Nếu không có hình ảnh chính, lấy hình ảnh đầu tiên
-                image_url = images.first().image_url
+        # Hình ảnh chính (hoặc hình ảnh đầu tiên) của sản phẩm
+        image_url = primary_image_url(product)
         
         # Lấy tên danh mục
         category_name = product.category.name
@@ -323,18 +364,29 @@ class CartDetailSerializer(serializers.ModelSerializer):
             'description': product.description,
             'price': float(product.price),
             'stock_quantity': product.stock_quantity,
+            # Số lượng tối đa có thể đặt cho dòng giỏ hàng này (không tính hàng giữ cho giỏ hàng khác)
+            'available_quantity': max(product.stock_quantity - reserved_quantity(product) + self._held(obj), 0),
             'category_id': product.category.category_id,
             'category_name': category_name,
             'image_url': image_url
         }
     
+    def _held(self, obj):
+        reservation = getattr(obj, 'reservation', None)
+        return reservation.quantity if reservation is not None else 0
+    
+    def get_reserved_until(self, obj):
+        # Thời điểm hết giữ hàng, None nếu không còn giữ
+        reservation = getattr(obj, 'reservation', None)
+        return reservation.expires_at if reservation is not None else None
+    
     def get_total_price(self, obj):
         # Tính tổng giá của sản phẩm trong giỏ hàng (giá cơ bản * số lượng)
         return float(obj.product.price * obj.quantity)
     
     def get_discounted_price(self, obj):
         # Tính giá sau khuyến mãi cho sản phẩm
-        discounted_price = obj.product.get_discounted_price()
+        discounted_price = self.get_price_book().discounted_price(obj.product)
         return float(discounted_price * obj.quantity)
 
 class PaymentsSerializer(serializers.ModelSerializer):
@@ -0,0 +1,94 @@
+import threading
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from core.checkout import CheckoutError, checkout_cart
+from core.models import Cart, Categories, OrderDetails, ProductReservedStock, Products, Users
+from core.reservations import reserve
+
+STOCK = 3
+BUYERS = 8
+
+
+@skipUnless(connection.features.has_select_for_update, 'Cần khóa dòng (SELECT ... FOR UPDATE)')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Nhiều checkout chạy song song cho một sản phẩm không đủ hàng cho tất cả người mua:
+    không bán vượt tồn kho, tồn kho và số lượng đang giữ không bị âm.
+    Đúng nhờ thứ tự khóa trong checkout_cart (dòng giỏ hàng -> StockReservation -> Products theo product_id).
+    """
+    # Chỉ dọn các bảng của core sau mỗi test (TRUNCATE ... CASCADE)
+    available_apps = ['core']
+
+    def setUp(self):
+        category = Categories.objects.create(name='Danh mục test')
+        self.product = Products.objects.create(
+            name='Sản phẩm giới hạn', price=Decimal('100000'), stock_quantity=STOCK, category=category
+        )
+        self.users = []
+        for index in range(BUYERS):
+            user = Users.objects.create(username=f'khach{index}', password='x', email=f'khach{index}@example.com')
+            Cart.objects.create(user=user, product=self.product, quantity=1)
+            self.users.append(user)
+
+    def _checkout_all(self, users):
+        """Chạy checkout_cart của `users` cùng lúc (mỗi người một thread, một kết nối database)"""
+        barrier = threading.Barrier(len(users))
+        results = {}
+
+        def buy(user):
+            try:
+                barrier.wait()
+                checkout_cart(user, 'Địa chỉ giao hàng')
+                results[user.user_id] = 'ok'
+            except CheckoutError:
+                results[user.user_id] = 'out_of_stock'
+            except Exception as e:
+                results[user.user_id] = e
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        errors = [result for result in results.values() if isinstance(result, Exception)]
+        self.assertEqual(errors, [], 'checkout lỗi ngoài CheckoutError (deadlock?)')
+        return results
+
+    def _assert_stock(self, sold):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, STOCK - sold)
+        self.assertGreaterEqual(self.product.stock_quantity, 0)
+        self.assertEqual(self.product.sold_quantity, sold)
+        self.assertEqual(
+            sum(OrderDetails.objects.filter(product=self.product).values_list('quantity', flat=True)), sold
+        )
+        reserved = ProductReservedStock.objects.filter(product=self.product).first()
+        self.assertGreaterEqual(reserved.reserved_quantity if reserved else 0, 0)
+
+    def test_parallel_checkouts_do_not_oversell(self):
+        results = self._checkout_all(self.users)
+
+        sold = list(results.values()).count('ok')
+        self.assertLessEqual(sold, STOCK)
+        self.assertEqual(sold, STOCK)
+        self._assert_stock(sold)
+
+    def test_reserved_carts_win_over_unreserved(self):
+        holders = self.users[:STOCK]
+        for user in holders:
+            with transaction.atomic():
+                reserve(Cart.objects.get(user=user), 1)
+
+        results = self._checkout_all(self.users)
+
+        self.assertEqual({user.user_id for user in self.users if results[user.user_id] == 'ok'},
+                         {user.user_id for user in holders})
+        self._assert_stock(STOCK)
+        self.assertEqual(ProductReservedStock.objects.get(product=self.product).reserved_quantity, 0)
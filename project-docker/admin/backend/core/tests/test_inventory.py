@@ -0,0 +1,96 @@
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import TestCase
+
+from core.inventory import InventoryRowError, import_stock, parse_row, read_rows
+from core.models import AuditLog, Categories, Products
+
+
+class ParseRowTests(TestCase):
+    """Kiểm tra một dòng nhập kho (core.inventory.parse_row)"""
+
+    def test_valid_rows(self):
+        self.assertEqual(parse_row({'product_id': '7', 'delta': '-2'}), (7, None, -2))
+        self.assertEqual(parse_row({'product_id': 7, 'stock_quantity': 12, 'delta': ''}), (7, 12, 0))
+
+    def test_invalid_rows(self):
+        rows = [
+            ['khong-phai-object', 'Mỗi dòng phải là một object'],
+            [{'delta': 1}, 'Thiếu product_id'],
+            [{'product_id': 'abc', 'delta': 1}, 'product_id phải là số nguyên'],
+            [{'product_id': 1, 'delta': '1.5'}, 'delta phải là số nguyên'],
+            [{'product_id': 1}, 'Cần đúng một trong hai cột delta hoặc stock_quantity'],
+            [{'product_id': 1, 'delta': 1, 'stock_quantity': 2}, 'Cần đúng một trong hai cột delta hoặc stock_quantity'],
+            [{'product_id': 1, 'stock_quantity': -1}, 'stock_quantity không được âm'],
+        ]
+        for row, message in rows:
+            with self.subTest(row=row):
+                with self.assertRaisesMessage(InventoryRowError, message):
+                    parse_row(row)
+
+
+class ImportStockTests(TestCase):
+    """Nhập kho hàng loạt: lỗi của từng dòng được báo theo số dòng và không chặn các dòng khác"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.products = [
+            Products.objects.create(
+                name=f'Sản phẩm {index}', price=Decimal('100000'), stock_quantity=10, category=category
+            )
+            for index in range(2)
+        ]
+
+    def _stock(self):
+        return [Products.objects.get(pk=product.pk).stock_quantity for product in self.products]
+
+    def test_failed_rows_do_not_block_others(self):
+        first, second = (product.product_id for product in self.products)
+        csv_file = BytesIO(
+            'product_id,delta,stock_quantity\n'
+            f'{first},5,\n'
+            f'{second},-20,\n'
+            '999999,1,\n'
+            f'{second},,3\n'
+            'abc,1,\n'
+            f'{first},-1,\n'.encode('utf-8')
+        )
+
+        result = import_stock(read_rows(csv_file, 'csv'), source='kho.csv', chunk_size=2)
+
+        self.assertEqual(result['rows'], 6)
+        self.assertEqual(result['applied'], 3)
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual(result['batches'], 3)
+        self.assertEqual(
+            sorted((failure['line'], failure['error']) for failure in result['failures']),
+            [
+                (3, 'Không đủ hàng trong kho. Hiện chỉ có 10 sản phẩm.'),
+                (4, 'Sản phẩm không tồn tại'),
+                (6, 'product_id phải là số nguyên'),
+            ]
+        )
+        self.assertEqual(self._stock(), [14, 3])
+        self.assertEqual(AuditLog.objects.filter(action__startswith='Nhập kho hàng loạt (kho.csv)').count(), 3)
+
+    def test_invalid_json_line_is_reported(self):
+        jsonl_file = BytesIO(
+            f'{{"product_id": {self.products[0].product_id}, "delta": 2}}\n'
+            '{khong phai json\n'.encode('utf-8')
+        )
+
+        result = import_stock(read_rows(jsonl_file, 'jsonl'))
+
+        self.assertEqual(result['failures'], [{'line': 2, 'product_id': None, 'error': 'Dòng JSON không hợp lệ'}])
+        self.assertEqual(self._stock(), [12, 10])
+
+    def test_dry_run_changes_nothing(self):
+        rows = enumerate([{'product_id': self.products[0].product_id, 'delta': 5}], start=1)
+
+        result = import_stock(rows, dry_run=True)
+
+        self.assertEqual(result['applied'], 1)
+        self.assertEqual(self._stock(), [10, 10])
+        self.assertFalse(AuditLog.objects.exists())
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Categories, OrderDetails, Orders, Payments, Products, Users
+
+ORDER_COUNT = 100
+DETAILS_PER_ORDER = 3
+
+
+class OrderListQueryTests(TestCase):
+    """Danh sách đơn hàng được serialize với số truy vấn cố định, không tăng theo số đơn hàng (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        products = [
+            Products.objects.create(
+                name=f'Sản phẩm {index}', price=Decimal('100000'), stock_quantity=100, category=category
+            )
+            for index in range(5)
+        ]
+        cls.user = Users.objects.create(username='khachhang', password='x', email='khachhang@example.com')
+        orders = Orders.objects.bulk_create([
+            Orders(user=cls.user, customer_name='Khách hàng', total_amount=Decimal('300000'))
+            for _ in range(ORDER_COUNT)
+        ])
+        OrderDetails.objects.bulk_create([
+            OrderDetails(
+                order=order, product=products[(order.order_id + index) % len(products)],
+                quantity=1, price=Decimal('100000')
+            )
+            for order in orders
+            for index in range(DETAILS_PER_ORDER)
+        ])
+        Payments.objects.bulk_create([
+            Payments(order=order, payment_method='Cash on Delivery', transaction_id=f'TEST{order.order_id}')
+            for order in orders
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _get(self, url, max_queries):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f'{url}: {len(queries)} truy vấn\n' + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+        return response
+
+    def test_orders_list(self):
+        response = self._get('/api/orders/', max_queries=4)
+        self.assertEqual(len(response.json()), ORDER_COUNT)
+        self.assertEqual(len(response.json()[0]['details']), DETAILS_PER_ORDER)
+
+    def test_user_orders(self):
+        response = self._get(f'/api/orders/user/{self.user.user_id}/', max_queries=5)
+        orders = response.json()['orders']
+        self.assertEqual(len(orders), ORDER_COUNT)
+        self.assertTrue(all(detail['image_url'] for order in orders for detail in order['details']))
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Categories, ProductEffectivePrice, ProductPromotions, Products, Promotions
+from core.pricing import PriceBook, refresh_effective_prices
+
+
+class PriceBookTests(TestCase):
+    """Đọc giá không ghi vào ProductEffectivePrice, bảng được cập nhật bởi refresh_effective_prices"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm khuyến mãi', price=Decimal('200000'), stock_quantity=10, category=category
+        )
+        cls.promotion = Promotions.objects.create(
+            title='Giảm 25%', discount_percentage=25,
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1),
+        )
+        ProductPromotions.objects.create(product=cls.product, promotion=cls.promotion)
+
+    def test_missing_price_is_computed_without_writing(self):
+        price_book = PriceBook().ensure([self.product])
+
+        self.assertEqual(price_book.discounted_price(self.product), Decimal('150000.00'))
+        self.assertEqual(price_book.promotion_id(self.product), self.promotion.promotion_id)
+        self.assertFalse(ProductEffectivePrice.objects.filter(product=self.product).exists())
+
+    def test_materialized_price_is_read_after_refresh(self):
+        self.assertEqual(refresh_effective_prices(product_ids=[self.product.product_id]), 1)
+        row = ProductEffectivePrice.objects.get(product=self.product)
+        self.assertEqual(row.discounted_price, Decimal('150000.00'))
+
+        product = Products.objects.select_related('effective_price').get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(PriceBook().discounted_price(product), Decimal('150000.00'))
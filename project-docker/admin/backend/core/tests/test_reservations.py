@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Cart, Categories, ProductReservedStock, Products, StockReservation, Users
+from core.reservations import (
+    STOCK_RESERVATION_TTL, ReservationError, available_quantities, reconcile_reserved_stock, release_cart_items,
+    release_expired_reservations, reserve,
+)
+
+
+class StockReservationTests(TestCase):
+    """Giữ hàng cho giỏ hàng: tạo, thay số lượng, hết hạn và trả lại (core.reservations)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Danh mục test')
+        cls.product = Products.objects.create(
+            name='Sản phẩm test', price=Decimal('100000'), stock_quantity=5, category=category
+        )
+        cls.carts = [
+            Cart.objects.create(
+                user=Users.objects.create(username=f'khach{index}', password='x', email=f'khach{index}@example.com'),
+                product=cls.product, quantity=1,
+            )
+            for index in range(2)
+        ]
+
+    def _reserve(self, cart, quantity, now=None):
+        with transaction.atomic():
+            return reserve(cart, quantity, now=now)
+
+    def _reserved(self):
+        return ProductReservedStock.objects.get(product=self.product).reserved_quantity
+
+    def _available(self):
+        return available_quantities([self.product.product_id])[self.product.product_id]
+
+    def test_reserve_holds_stock_until_expiry(self):
+        now = timezone.now()
+        hold = self._reserve(self.carts[0], 3, now=now)
+
+        self.assertEqual(hold.expires_at, now + timedelta(seconds=STOCK_RESERVATION_TTL))
+        self.assertEqual(self._reserved(), 3)
+        self.assertEqual(self._available(), 2)
+        with self.assertRaises(ReservationError) as error:
+            self._reserve(self.carts[1], 3)
+        self.assertEqual(error.exception.available, 2)
+
+    def test_reserving_again_replaces_quantity(self):
+        self._reserve(self.carts[0], 3)
+        self._reserve(self.carts[0], 1)
+
+        self.assertEqual(StockReservation.objects.get(cart=self.carts[0]).quantity, 1)
+        self.assertEqual(self._reserved(), 1)
+
+    def test_expired_hold_is_released_for_other_buyers(self):
+        self._reserve(self.carts[0], 5, now=timezone.now() - timedelta(seconds=STOCK_RESERVATION_TTL + 1))
+
+        self._reserve(self.carts[1], 5)
+
+        self.assertFalse(StockReservation.objects.filter(cart=self.carts[0]).exists())
+        self.assertEqual(self._reserved(), 5)
+
+    def test_release_expired_reservations(self):
+        self._reserve(self.carts[1], 1)
+        self._reserve(self.carts[0], 2, now=timezone.now() - timedelta(seconds=STOCK_RESERVATION_TTL + 1))
+
+        self.assertEqual(release_expired_reservations(), 1)
+        self.assertEqual(list(StockReservation.objects.values_list('cart_id', flat=True)), [self.carts[1].cart_id])
+        self.assertEqual(self._reserved(), 1)
+
+    def test_release_cart_items(self):
+        self._reserve(self.carts[0], 2)
+        self._reserve(self.carts[1], 1)
+
+        self.assertEqual(release_cart_items([self.carts[0].cart_id]), 1)
+        self.assertEqual(self._reserved(), 1)
+        self.assertEqual(self._available(), 4)
+
+    def test_reconcile_after_cart_rows_deleted_without_release(self):
+        self._reserve(self.carts[0], 2)
+        self._reserve(self.carts[1], 1)
+        # Dòng giỏ hàng bị xóa theo (CASCADE) mà không trả lại hàng
+        self.carts[0].delete()
+        self.assertEqual(self._reserved(), 3)
+
+        self.assertEqual(reconcile_reserved_stock(), 1)
+        self.assertEqual(self._reserved(), 1)
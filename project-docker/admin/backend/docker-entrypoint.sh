@@ -11,10 +11,33 @@ echo "PostgreSQL started"
 echo "Applying database migrations..."
 python manage.py migrate
 
+# Create monthly partitions for the log tables ahead of time
+echo "Creating table partitions..."
+python manage.py ensure_partitions
+
+# Fill in effective prices for products that do not have one yet
+echo "Refreshing effective prices..."
+python manage.py sweep_effective_prices
+
+# Fill in primary image pointers for rows created before they existed
+echo "Backfilling primary images..."
+python manage.py backfill_primary_images
+
+# Drop expired idempotency keys
+echo "Purging expired idempotency keys..."
+python manage.py purge_idempotency_keys
+
+# Return stock held by carts whose reservation has expired
+echo "Releasing expired stock reservations..."
+python manage.py release_expired_reservations --reconcile
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Start server
-echo "Starting server..."
-exec gunicorn backend.wsgi:application --bind 0.0.0.0:8000 
\ No newline at end of file
+# Start server (SERVER_MODE=asgi: uvicorn worker với view async cho API cửa hàng)
+echo "Starting server ($SERVER_MODE)..."
+if [ "$SERVER_MODE" = "asgi" ]; then
+  exec gunicorn backend.asgi:application --config gunicorn.conf.py
+fi
+exec gunicorn backend.wsgi:application --config gunicorn.conf.py 
\ No newline at end of file
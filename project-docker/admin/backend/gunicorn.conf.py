@@ -0,0 +1,16 @@
+# Cấu hình gunicorn, được đọc tự động khi chạy gunicorn trong thư mục này
+import os
+
+bind = '0.0.0.0:8000'
+# SERVER_MODE=asgi: chạy backend.asgi:application bằng uvicorn worker (xem docker-entrypoint.sh),
+# mặc định là sync worker với backend.wsgi:application
+if os.environ.get('SERVER_MODE') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+# Thời gian chờ worker xử lý xong request khi tắt/khởi động lại
+graceful_timeout = 30
+
+
+def worker_exit(server, worker):
+    # Ghi nốt nhật ký hoạt động người dùng còn trong hàng đợi trước khi worker thoát
+    from core.activity import drain_activity
+    drain_activity(timeout=10.0)
@@ -1,7 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import './Cart.css';
-import { getUserCart, updateCartItem, removeCartItem, checkout, getUserProfile } from '../services/api';
+import { getUserCart, updateCartItem, removeCartItem, checkout, getUserProfile, newIdempotencyKey } from '../services/api';
 
 // Hàm tiện ích để thông báo cập nhật giỏ hàng
 const notifyCartUpdated = () => {
@@ -23,6 +23,8 @@ function Cart() {
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
   const [userProfileLoading, setUserProfileLoading] = useState(true);
+  // Idempotency-Key của lần đặt hàng hiện tại, giữ nguyên khi đặt lại sau lỗi cho tới khi thành công
+  const checkoutKeyRef = useRef(null);
   const navigate = useNavigate();
 
   // Lấy thông tin người dùng từ localStorage và API
@@ -177,11 +179,17 @@ function Cart() {
         payment_method: paymentMethod
       };
       
+      if (!checkoutKeyRef.current) {
+        checkoutKeyRef.current = newIdempotencyKey();
+      }
+      
       const response = await checkout(
         orderData.user_id,
         orderData.shipping_address,
-        orderData.payment_method
+        orderData.payment_method,
+        checkoutKeyRef.current
       );
+      checkoutKeyRef.current = null;
       
       console.log('Đặt hàng thành công:', response);
       
@@ -285,7 +293,7 @@ function Cart() {
                     <span>{item.quantity}</span>
                     <button 
                       onClick={() => handleQuantityChange(item.cart_id, item.quantity + 1)}
-                      disabled={item.quantity >= item.product_detail.stock_quantity}
+                      disabled={item.quantity >= (item.product_detail.available_quantity ?? item.product_detail.stock_quantity)}
                       className="quantity-btn"
                     >
                       +
@@ -6,7 +6,7 @@ import {
   fetchProductsBySearchQuery, fetchReviews, fetchPromotions, 
   addToCart, fetchProductPromotions, isPromotionActive,
   getProductDiscountedPrice, fetchReviewsByProductId, 
-  fetchProductsByPromotion
+  fetchProductsByPromotion, fetchReviewSummaries
 } from '../services/api';
 import activityTracker from '../services/ActivityTracker';
 
@@ -318,43 +318,35 @@ function Products() {
     }
   }, [promotions.length]);
 
+  // Số đánh giá mới nhất hiển thị ở mục "Đánh Giá Sản Phẩm"
+  const RECENT_REVIEWS_LIMIT = 10;
+
+  // Chuyển dữ liệu tổng hợp đánh giá về dạng { productId: { count, averageRating, reviews } }
+  const buildReviewMap = ({ results, recent_reviews }) => {
+    const reviewsMap = {};
+    results.forEach(summary => {
+      reviewsMap[summary.product_id] = {
+        count: summary.count,
+        averageRating: summary.average,
+        reviews: recent_reviews.filter(review => parseInt(review.product) === parseInt(summary.product_id))
+      };
+    });
+    return reviewsMap;
+  };
+
   // Fetch reviews from backend API
   useEffect(() => {
     const getReviews = async () => {
       try {
-        console.log('Fetching reviews from API');
-        // Use the same endpoint as ProductDetail.js for consistency
-        const reviewsByProduct = {}; // Change to object structure
+        console.log('Fetching review summaries from API');
         
         // First fetch products to get their IDs
         const productsData = await fetchProducts();
         
-        // Then fetch reviews for each product
-        for (const product of productsData) {
-          try {
-            const productId = product.product_id;
-            const response = await fetch(`http://${window.location.hostname}:8000/api/reviews/product/${productId}/`);
-            
-            if (response.ok) {
-              const productReviews = await response.json();
-              console.log(`Product ${productId} has ${productReviews.length} reviews`);
-              
-              // Calculate average rating for this product
-              const averageRating = productReviews.length > 0 
-                ? productReviews.reduce((sum, review) => sum + parseFloat(review.rating), 0) / productReviews.length
-                : 0;
-              
-              // Store data in the right format
-              reviewsByProduct[productId] = {
-                count: productReviews.length,
-                averageRating: averageRating,
-                reviews: productReviews
-              };
-            }
-          } catch (error) {
-            console.error('Error fetching reviews for product:', error);
-          }
-        }
+        // Then fetch review summaries for all products in one request
+        const productIds = productsData.map(product => product.product_id);
+        const summaries = await fetchReviewSummaries(productIds, RECENT_REVIEWS_LIMIT);
+        const reviewsByProduct = buildReviewMap(summaries);
         
         setProductReviews(reviewsByProduct);
         console.log('Review data by product:', reviewsByProduct);
@@ -364,6 +356,7 @@ function Products() {
     };
 
     getReviews();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
   
   // Product image navigation
@@ -578,57 +571,31 @@ function Products() {
     );
   };
 
-  // Add a function to fetch reviews for a specific product
-  const fetchProductReviews = async (productId) => {
-    try {
-      const response = await fetch(`http://${window.location.hostname}:8000/api/reviews/product/${productId}/`);
-      if (response.ok) {
-        const reviews = await response.json();
-        console.log(`Product ${productId} has ${reviews.length} reviews`);
-        return reviews;
-      }
-      return [];
-    } catch (error) {
-      console.error(`Error fetching reviews for product ${productId}:`, error);
-      return [];
-    }
-  };
-
-  // Fetch reviews when products load
+  // Fetch review summaries when products load
   useEffect(() => {
     const fetchAllProductReviews = async () => {
       if (products.length === 0) return;
       
-      console.log(`Fetching reviews for ${products.length} products`);
-      const reviewsMap = {};
-      let needsUpdate = false;
-      
-      for (const product of products) {
-        const productId = product.product_id;
-        if (!productReviews[productId]) {
-          needsUpdate = true;
-          const reviews = await fetchProductReviews(productId);
-          console.log(`Product ${productId} (${product.name}): ${reviews.length} reviews`);
-          reviewsMap[productId] = {
-            count: reviews.length,
-            averageRating: reviews.length > 0 
-              ? reviews.reduce((sum, review) => sum + parseFloat(review.rating), 0) / reviews.length
-              : 0,
-            reviews: reviews // Store the actual reviews
-          };
-        }
-      }
+      // Chỉ lấy tổng hợp cho các sản phẩm chưa có dữ liệu đánh giá
+      const missingIds = products
+        .map(product => product.product_id)
+        .filter(productId => !productReviews[productId]);
       
-      if (needsUpdate) {
-        console.log('Updating productReviews state with new data');
-        setProductReviews(prev => {
-          const newState = {...prev, ...reviewsMap};
-          console.log('New productReviews state:', newState);
-          return newState;
-        });
-      } else {
+      if (missingIds.length === 0) {
         console.log('No review updates needed');
+        return;
       }
+      
+      console.log(`Fetching review summaries for ${missingIds.length} products`);
+      const summaries = await fetchReviewSummaries(missingIds, RECENT_REVIEWS_LIMIT);
+      const reviewsMap = buildReviewMap(summaries);
+      
+      console.log('Updating productReviews state with new data');
+      setProductReviews(prev => {
+        const newState = {...prev, ...reviewsMap};
+        console.log('New productReviews state:', newState);
+        return newState;
+      });
     };
     
     fetchAllProductReviews();
@@ -1,15 +1,98 @@
-import { trackUserActivity } from './api';
+import { trackUserActivityBatch } from './api';
+
+// Gom các sự kiện và gửi mỗi FLUSH_INTERVAL_MS hoặc khi đủ FLUSH_EVENT_COUNT sự kiện
+const FLUSH_INTERVAL_MS = 3000;
+const FLUSH_EVENT_COUNT = 20;
+// Giới hạn của backend cho mỗi request batch
+const MAX_EVENTS_PER_REQUEST = 100;
+// Số sự kiện tối đa giữ lại khi server đang quá tải, bỏ các sự kiện cũ nhất
+const MAX_PENDING_EVENTS = 200;
 
 /**
  * Utility class for tracking user activities throughout the application
  */
 class ActivityTracker {
+  constructor() {
+    this.pendingEvents = [];
+    this.flushTimer = null;
+
+    if (typeof window !== 'undefined') {
+      // Gửi nốt các sự kiện khi người dùng rời trang hoặc chuyển tab
+      window.addEventListener('pagehide', () => this.flush({ useBeacon: true }));
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') {
+          this.flush({ useBeacon: true });
+        }
+      });
+    }
+  }
+
+  /**
+   * Add an event to the pending batch
+   * @param {Object} activityData - The activity to track
+   */
+  trackUserActivity(activityData) {
+    // Get user ID from localStorage
+    const userData = JSON.parse(localStorage.getItem('user') || 'null');
+    if (!userData || !userData.user_id) {
+      // Don't track if user is not logged in
+      return false;
+    }
+
+    this.pendingEvents.push({
+      user_id: userData.user_id,
+      ...activityData
+    });
+    if (this.pendingEvents.length > MAX_PENDING_EVENTS) {
+      this.pendingEvents.splice(0, this.pendingEvents.length - MAX_PENDING_EVENTS);
+    }
+
+    if (this.pendingEvents.length >= FLUSH_EVENT_COUNT) {
+      this.flush();
+    } else {
+      this.scheduleFlush(FLUSH_INTERVAL_MS);
+    }
+    return true;
+  }
+
+  scheduleFlush(delay) {
+    if (this.flushTimer) {
+      return;
+    }
+    this.flushTimer = setTimeout(() => {
+      this.flushTimer = null;
+      this.flush();
+    }, delay);
+  }
+
+  /**
+   * Send all pending events in batches
+   * @param {Object} options - useBeacon: send with navigator.sendBeacon (page is closing)
+   */
+  async flush({ useBeacon = false } = {}) {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+
+    while (this.pendingEvents.length > 0) {
+      const events = this.pendingEvents.splice(0, MAX_EVENTS_PER_REQUEST);
+      const result = await trackUserActivityBatch(events, { useBeacon });
+      if (!result.success && result.retryAfter) {
+        // Server đang quá tải, giữ lại sự kiện và gửi lại sau
+        this.pendingEvents.unshift(...events);
+        this.scheduleFlush(result.retryAfter * 1000);
+        return;
+      }
+    }
+  }
+
   /**
    * Track page view
    * @param {string} pagePath - The path of the page being viewed
    */
   trackPageView(pagePath) {
-    trackUserActivity({
+    this.trackUserActivity({
       action_type: 'page_view',
       page_path: pagePath
     });
@@ -20,7 +103,7 @@ class ActivityTracker {
    * @param {string} searchQuery - The search query entered by the user
    */
   trackSearch(searchQuery) {
-    trackUserActivity({
+    this.trackUserActivity({
       action_type: 'search',
       search_query: searchQuery
     });
@@ -31,7 +114,7 @@ class ActivityTracker {
    * @param {number} productId - The ID of the product being viewed
    */
   trackProductView(productId) {
-    trackUserActivity({
+    this.trackUserActivity({
       action_type: 'product_view',
       product_id: productId
     });
@@ -42,7 +125,7 @@ class ActivityTracker {
    * @param {number} categoryId - The ID of the category being viewed
    */
   trackCategoryView(categoryId) {
-    trackUserActivity({
+    this.trackUserActivity({
       action_type: 'category_view',
       category_id: categoryId
     });
@@ -54,7 +137,7 @@ class ActivityTracker {
    * @param {Object} data - Any additional data to track
    */
   trackCustomAction(actionType, data = {}) {
-    trackUserActivity({
+    this.trackUserActivity({
       action_type: actionType,
       ...data
     });
@@ -66,8 +149,8 @@ class ActivityTracker {
    */
   trackPromotionView(promotionId) {
     console.log(`ActivityTracker: User viewed promotion ${promotionId}`);
-    return trackUserActivity({
-      activity_type: 'promotion_view',
+    return this.trackUserActivity({
+      action_type: 'promotion_view',
       promotion_id: promotionId
     });
   }